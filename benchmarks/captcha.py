@@ -0,0 +1,69 @@
+"""
+Accuracy and solve time of the local captcha solver.
+
+Usage:
+    python -m benchmarks.captcha [--train 100] [--test 200] [--model model.json]
+
+Without a model, one is trained on generated captchas first. Generated
+captchas are still images and animated GIFs that show every character in
+only some of the frames.
+"""
+import argparse
+import time
+from coto.captcha.local_solver import GlyphModel, LocalSolver, load_image
+from tests import fake_captcha
+
+
+def measure(solver, samples):
+    images = [load_image(data=data) for data, _ in samples]
+    texts = [text for _, text in samples]
+
+    start = time.perf_counter()
+    single = [solver.recognize(image) for image in images]
+    single_seconds = time.perf_counter() - start
+
+    images = [load_image(data=data) for data, _ in samples]
+    start = time.perf_counter()
+    batch = solver.recognize_batch(images)
+    batch_seconds = time.perf_counter() - start
+
+    correct = [guess == text for (guess, _), text in zip(single, texts)]
+    confidences = [c for (_, c), ok in zip(single, correct) if ok]
+    print("  accuracy        {0:6.1%}".format(sum(correct) / len(correct)))
+    if confidences:
+        print("  min confidence  {0:6.2f} (correct guesses)".format(
+            min(confidences)))
+    print("  single          {0:6.2f} ms/captcha".format(
+        single_seconds / len(samples) * 1000))
+    print("  batch           {0:6.2f} ms/captcha".format(
+        batch_seconds / len(samples) * 1000))
+    assert [g for g, _ in batch] == [g for g, _ in single]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--train', type=int, default=100)
+    parser.add_argument('--test', type=int, default=200)
+    parser.add_argument('--model')
+    args = parser.parse_args()
+
+    if args.model:
+        model = GlyphModel.load(args.model)
+    else:
+        model = GlyphModel()
+        start = time.perf_counter()
+        learned = model.train(
+            (load_image(data=data), text)
+            for data, text in fake_captcha.samples(args.train, seed=1))
+        print("trained on {0}/{1} captchas in {2:.2f} s".format(
+            learned, args.train, time.perf_counter() - start))
+
+    solver = LocalSolver(model)
+    print("still images")
+    measure(solver, fake_captcha.samples(args.test, seed=2))
+    print("animated gifs")
+    measure(solver, fake_captcha.samples(args.test, seed=3, frames=3))
+
+
+if __name__ == '__main__':
+    main()
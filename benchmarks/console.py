@@ -0,0 +1,142 @@
+"""
+End-to-end benchmark of the signin paths and client methods against the
+local fake console server.
+
+Usage:
+    python -m benchmarks.console [--latency 0.02] [--iterations 50] [--concurrency 1]
+
+For every operation the latency percentiles, the number of requests sent per
+operation and the throughput are reported.
+"""
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tests.fake_console import FakeConsole
+
+MFA_SECRET = 'JBSWY3DPEHPK3PXPJBSWY3DPEHPK3PXP'
+
+
+class Credentials:
+    access_key = 'ASIAEXAMPLE'
+    secret_key = 'secret'
+    token = 'token'
+
+
+class Boto3Session:
+    def get_credentials(self):
+        return Credentials()
+
+
+def sequential_signin(console, **kwargs):
+    session = console.session()
+    session.client('signin').signin(pipeline=False, **kwargs)
+    return session
+
+
+def signin_operations(console):
+    return {
+        'signin federation': lambda: console.session(
+            boto3_session=Boto3Session()),
+        'signin root': lambda: console.session(
+            email='decoupled@example.com', password='password'),
+        'signin root mfa': lambda: console.session(
+            email='mfa@example.com', password='password',
+            mfa_secret=MFA_SECRET),
+        'signin root mfa (sequential)': lambda: sequential_signin(
+            console, email='mfa@example.com', password='password',
+            mfa_secret=MFA_SECRET),
+        'signin coupled mfa': lambda: console.session(
+            email='coupled@example.com', password='password',
+            mfa_secret=MFA_SECRET),
+    }
+
+
+def client_operations():
+    return {
+        'iam.get_account_info': ('iam', 'get_account_info'),
+        'iam.list_root_access_keys': ('iam', 'list_root_access_keys'),
+        'billing.list_alternate_contacts': ('billing', 'list_alternate_contacts'),
+        'billing.account_status': ('billing', 'account_status'),
+        'support.get_support_level': ('support', 'get_support_level'),
+        'account.get_account_info': ('account', 'get_account_info'),
+    }
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def measure(console, name, operation, iterations, concurrency):
+    console.reset_requests()
+    latencies = []
+    lock = threading.Lock()
+
+    def run(_):
+        t = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - t
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run, range(iterations)))
+    wall = time.perf_counter() - start
+
+    print("{0:<34} {1:8.1f} {2:8.1f} {3:8.1f} {4:10.1f} {5:10.1f}".format(
+        name,
+        percentile(latencies, 0.5) * 1000,
+        percentile(latencies, 0.9) * 1000,
+        percentile(latencies, 0.99) * 1000,
+        len(console.requests) / iterations,
+        iterations / wall,
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help="seconds added to every request (default 0.02)")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=1)
+    args = parser.parse_args()
+
+    with FakeConsole(latency=args.latency, reuse_codes=True) as console:
+        console.add_account('decoupled@example.com', 'password')
+        console.add_account('mfa@example.com', 'password', MFA_SECRET)
+        console.add_account(
+            'coupled@example.com', 'password', MFA_SECRET, account_type='Coupled')
+
+        print("{0:<34} {1:>8} {2:>8} {3:>8} {4:>10} {5:>10}".format(
+            'operation', 'p50 ms', 'p90 ms', 'p99 ms', 'requests', 'ops/s'))
+
+        for name, operation in signin_operations(console).items():
+            measure(console, name, operation, args.iterations, args.concurrency)
+
+        # signed in sessions shared by the workers, one per worker
+        sessions = queue.Queue()
+        for _ in range(args.concurrency):
+            sessions.put(console.session(
+                email='decoupled@example.com', password='password'))
+
+        def call(service, method):
+            session = sessions.get()
+            try:
+                return getattr(session.client(service), method)()
+            finally:
+                sessions.put(session)
+
+        for name, (service, method) in client_operations().items():
+            # obtain the tokens before measuring
+            for _ in range(args.concurrency):
+                call(service, method)
+
+            measure(
+                console, name, lambda: call(service, method),
+                args.iterations, args.concurrency)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Measure the time to import coto and to create a session with a client.
+
+Usage:
+    python -m benchmarks.imports [--runs 10]
+
+Every run uses a fresh interpreter, so the numbers match the cold start of a
+short-lived worker.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+SCENARIOS = {
+    'import coto': "import coto",
+    'session + iam client': (
+        "import coto\n"
+        "session = coto.Session()\n"
+        "session.authenticated = True\n"
+        "session.client('iam')"),
+    'session + all clients': (
+        "import coto\n"
+        "from coto.clients import SERVICES\n"
+        "session = coto.Session()\n"
+        "session.authenticated = True\n"
+        "[session.client(s) for s in SERVICES]"),
+}
+
+TIMER = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "{0}\n"
+    "print(time.perf_counter() - start)\n")
+
+
+def run(code):
+    out = subprocess.check_output([sys.executable, '-c', TIMER.format(code)])
+    return float(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    for name, code in SCENARIOS.items():
+        times = [run(code) for _ in range(args.runs)]
+        print("{0:<24} median {1:7.1f} ms  min {2:7.1f} ms".format(
+            name, statistics.median(times) * 1000, min(times) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare the html parser modes on recorded pages.
+
+Usage:
+    python -m benchmarks.parsing [page.html ...]
+
+Without arguments, generated pages shaped like the signin and IAM console
+pages are used. Pass pages saved from a browser to measure real pages.
+"""
+import sys
+import timeit
+from coto.parsing import Parser, PARSERS
+
+
+def generated_pages():
+    script = "<script>" + "var a = {'k': 'v'};\n" * 2000 + "</script>"
+    body = "<div class='row'><span>text</span></div>\n" * 3000
+
+    signin = (
+        "<html><head>"
+        "<meta charset='utf-8'>"
+        "<meta name='csrf_token' content='0123456789abcdef'>"
+        "<meta name='session_id' content='fedcba9876543210'>"
+        + script + "</head><body>" + body + "</body></html>")
+    iam = (
+        "<html><head>"
+        "<meta id='xsrf-token' data-token='token=='>"
+        + script + "</head><body>" + body + "</body></html>")
+
+    return {
+        'signin': (signin, dict(required=('csrf_token', 'session_id'))),
+        'iam': (iam, dict(
+            attr='id', value='data-token', required=('xsrf-token', ))),
+    }
+
+
+def recorded_pages(paths):
+    pages = {}
+    for path in paths:
+        with open(path) as fp:
+            pages[path] = (fp.read(), {})
+    return pages
+
+
+def main(argv):
+    pages = recorded_pages(argv) if argv else generated_pages()
+    parsers = []
+    for mode in PARSERS:
+        try:
+            parsers.append(Parser(mode))
+        except Exception as e:
+            print("skipping {0}: {1}".format(mode, e))
+
+    for name, (text, kwargs) in pages.items():
+        print("{0} ({1} bytes)".format(name, len(text)))
+        expected = parsers[0].meta(text, **kwargs)
+
+        for parser in parsers:
+            result = parser.meta(text, **kwargs)
+            same = result == expected
+
+            number = 20
+            seconds = timeit.timeit(
+                lambda: parser.meta(text, **kwargs), number=number)
+            print("  {0:<12} {1:8.2f} ms  {2}".format(
+                parser.mode, seconds / number * 1000,
+                'identical' if same else 'DIFFERENT'))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,79 @@
+"""
+Compare the temp file and the in-memory password reset captcha pipelines.
+
+Usage:
+    python -m benchmarks.resetpassword [captcha.gif ...]
+
+Without arguments, generated animated GIFs shaped like the password reset
+captchas are used. Pass captchas saved from the password reset page to
+measure real images.
+"""
+from io import BytesIO
+import base64
+import shutil
+import sys
+import tempfile
+import timeit
+from PIL import Image
+from coto.clients.resetpassword import Client
+from tests import fake_captcha
+
+
+def tempfile_pipeline(data):
+    # the pipeline before images were processed in memory
+    tmp_folder = tempfile.TemporaryDirectory()
+    tmp_img = f'{tmp_folder.name}/original'
+    with open(tmp_img, 'wb') as f:
+        shutil.copyfileobj(BytesIO(data), f)
+    imageObject = Image.open(tmp_img)
+
+    images = []
+    buffered = BytesIO()
+    if imageObject.format != 'GIF':
+        imageObject.save(fp=buffered, format=imageObject.format.lower())
+    else:
+        for frame in range(0, imageObject.n_frames, 6):
+            imageObject.seek(frame)
+            imageObject.save(f'{tmp_folder.name}/image_{frame}.gif')
+            images.append(Image.open(f'{tmp_folder.name}/image_{frame}.gif'))
+
+        gif = images[0]
+        gif.save(fp=buffered, format='gif', save_all=True,
+                 append_images=images[1:], duration=250)
+
+    buffered.seek(0)
+    img_byte = buffered.getvalue()
+    img_str = f"data:image/{imageObject.format.lower()};base64," + \
+        base64.b64encode(img_byte).decode()
+    tmp_folder.cleanup()
+    return img_str
+
+
+def memory_pipeline(data):
+    client = Client.__new__(Client)
+    return client.process_image(Image.open(BytesIO(data)))
+
+
+def main(argv):
+    if argv:
+        captchas = {}
+        for path in argv:
+            with open(path, 'rb') as fp:
+                captchas[path] = fp.read()
+    else:
+        captchas = {
+            'generated gif': fake_captcha.render(
+                'x7k2mq', frames=24, noise=200, seed=1),
+        }
+
+    for name, data in captchas.items():
+        print("{0} ({1} bytes)".format(name, len(data)))
+        for pipeline in (tempfile_pipeline, memory_pipeline):
+            number = 50
+            seconds = timeit.timeit(lambda: pipeline(data), number=number)
+            print("  {0:<20} {1:8.2f} ms".format(
+                pipeline.__name__, seconds / number * 1000))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
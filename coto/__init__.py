@@ -1 +1,10 @@
 from .session import Session
+
+
+def __getattr__(name):
+    # SessionPool, AsyncSession and OrganizationPool are imported on first use
+    if name in ('SessionPool', 'AsyncSession', 'OrganizationPool'):
+        from . import session
+        return getattr(session, name)
+
+    raise AttributeError("module {0} has no attribute {1}".format(__name__, name))
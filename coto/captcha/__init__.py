@@ -0,0 +1,283 @@
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, TimeoutError
+import contextvars
+import threading
+import time
+from .. import exceptions
+
+
+class CaptchaJob(Future):
+    """
+    Future for the guess of a captcha.
+
+    Use ``add_done_callback`` to be notified of the guess, ``result`` to wait
+    for it, or ``asyncio.wrap_future`` to await it.
+
+    Attributes:
+        job_id: Identifier of the job, pass it to ``incorrect`` when the
+            guess turns out to be wrong.
+
+    ``cancel`` also stops a job whose solver is already working on it, once
+    the solver checks :py:meth:`cancel_requested`; the job then fails with
+    ``CancelledError``.
+    """
+
+    def __init__(self, job_id=None):
+        super().__init__()
+        self.job_id = job_id
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+        return super().cancel()
+
+    def cancel_requested(self):
+        """
+        Returns:
+            bool: Whether the guess is no longer needed.
+        """
+        return self._cancel_event.is_set()
+
+
+class CaptchaPending(Exception):
+    """
+    Raised instead of waiting for a guess by calls whose caller awaits
+    guesses itself, see :py:func:`await_guesses`. The caller waits for
+    ``job``, passes the guess to :py:meth:`resume` and makes the call again,
+    which then sends the guess.
+    """
+
+    def __init__(self, job, resume):
+        super().__init__("waiting for captcha job {0}".format(job.job_id))
+        self.job = job
+        self._resume = resume
+
+    def resume(self, guess):
+        """
+        Args:
+            guess (str): The result of ``job``.
+        """
+        self._resume(guess)
+
+
+class AwaitedGuesses:
+    """
+    Guesses awaited by the caller of a call, by the key of the request they
+    are for, eg., the signin action.
+    """
+
+    def __init__(self):
+        self._guesses = {}
+        self._sent = {}
+
+    def take(self, key):
+        """
+        Returns:
+            object: The guess for the next request of ``key``, ``None`` if
+            there is none.
+        """
+        entry = self._guesses.pop(key, None)
+        if entry is None:
+            return None
+
+        self._sent[key] = entry[0]
+        return entry[1]
+
+    def pending(self, captcha_solver, key, make_guess, base64=None, url=None,
+                timeout=None):
+        """
+        Submit a captcha, a guess sent for ``key`` before was incorrect.
+
+        Args:
+            captcha_solver (Solver): Event-driven solver.
+            key (str): Key of the request the captcha is for.
+            make_guess (callable): Returns what :py:meth:`take` returns for
+                the result of the job.
+            base64 (str): The captcha image, base64 encoded.
+            url (str): Url of the captcha image.
+            timeout (float): Seconds the guess is useful.
+
+        Returns:
+            CaptchaPending: To raise.
+        """
+        sent = self._sent.pop(key, None)
+        if sent is not None:
+            captcha_solver.incorrect(sent.job_id)
+
+        deadline = time.time() + timeout if timeout is not None else None
+        job = captcha_solver.submit(base64=base64, url=url, deadline=deadline)
+
+        def resume(guess):
+            self._guesses[key] = (job, make_guess(guess))
+
+        return CaptchaPending(job, resume)
+
+
+_awaited = contextvars.ContextVar('coto_captcha_awaited', default=None)
+
+
+def await_guesses():
+    """
+    Let the caller await the captcha guesses of calls made in the current
+    context: the calls raise :py:class:`CaptchaPending` instead of waiting
+    for a guess in their thread.
+    """
+    _awaited.set(AwaitedGuesses())
+
+
+def awaited():
+    """
+    Returns:
+        AwaitedGuesses: The guesses awaited by the caller, ``None`` when
+        calls wait for guesses themselves.
+    """
+    return _awaited.get()
+
+
+class Solver:
+    """
+    Base class for event-driven captcha solvers.
+
+    A solver returns a :py:class:`CaptchaJob` from :py:meth:`submit` and
+    sets its result the moment the guess is known, so the signin continues
+    without polling. Many jobs can be outstanding at the same time.
+
+    Solvers implementing only ``solve``, ``result`` and ``incorrect``, eg.,
+    :py:class:`coto.captcha.iterm_solver.iTermSolver`, are wrapped in a
+    :py:class:`PollingSolver` by :py:func:`solver`.
+    """
+
+    def submit(self, base64=None, url=None, deadline=None):
+        """
+        Submit a captcha.
+
+        Args:
+            base64 (str): The captcha image, base64 encoded.
+            url (str): Url of the captcha image.
+            deadline (float): Epoch time after which the guess is no longer
+                useful, ``None`` for no deadline.
+
+        Returns:
+            CaptchaJob: Future for the guess.
+        """
+        raise NotImplementedError()
+
+    def incorrect(self, job_id):
+        """
+        Report that the guess of a job was incorrect.
+        """
+        pass
+
+
+class PollingSolver(Solver):
+    """
+    Adapts a solver implementing ``solve``, ``result`` and ``incorrect`` to
+    the :py:class:`Solver` interface.
+
+    The result is polled in a worker thread, starting at a short interval
+    that grows up to ``max_interval``, so guesses that are available quickly
+    are picked up quickly.
+    """
+
+    def __init__(self, solver, interval=0.1, max_interval=5, max_jobs=10):
+        """
+        Args:
+            solver: Solver implementing ``solve``, ``result`` and
+                ``incorrect``.
+            interval (float): Seconds before the first poll.
+            max_interval (float): Maximum seconds between polls.
+            max_jobs (int): Maximum number of captchas solved concurrently.
+        """
+        self.solver = solver
+        self.interval = interval
+        self.max_interval = max_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs)
+
+    def _poll(self, job, base64, url, deadline):
+        if not job.set_running_or_notify_cancel():
+            return
+
+        try:
+            job.job_id = self.solver.solve(base64=base64, url=url)
+            interval = self.interval
+
+            while not job.cancel_requested():
+                guess = self.solver.result(job.job_id)
+                if guess is not None:
+                    job.set_result(guess)
+                    return
+
+                if deadline is not None and time.time() + interval > deadline:
+                    raise exceptions.DeadlineExceeded(
+                        "captcha not solved before deadline")
+
+                # returns early when the job is cancelled
+                job._cancel_event.wait(interval)
+                interval = min(interval * 2, self.max_interval)
+
+            raise CancelledError("captcha job {0} cancelled".format(job.job_id))
+        except Exception as e:
+            job.set_exception(e)
+
+    def submit(self, base64=None, url=None, deadline=None):
+        job = CaptchaJob()
+        self._executor.submit(self._poll, job, base64, url, deadline)
+        return job
+
+    def incorrect(self, job_id):
+        self.solver.incorrect(job_id)
+
+    # the wrapped solver remains usable through the polling interface
+    def solve(self, base64=None, url=None):
+        return self.solver.solve(base64=base64, url=url)
+
+    def result(self, job_id):
+        return self.solver.result(job_id)
+
+
+def solver(captcha_solver):
+    """
+    Get an event-driven solver for any captcha solver.
+
+    Args:
+        captcha_solver: A :py:class:`Solver`, or a solver implementing
+            ``solve``, ``result`` and ``incorrect``.
+
+    Returns:
+        Solver: Event-driven solver.
+    """
+    if captcha_solver is None or hasattr(captcha_solver, 'submit'):
+        return captcha_solver
+
+    return PollingSolver(captcha_solver)
+
+
+def guess(captcha_solver, base64=None, url=None, timeout=None):
+    """
+    Submit a captcha and wait for the guess.
+
+    Args:
+        captcha_solver (Solver): Event-driven solver.
+        base64 (str): The captcha image, base64 encoded.
+        url (str): Url of the captcha image.
+        timeout (float): Seconds to wait, ``None`` to wait indefinitely.
+
+    Returns:
+        CaptchaJob: Job with the guess as result, ``job.result()`` does not
+        block.
+
+    Raises:
+        coto.exceptions.DeadlineExceeded: No guess within ``timeout``, the
+            job is cancelled.
+    """
+    deadline = time.time() + timeout if timeout is not None else None
+    job = captcha_solver.submit(base64=base64, url=url, deadline=deadline)
+
+    try:
+        job.result(timeout=timeout)
+    except TimeoutError:
+        # nobody waits for the guess any more
+        job.cancel()
+        raise exceptions.DeadlineExceeded(
+            "captcha not solved within {0} seconds".format(timeout))
+
+    return job
@@ -0,0 +1,428 @@
+import base64 as b64
+from collections import OrderedDict
+from io import BytesIO
+import json
+import queue
+import threading
+import uuid
+import requests
+from . import CaptchaJob, Solver
+
+GLYPH_SIZE = (12, 16)
+
+
+def _bit_count(x):
+    return bin(x).count('1')
+
+
+def load_image(base64=None, url=None, data=None, timeout=10, verify=True):
+    """
+    Decode a captcha image in memory.
+
+    Args:
+        base64 (str): The image base64 encoded, optionally as a ``data:``
+            url like :py:meth:`coto.clients.resetpassword.Client.process_image`
+            returns.
+        url (str): Url of the image.
+        data (bytes): The image.
+        timeout (float): Seconds to wait for the image at ``url``.
+        verify (str | bool): SSL certificate checking for ``url``, see the
+            ``verify`` argument of :py:class:`coto.Session`.
+
+    Returns:
+        PIL.Image.Image: Image.
+    """
+    from PIL import Image
+
+    if data is None:
+        if base64:
+            if base64.startswith('data:'):
+                base64 = base64.split(',', 1)[1]
+            data = b64.b64decode(base64)
+        elif url:
+            r = requests.get(url, timeout=timeout, verify=verify)
+            r.raise_for_status()
+            data = r.content
+        else:
+            raise Exception("pass `url` or `base64`")
+
+    return Image.open(BytesIO(data))
+
+
+def flatten(image):
+    """
+    Convert an image to grayscale, combining the frames of an animated GIF
+    by keeping the darkest value of every pixel, so characters shown in
+    different frames all end up in the result.
+
+    Args:
+        image (PIL.Image.Image): Image.
+
+    Returns:
+        PIL.Image.Image: Grayscale image.
+    """
+    from PIL import ImageChops
+
+    result = None
+    for frame in range(getattr(image, 'n_frames', 1)):
+        image.seek(frame)
+        gray = image.convert('L')
+        result = gray if result is None else ImageChops.darker(result, gray)
+    return result
+
+
+def _otsu(histogram):
+    total = sum(histogram)
+    sum_all = sum(i * h for i, h in enumerate(histogram))
+    sum_back = weight_back = 0
+    best, threshold = -1, 128
+
+    for i, h in enumerate(histogram):
+        weight_back += h
+        if weight_back == 0:
+            continue
+        weight_fore = total - weight_back
+        if weight_fore == 0:
+            break
+        sum_back += i * h
+        mean_back = sum_back / weight_back
+        mean_fore = (sum_all - sum_back) / weight_fore
+        between = weight_back * weight_fore * (mean_back - mean_fore) ** 2
+        if between > best:
+            best, threshold = between, i
+
+    return threshold
+
+
+def binarize(gray):
+    """
+    Threshold a grayscale image with Otsu's method.
+
+    Args:
+        gray (PIL.Image.Image): Grayscale image with dark text.
+
+    Returns:
+        PIL.Image.Image: Grayscale image, text 255 and background 0.
+    """
+    threshold = _otsu(gray.histogram())
+    return gray.point(lambda p: 255 if p <= threshold else 0)
+
+
+def segment(binary, min_pixels=4):
+    """
+    Split a binarized image in glyphs at the empty columns.
+
+    Args:
+        binary (PIL.Image.Image): Image from :py:func:`binarize`.
+        min_pixels (int): Glyphs with fewer text pixels are noise.
+
+    Returns:
+        list: Bounding box of every glyph, left to right.
+    """
+    from PIL import Image
+
+    width, height = binary.size
+    # the mean of every column, computed by resizing to a single row
+    columns = list(binary.resize((width, 1), Image.BOX).tobytes())
+
+    boxes = []
+    start = None
+    for x, value in enumerate(columns + [0]):
+        if value and start is None:
+            start = x
+        elif not value and start is not None:
+            glyph = binary.crop((start, 0, x, height))
+            bbox = glyph.getbbox()
+            pixels = sum(columns[start:x]) * height / 255
+            if bbox is not None and pixels >= min_pixels:
+                boxes.append((start, bbox[1], x, bbox[3]))
+            start = None
+
+    return boxes
+
+
+def glyph_vector(binary, box):
+    """
+    Scale a glyph to :py:data:`GLYPH_SIZE` and pack it in an integer, one
+    bit per pixel.
+    """
+    from PIL import Image
+
+    glyph = binary.crop(box).resize(GLYPH_SIZE, Image.BOX)
+    return int.from_bytes(glyph.point(lambda p: 255 if p >= 96 else 0)
+                          .convert('1').tobytes(), 'big')
+
+
+def glyphs(image):
+    """
+    Preprocess a captcha image into glyph vectors.
+
+    Args:
+        image (PIL.Image.Image): Image from :py:func:`load_image`.
+
+    Returns:
+        list: Vector of every glyph, left to right.
+    """
+    binary = binarize(flatten(image))
+    return [glyph_vector(binary, box) for box in segment(binary)]
+
+
+class GlyphModel:
+    """
+    Nearest-neighbour glyph classifier, trained on labelled captchas.
+
+    Glyphs are compared by the number of differing pixels, so the model runs
+    on the CPU without dependencies beyond Pillow.
+
+    .. code-block:: python
+
+        from coto.captcha.local_solver import GlyphModel, load_image
+
+        model = GlyphModel()
+        model.train(
+            (load_image(data=open(path, 'rb').read()), text)
+            for path, text in labelled)
+        model.save('captcha-model.json')
+    """
+
+    def __init__(self, templates=None):
+        """
+        Args:
+            templates (dict): Glyph vectors by character.
+        """
+        self.templates = templates or {}
+        self._items = [
+            (label, vector)
+            for label, vectors in self.templates.items()
+            for vector in vectors]
+
+    def add(self, label, vector):
+        self.templates.setdefault(label, []).append(vector)
+        self._items.append((label, vector))
+
+    def train(self, samples):
+        """
+        Learn the glyphs of labelled captchas. Captchas that do not split in
+        exactly one glyph per character are skipped.
+
+        Args:
+            samples (iterable): ``(image, text)`` tuples.
+
+        Returns:
+            int: Number of captchas learned from.
+        """
+        learned = 0
+        for image, text in samples:
+            vectors = glyphs(image)
+            if len(vectors) != len(text):
+                continue
+            for label, vector in zip(text, vectors):
+                self.add(label, vector)
+            learned += 1
+        return learned
+
+    def classify(self, vector):
+        """
+        Classify a glyph.
+
+        Returns:
+            tuple: The character and a confidence between 0 and 1, from the
+            distance to the nearest template of any other character.
+        """
+        if not self._items:
+            raise Exception("captcha model has no templates")
+
+        best = {}
+        for label, template in self._items:
+            distance = _bit_count(vector ^ template)
+            if distance < best.get(label, distance + 1):
+                best[label] = distance
+
+        ranked = sorted(best.items(), key=lambda i: i[1])
+        label, distance = ranked[0]
+        if len(ranked) == 1:
+            return label, 1.0
+        runner_up = ranked[1][1]
+        return label, (runner_up - distance) / runner_up if runner_up else 0.0
+
+    def save(self, path):
+        with open(path, 'w') as fp:
+            json.dump({
+                'size': GLYPH_SIZE,
+                'templates': {
+                    label: [format(v, 'x') for v in vectors]
+                    for label, vectors in self.templates.items()},
+            }, fp)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as fp:
+            data = json.load(fp)
+
+        if tuple(data['size']) != GLYPH_SIZE:
+            raise Exception("captcha model glyph size unsupported")
+
+        return cls({
+            label: [int(v, 16) for v in vectors]
+            for label, vectors in data['templates'].items()})
+
+
+class LocalSolver(Solver):
+    """
+    Solves captchas offline with a :py:class:`GlyphModel`.
+
+    Implements both the :py:class:`coto.captcha.Solver` interface, which
+    recognizes pending captchas in batches on a worker thread, and the
+    ``solve``, ``result`` and ``incorrect`` methods of the other solvers.
+
+    .. code-block:: python
+
+        import coto
+        from coto.captcha.local_solver import GlyphModel, LocalSolver
+
+        solver = LocalSolver(GlyphModel.load('captcha-model.json'))
+        session = coto.Session(captcha_solver=solver)
+
+    Jobs of :py:meth:`submit` carry a ``confidence`` attribute, guesses
+    below ``min_confidence`` fail, eg., to let a
+    :py:class:`coto.captcha.racing_solver.RacingSolver` fall back to a
+    human.
+    """
+
+    def __init__(
+        self, model, min_confidence=0.0, max_batch=32, max_jobs=1000,
+        timeout=10, verify=True
+    ):
+        """
+        Args:
+            model (GlyphModel | str): Model, or the path of a saved model.
+            min_confidence (float): Minimum confidence of a guess.
+            max_batch (int): Maximum number of captchas recognized together.
+            max_jobs (int): Number of guesses and incorrect reports
+                remembered for ``result`` and ``incorrect``.
+            timeout (float): Seconds to wait for an image passed by url.
+            verify (str | bool): SSL certificate checking for images passed
+                by url, see the ``verify`` argument of
+                :py:class:`coto.Session`.
+        """
+        if isinstance(model, str):
+            model = GlyphModel.load(model)
+
+        self.model = model
+        self.min_confidence = min_confidence
+        self.max_batch = max_batch
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.verify = verify
+        self.jobs = OrderedDict()
+        self.wrong = OrderedDict()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def recognize(self, image):
+        """
+        Args:
+            image (PIL.Image.Image): Captcha image.
+
+        Returns:
+            tuple: The guess and its confidence, the lowest confidence of
+            its characters.
+        """
+        return self.recognize_batch([image])[0]
+
+    def recognize_batch(self, images):
+        """
+        Recognize many captchas, classifying every distinct glyph once.
+
+        Args:
+            images (list): Captcha images.
+
+        Returns:
+            list: ``(guess, confidence)`` for every image.
+        """
+        vectors = [glyphs(image) for image in images]
+        classified = {}
+        for vector in set(v for vs in vectors for v in vs):
+            classified[vector] = self.model.classify(vector)
+
+        results = []
+        for vs in vectors:
+            chars = [classified[v] for v in vs]
+            guess = ''.join(c for c, _ in chars)
+            confidence = min((c for _, c in chars), default=0.0)
+            results.append((guess, confidence))
+        return results
+
+    def _remember(self, entries, key, value):
+        with self._lock:
+            entries[key] = value
+            while len(entries) > self.max_jobs:
+                entries.popitem(last=False)
+
+    def _load(self, base64, url):
+        return load_image(
+            base64=base64, url=url, timeout=self.timeout, verify=self.verify)
+
+    # Solver interface
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            batch = [
+                (job, image) for job, image in batch
+                if job.set_running_or_notify_cancel()]
+            try:
+                results = self.recognize_batch([image for _, image in batch])
+            except Exception as e:
+                for job, _ in batch:
+                    job.set_exception(e)
+                continue
+
+            for (job, _), (guess, confidence) in zip(batch, results):
+                job.confidence = confidence
+                self._remember(self.jobs, job.job_id, (guess, confidence))
+                if confidence < self.min_confidence:
+                    job.set_exception(Exception(
+                        "captcha guess {0} below confidence".format(guess)))
+                else:
+                    job.set_result(guess)
+
+    def submit(self, base64=None, url=None, deadline=None):
+        job = CaptchaJob(str(uuid.uuid4()))
+        job.confidence = None
+        try:
+            image = self._load(base64, url)
+        except Exception as e:
+            job.set_exception(e)
+            return job
+
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+        self._queue.put((job, image))
+        return job
+
+    # solve, result and incorrect
+    def solve(self, base64=None, url=None):
+        job_id = str(uuid.uuid4())
+        guess = self.recognize(self._load(base64, url))
+        self._remember(self.jobs, job_id, guess)
+        return job_id
+
+    def result(self, job_id):
+        guess = self.jobs.get(job_id)
+        return guess[0] if guess is not None else None
+
+    def confidence(self, job_id):
+        guess = self.jobs.get(job_id)
+        return guess[1] if guess is not None else None
+
+    def incorrect(self, job_id):
+        self._remember(self.wrong, job_id, True)
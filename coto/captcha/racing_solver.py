@@ -0,0 +1,217 @@
+from collections import OrderedDict
+import threading
+import time
+import uuid
+from . import CaptchaJob, Solver, solver as event_solver
+
+
+class _Backend:
+    def __init__(self, name, solver):
+        self.name = name
+        self.solver = solver
+        self.samples = 0
+        self.wins = 0
+        self.incorrect = 0
+        self.latency = None
+
+    @property
+    def accuracy(self):
+        if not self.wins:
+            return None
+        return 1 - self.incorrect / self.wins
+
+    def stats(self):
+        return {
+            'samples': self.samples,
+            'wins': self.wins,
+            'incorrect': self.incorrect,
+            'accuracy': self.accuracy,
+            'latency': self.latency,
+        }
+
+
+class RacingSolver(Solver):
+    """
+    Races several captcha solvers and takes the first guess.
+
+    Every raced backend updates its average latency, a backend that lost
+    the race counts as slow as the winner. The backend whose guess was used
+    updates its accuracy when the guess is reported :py:meth:`incorrect`.
+    Once a backend has ``min_samples`` latency samples, it is only raced
+    while its accuracy is at least ``min_accuracy``, and only the ``fanout``
+    fastest accurate backends are raced, by default the fastest one; of
+    backends equally fast the one winning most often is preferred. Backends
+    with fewer samples are always raced, so they get measured.
+
+    .. code-block:: python
+
+        import coto
+        from coto.captcha.iterm_solver import iTermSolver
+        from coto.captcha.racing_solver import RacingSolver
+
+        solver = RacingSolver({
+            'human': iTermSolver(),
+            'ocr': my_ocr_solver,
+        })
+        session = coto.Session(captcha_solver=solver)
+    """
+
+    def __init__(
+        self, solvers, fanout=1, min_accuracy=0.5, min_samples=3,
+        smoothing=0.3, max_jobs=1000
+    ):
+        """
+        Args:
+            solvers (dict | list): Solvers by name, or a list of solvers.
+                Solvers implementing ``solve``, ``result`` and ``incorrect``
+                are polled, see :py:class:`coto.captcha.PollingSolver`.
+            fanout (int): Maximum number of measured backends raced per
+                captcha (default 1), ``None`` for all.
+            min_accuracy (float): Accuracy below which a measured backend is
+                no longer raced, unless no backend is accurate enough.
+            min_samples (int): Latency samples before a backend is ranked.
+            smoothing (float): Weight of the latest latency in the average.
+            max_jobs (int): Number of jobs remembered for :py:meth:`incorrect`.
+        """
+        if not isinstance(solvers, dict):
+            solvers = {
+                "{0}-{1}".format(type(s).__name__, i): s
+                for i, s in enumerate(solvers)}
+        if not solvers:
+            raise Exception("pass at least one solver")
+
+        self._backends = [
+            _Backend(name, event_solver(s)) for name, s in solvers.items()]
+        self.fanout = fanout
+        self.min_accuracy = min_accuracy
+        self.min_samples = min_samples
+        self.smoothing = smoothing
+        self._max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _route(self):
+        new = [b for b in self._backends if b.samples < self.min_samples]
+        measured = [b for b in self._backends if b.samples >= self.min_samples]
+
+        def accuracy(b):
+            return b.accuracy if b.accuracy is not None else 1.0
+
+        def latency(b):
+            return b.latency if b.latency is not None else float('inf')
+
+        accurate = [b for b in measured if accuracy(b) >= self.min_accuracy]
+        if not accurate and not new:
+            accurate = measured
+        # a loser counts as fast as the winner, wins break the tie
+        accurate.sort(key=lambda b: (
+            latency(b) / max(accuracy(b), 0.01), -b.wins / max(b.samples, 1)))
+
+        if self.fanout is not None:
+            accurate = accurate[:self.fanout]
+
+        return accurate + new
+
+    def _sample(self, backend, latency):
+        backend.samples += 1
+        if backend.latency is None:
+            backend.latency = latency
+        else:
+            backend.latency += self.smoothing * (latency - backend.latency)
+
+    def submit(self, base64=None, url=None, deadline=None):
+        job = CaptchaJob(str(uuid.uuid4()))
+        with self._lock:
+            backends = self._route()
+
+        pending = [len(backends)]
+        sampled = set()
+        subs = []
+
+        def sample(i, latency):
+            if i not in sampled:
+                sampled.add(i)
+                self._sample(backends[i], latency)
+
+        def done(i, sub):
+            latency = time.perf_counter() - started
+            with self._lock:
+                pending[0] -= 1
+                last = pending[0] == 0
+                # a cancelled backend was sampled when it lost
+                if sub.cancelled():
+                    return
+                error = sub.exception()
+                if error is None:
+                    sample(i, latency)
+                if job.done():
+                    return
+                if error is None:
+                    backends[i].wins += 1
+                    self._jobs[job.job_id] = (backends[i], sub.job_id)
+                    while len(self._jobs) > self._max_jobs:
+                        self._jobs.popitem(last=False)
+                    # the losers are at least as slow as the winner
+                    for j, other in enumerate(subs):
+                        if not other.done():
+                            sample(j, latency)
+
+            if error is None:
+                job.set_result(sub.result())
+                for other in subs:
+                    if other is not sub:
+                        other.cancel()
+            elif last:
+                job.set_exception(error)
+
+        started = time.perf_counter()
+        for backend in backends:
+            sub = backend.solver.submit(base64=base64, url=url, deadline=deadline)
+            subs.append(sub)
+
+        for i, sub in enumerate(subs):
+            sub.add_done_callback(lambda s, i=i: done(i, s))
+
+        return job
+
+    def incorrect(self, job_id):
+        with self._lock:
+            backend, sub_id = self._jobs.pop(job_id, (None, None))
+            if backend is not None:
+                backend.incorrect += 1
+
+        if backend is not None:
+            backend.solver.incorrect(sub_id)
+
+    def stats(self):
+        """
+        Latency and accuracy of every backend.
+
+        Returns:
+            dict: Response Syntax
+
+            .. code-block:: python
+
+                {
+                    'name': {
+                        'samples': int,
+                        'wins': int,
+                        'incorrect': int,
+                        'accuracy': float,
+                        'latency': float,
+                    }
+                }
+
+            **samples** (*int*) -- Captchas answered or lost by this
+            backend.
+
+            **wins** (*int*) -- Guesses of this backend that were used.
+
+            **accuracy** (*float*) -- Share of the used guesses that were
+            not reported incorrect, ``None`` before the first win.
+
+            **latency** (*float*) -- Moving average of the seconds to
+            answer, ``None`` before the first sample.
+        """
+        with self._lock:
+            return {b.name: b.stats() for b in self._backends}
@@ -1,19 +1,201 @@
+import contextvars
+import copy
+import functools
+import importlib
+import json
+
+_operation = contextvars.ContextVar('coto_operation', default=None)
+
+
+def _service(client):
+    return type(client).__module__.rsplit('.', 1)[-1]
+
+
+def current_operation():
+    """
+    Returns:
+        str: The client method the requests of the current thread are sent
+        for, eg., ``iam.get_account_info``, ``None`` outside of client
+        methods.
+    """
+    return _operation.get()
+
+
+def _operation_method(name, method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # requests are attributed to the method the caller called
+        if _operation.get() is not None:
+            return method(self, *args, **kwargs)
+
+        token = _operation.set(name)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            _operation.reset(token)
+
+    return wrapper
+
+
+def _write_epoch(session, name):
+    with session._write_epochs_lock:
+        return session._write_epochs.get((session._cache_scope, name), 0)
+
+
+def _call_key(session, name, args, kwargs):
+    # a call started after a change never shares a call started before it
+    arguments = json.dumps([args, kwargs], sort_keys=True, default=repr)
+    return ('request', session._cache_scope, name,
+            _write_epoch(session, name), arguments)
+
+
+def cached(method):
+    """
+    Decorator caching the result of a read-only client method in the
+    response cache of the session, if any, see
+    :py:class:`coto.session.cache.ResponseCache`.
+
+    Concurrent identical calls on a session share one call.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        session = self.session()
+        name = '{0}.{1}'.format(_service(self), method.__name__)
+        cache = session._response_cache
+
+        def call():
+            if cache is None or session._cache_scope is None:
+                return method(self, *args, **kwargs)
+
+            return cache.call(
+                session._cache_scope, name,
+                lambda: method(self, *args, **kwargs),
+                args, kwargs)
+
+        value, shared = session._flight.do(
+            _call_key(session, name, args, kwargs), call)
+        # callers may modify the result they get
+        return copy.deepcopy(value) if shared else value
+
+    return wrapper
+
+
+def invalidates(*names):
+    """
+    Decorator for client methods changing the account, invalidating the
+    cached results of the methods ``names`` of the same client once done.
+
+    Calls of these methods started afterwards do not share calls that were
+    in flight during the change.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                session = self.session()
+                scope = session._cache_scope
+                cache = session._response_cache
+                for name in names:
+                    name = '{0}.{1}'.format(_service(self), name)
+                    with session._write_epochs_lock:
+                        key = (scope, name)
+                        session._write_epochs[key] = \
+                            session._write_epochs.get(key, 0) + 1
+                    if cache is not None and scope is not None:
+                        cache.invalidate(scope, name)
+
+        return wrapper
+
+    return decorator
+
+
 class BaseClient:
     REQUIRES_AUTHENTICATION = True
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        service = cls.__module__.rsplit('.', 1)[-1]
+        for name, attr in list(vars(cls).items()):
+            if not name.startswith('_') and callable(attr):
+                setattr(cls, name, _operation_method(
+                    '{0}.{1}'.format(service, name), attr))
+
     def __init__(self, session):
         self._session = session
 
     def session(self):
         return self._session
 
-from . import billing
-from . import account
-from . import federation
-from . import iam
-from . import mfa
-from . import support
-from . import resetpassword
-from . import signin
-from . import signin_amazon
-from . import signin_aws
+    def _coalesce(self, key, fn):
+        """
+        Call ``fn`` once for concurrent callers on the same session, see
+        :py:class:`coto.session.singleflight.SingleFlight`.
+
+        Returns:
+            object: Result of ``fn``.
+        """
+        return self.session()._flight.do(key, fn)[0]
+
+    def _get_state(self):
+        """
+        Returns:
+            dict: Tokens to save in the session store.
+        """
+        return {}
+
+    def _set_state(self, state):
+        """
+        Args:
+            state (dict): Tokens restored from the session store.
+        """
+        pass
+
+    def _token_request(self, token_name, fetch_token, send):
+        """
+        Send a request guarded by a session token. When the token is
+        rejected, a new token is fetched and the request is sent once more.
+
+        Args:
+            token_name (str): Name of the token in the session token manager.
+            fetch_token (callable): Returns a new token.
+            send (callable): Sends the request with the given token and
+                returns the response.
+
+        Returns:
+            requests.Response: Response.
+        """
+        tokens = self.session()._tokens
+        token = tokens.get(token_name, fetch_token)
+        r = send(token)
+
+        if r.status_code == 403:
+            # keep a token another thread obtained meanwhile
+            tokens.invalidate(token_name, token)
+            r = send(tokens.get(token_name, fetch_token))
+
+        return r
+
+
+# client modules are imported on first use by coto.Session.client
+SERVICES = (
+    'account',
+    'billing',
+    'federation',
+    'iam',
+    'mfa',
+    'resetpassword',
+    'signin',
+    'signin_amazon',
+    'signin_aws',
+    'support',
+)
+
+
+def __getattr__(name):
+    # keeps coto.clients.iam and friends working without importing them all
+    if name in SERVICES:
+        return importlib.import_module('.' + name, __name__)
+
+    raise AttributeError("module {0} has no attribute {1}".format(__name__, name))
@@ -1,8 +1,5 @@
-from bs4 import BeautifulSoup
-from pyotp import TOTP
-from datetime import datetime, timedelta
-import json
-from . import BaseClient
+from . import BaseClient, cached, invalidates
+from .. import exceptions
 
 
 class ReauthException(Exception):
@@ -33,9 +30,15 @@ class Client(BaseClient):
         super().__init__(session)
         self.__csrf_token = None
 
+    def _get_state(self):
+        return {'csrf_token': self.__csrf_token}
+
+    def _set_state(self, state):
+        self.__csrf_token = state.get('csrf_token')
+
     def _csrf_token(self):
         if self.__csrf_token == None:
-            self._get_tokens()
+            self._coalesce(('token', 'account'), self._get_tokens)
 
         return self.__csrf_token
 
@@ -45,22 +48,19 @@ class Client(BaseClient):
         )
 
         if r.status_code != 200:
-            raise Exception("failed get tokens")
+            raise exceptions.response_error("failed get tokens", r)
 
-        soup = BeautifulSoup(r.text, 'html.parser')
-        meta = {
-            m['name']: m['content']
-            for m in soup.find_all('meta') if 'name' in m.attrs
-        }
+        meta = self.session()._parser.meta(r.text, required=('csrf_token', ))
         self.__csrf_token = meta['csrf_token']
 
-    def _action(self, action, data=None):
+    def _action(self, action, data=None, idempotent=None):
         """
         Execute an action on the updateaccount API.
 
         Args:
             action: Action to execute.
             data: Arguments for the action.
+            idempotent: Whether the action only reads and may be retried.
 
         Returns:
             dict: Action response.
@@ -78,25 +78,27 @@ class Client(BaseClient):
 
         r = self.session()._post(
             'https://signin.aws.amazon.com/updateaccount',
+            idempotent=idempotent,
             data=data,
         )
 
         if r.status_code != 200:
             print(r.text)
-            raise Exception("failed action {0}".format(action))
+            raise exceptions.response_error("failed action {0}".format(action), r)
 
-        out = json.loads(r.text)
+        out = self.session()._json.loads(r.content)
         if out['state'] == 'FAIL' and out['properties']['action'] == 'reAuth':
             raise ReauthException()
 
         if out['state'].lower() != 'success':
             if 'Message' in out['properties']:
-                raise Exception("failed action {0}: {1}".format(action, out['properties']['Message']))
+                raise exceptions.ActionError("failed action {0}: {1}".format(action, out['properties']['Message']), action, out['properties'])
             else:
-                raise Exception("failed action {0}".format(action))
+                raise exceptions.ActionError("failed action {0}".format(action), action, out.get('properties'))
 
         return out['properties']
 
+    @cached
     def get_account_info(self):
         """
         Gets the account name and email address.
@@ -122,8 +124,9 @@ class Client(BaseClient):
             :py:class:`coto.clients.decoupled_account.ReauthException`: You have to
                 reauthenticate, then try again.
         """
-        return self._action('getAuthState')
+        return self._action('getAuthState', idempotent=True)
 
+    @invalidates('get_account_info')
     def update_account_name(self, AccountName):
         """
         Sets a new account name.
@@ -154,6 +157,7 @@ class Client(BaseClient):
             'newAccountName': AccountName,
         })
 
+    @invalidates('get_account_info')
     def update_account_email(self, Password, AccountEmail):
         """
         Sets a new account email address.
@@ -1,5 +1,5 @@
-import json
-from . import BaseClient
+from . import BaseClient, cached, invalidates
+from .. import exceptions
 
 
 class Client(BaseClient):
@@ -31,13 +31,12 @@ class Client(BaseClient):
 
     def __init__(self, session):
         super().__init__(session)
-        self.__xsrf_token = None
 
-    def _xsrf_token(self):
-        if self.__xsrf_token is None:
-            self.__xsrf_token = self._get_xsrf_token()
+    def _url(self, api):
+        return "https://console.aws.amazon.com/billing/rest/v1.0/{0}?state=hashArgs%23".format(api)
 
-        return self.__xsrf_token
+    def _xsrf_token(self):
+        return self.session()._tokens.get('billing', self._get_xsrf_token)
 
     def _get_xsrf_token(self):
         r = self.session()._get(
@@ -45,47 +44,43 @@ class Client(BaseClient):
         )
 
         if r.status_code != 200:
-            raise Exception("failed get billing xsrf token")
+            raise exceptions.response_error("failed get billing xsrf token", r)
 
         return r.headers['x-awsbc-xsrf-token']
 
+    def _send(self, method, api, headers, data=None):
+        def send(token):
+            _headers = dict(headers)
+            _headers['x-awsbc-xsrf-token'] = token
+            return self.session()._request(
+                method, self._url(api), headers=_headers, data=data)
+
+        return self._token_request('billing', self._get_xsrf_token, send)
+
     def _get(self, api):
-        r = self.session()._get(
-            "https://console.aws.amazon.com/billing/rest/v1.0/{0}?state=hashArgs%23".
-            format(api),
-            headers={'x-awsbc-xsrf-token': self._xsrf_token()})
+        r = self._send('GET', api, {})
 
         if r.status_code != 200:
-            raise Exception("failed get {0}".format(api))
+            raise exceptions.response_error("failed get {0}".format(api), r)
 
         return r
 
     def _put(self, api, data=None):
-        if data is None:
-            r = self.session()._put(
-                "https://console.aws.amazon.com/billing/rest/v1.0/{0}?state=hashArgs%23".
-                format(api),
-                headers={
-                    'x-awsbc-xsrf-token': self._xsrf_token(),
-                    'Content-Type': 'application/json',
-                })
-        else:
-            r = self.session()._put(
-                "https://console.aws.amazon.com/billing/rest/v1.0/{0}?state=hashArgs%23".
-                format(api),
-                headers={
-                    'x-awsbc-xsrf-token': self._xsrf_token(),
-                    'Content-Type': 'application/json',
-                },
-                data=json.dumps(data))
+        r = self._send(
+            'PUT', api,
+            {'Content-Type': 'application/json'},
+            data=self.session()._json.dumps(data) if data is not None else None,
+        )
 
         if r.status_code != 200:
-            raise Exception("failed put {}: {}".format(api, r.text))
+            raise exceptions.response_error(
+                "failed put {}: {}".format(api, r.text), r)
 
         return r
 
     # billing api
 
+    @cached
     def list_alternate_contacts(self):
         """
         Lists the alternate contacts set for the account. In order to keep the
@@ -114,8 +109,9 @@ class Client(BaseClient):
                 ]
         """
         r = self._get('additionalcontacts')
-        return json.loads(r.text)
+        return self.session()._json.loads(r.content)
 
+    @invalidates('list_alternate_contacts')
     def set_alternate_contacts(self, AlternateContacts):
         """
         Sets the alternate contacts set for the account. In order to keep the
@@ -172,6 +168,7 @@ class Client(BaseClient):
         """
         self._put('additionalcontacts', AlternateContacts)
 
+    @cached
     def list_tax_registrations(self):
         """
         Lists the tax registrations set for the account.
@@ -219,8 +216,9 @@ class Client(BaseClient):
                 ]
         """
         r = self._get('taxexemption/eu/vat/information')
-        return json.loads(r.text)['taxRegistrationList']
+        return self.session()._json.loads(r.content)['taxRegistrationList']
 
+    @invalidates('list_tax_registrations')
     def set_tax_registration(self, TaxRegistration):
         """
         Set the tax registrations for the account.
@@ -256,6 +254,7 @@ class Client(BaseClient):
         """
         self._put('taxexemption/eu/vat/information', TaxRegistration)
 
+    @invalidates('list_tax_registrations')
     def delete_tax_registration(self, TaxRegistration):
         """
         Delete the given tax registrations from the account.
@@ -289,6 +288,7 @@ class Client(BaseClient):
         TaxRegistration['currentStatus'] = 'Deleted'
         return self.set_tax_registration(TaxRegistration)
 
+    @cached
     def account_status(self):
         """
         Obtain the status of the account.
@@ -308,8 +308,9 @@ class Client(BaseClient):
             string: status
         """
         r = self._get('account/status')
-        return json.loads(r.text)
+        return self.session()._json.loads(r.content)
 
+    @invalidates('account_status')
     def close_account(self):
         """
         Close the account. Returns True iff successful, otherwise throws
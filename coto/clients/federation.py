@@ -1,7 +1,6 @@
-from furl import furl
-import json
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from . import BaseClient
+from .. import exceptions
 
 
 class Client(BaseClient):
@@ -45,63 +44,81 @@ class Client(BaseClient):
         Returns:
             bool: Signin succeeded.
         """
-        r = self.session()._get(self.get_signin_url(boto3_session))
+        # only the cookies set along the redirects are needed, not the page
+        r = self.session()._get(self.get_signin_url(boto3_session), stream=True)
+        r.close()
         if r.status_code != 200:
-            raise Exception("failed session signin")
+            raise exceptions.response_error("failed session signin", r)
 
         self.session().authenticated = True
         return True
 
     def get_signin_url(self, boto3_session):
         """
-        Signin using a boto3 session.
+        Obtain a signin url for a boto3 session.
 
         This method uses the federation endpoint to obtain a signin token using
-        the credentials in your boto3 session. The signin token is then used
-        to signin into the AWS Management Console.
-
-        Although possible, you are not encouraged to call this method directly,
-        instead follow the following example.
+        the credentials in your boto3 session, and returns the url that signs
+        in to the AWS Management Console with it. Urls are cached per
+        credentials while the signin token is valid, see
+        :py:class:`coto.session.tokens.SigninTokenCache`.
 
-        Example:
+        Request Syntax:
             .. code-block:: python
 
-                import boto3
-                import coto
-
-                session = coto.Session(
-                    boto3_session=boto3.Session()
+                response = client.get_signin_url(
+                    boto3_session=boto3.session.Session,
                 )
 
+        Args:
+            boto3_session (boto3.session.Session): The boto3 session to use as
+                provider for AWS credentials.
+
+        Returns:
+            str: Signin url.
+        """
+        return self._signin_token(boto3_session)['url']
+
+    def get_signin_urls(self, boto3_sessions, max_workers=10):
+        """
+        Obtain signin urls for many boto3 sessions concurrently.
+
         Request Syntax:
             .. code-block:: python
 
-                response = client.signin(
-                    boto3_session=boto3.session.Session,
+                response = client.get_signin_urls(
+                    boto3_sessions={
+                        'name': boto3.session.Session,
+                    },
+                    max_workers=int,
                 )
 
         Args:
-            boto3_session (boto3.session.Session): The boto3 session to use as
-                provider for AWS credentials.
+            boto3_sessions (dict | list): boto3 sessions by name, or a list
+                of boto3 sessions.
+            max_workers (int): Maximum number of tokens requested
+                concurrently.
 
         Returns:
-            bool: Signin succeeded.
+            dict | list: Signin url by name, or a list of signin urls in the
+            order of the sessions.
         """
-        url = furl('https://signin.aws.amazon.com/federation')
+        names = list(boto3_sessions) if isinstance(boto3_sessions, dict) else None
+        sessions = [boto3_sessions[n] for n in names] if names is not None \
+            else list(boto3_sessions)
 
-        url.args['Action'] = "login"
-        url.args['Issuer'] = None
-        url.args['Destination'] = "https://console.aws.amazon.com/"
-        url.args['SigninToken'] = self.get_signin_token(boto3_session)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            urls = list(executor.map(self.get_signin_url, sessions))
 
-        return url.url
+        return dict(zip(names, urls)) if names is not None else urls
 
     def get_signin_token(self, boto3_session):
         """
         Obtain a signin token for a boto3 session.
 
         This method uses the federation endpoint to obtain a signin token using
-        the credentials in your boto3 session.
+        the credentials in your boto3 session. Tokens are cached like the
+        urls of :py:meth:`get_signin_url`.
 
         Request Syntax:
             .. code-block:: python
@@ -117,7 +134,16 @@ class Client(BaseClient):
         Returns:
             str: Signin token.
         """
+        return self._signin_token(boto3_session)['token']
+
+    def _signin_token(self, boto3_session):
         credentials = boto3_session.get_credentials()
+        cache = self.session()._signin_tokens
+        key = cache.key(credentials)
+
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
 
         url = "https://signin.aws.amazon.com/federation"
         response = self.session()._get(
@@ -126,11 +152,26 @@ class Client(BaseClient):
                 "Action":
                 "getSigninToken",
                 "Session":
-                json.dumps({
+                self.session()._json.dumps({
                     "sessionId": credentials.access_key,
                     "sessionKey": credentials.secret_key,
                     "sessionToken": credentials.token,
                 })
             }
         )
-        return json.loads(response.text)["SigninToken"]
+        token = self.session()._json.loads(response.content)["SigninToken"]
+
+        from furl import furl
+
+        url = furl('https://signin.aws.amazon.com/federation')
+
+        url.args['Action'] = "login"
+        url.args['Issuer'] = None
+        url.args['Destination'] = "https://console.aws.amazon.com/"
+        url.args['SigninToken'] = token
+
+        entry = {'token': token, 'url': url.url}
+        # refreshable credentials know when they expire
+        expiry = getattr(credentials, '_expiry_time', None)
+        cache.put(key, entry, expiry.timestamp() if expiry is not None else None)
+        return entry
@@ -1,8 +1,6 @@
-from bs4 import BeautifulSoup
-from pyotp import TOTP
 from datetime import datetime, timedelta
-import json
-from . import BaseClient
+from . import BaseClient, cached, invalidates
+from .. import exceptions
 
 
 class Client(BaseClient):
@@ -37,90 +35,88 @@ class Client(BaseClient):
 
     def __init__(self, session):
         super().__init__(session)
-        self.__xsrf_token = None
 
     def _url(self, api):
         return "https://console.aws.amazon.com/iam/{0}".format(api)
 
     def _xsrf_token(self):
-        if self.__xsrf_token is None:
-            self._get_xsrf_token()
-
-        return self.__xsrf_token
+        return self.session()._tokens.get('iam', self._get_xsrf_token)
 
     def _get_xsrf_token(self):
         r = self.session()._get(
             'https://console.aws.amazon.com/iam/home?&state=hashArgs%23')
 
         if r.status_code != 200:
-            raise Exception("failed get token")
+            raise exceptions.response_error("failed get token", r)
 
         r = self.session()._get('https://console.aws.amazon.com/iam/home?#/security_credentials')
 
         if r.status_code != 200:
-            raise Exception("failed get token")
+            raise exceptions.response_error("failed get token", r)
 
-        soup = BeautifulSoup(r.text, 'html.parser')
-        for m in soup.find_all('meta'):
-            if 'id' in m.attrs and m['id'] == "xsrf-token":
-                self.__xsrf_token = m['data-token']
-                return
+        meta = self.session()._parser.meta(
+            r.text, attr='id', value='data-token', required=('xsrf-token', ))
+        if 'xsrf-token' in meta:
+            return meta['xsrf-token']
 
         raise Exception('unable to obtain IAM xsrf_token')
 
-    def _get(self, api):
-        r = self.session()._get(
-            self._url(api), headers={'X-CSRF-Token': self._xsrf_token()})
+    def _send(self, method, api, headers, data=None):
+        def send(token):
+            _headers = dict(headers)
+            _headers['X-CSRF-Token'] = token
+            return self.session()._request(
+                method, self._url(api), headers=_headers, data=data)
 
-        if 'X-CSRF-Token' in r.headers:
-            self.__xsrf_token = r.headers['X-CSRF-Token']
+        tokens = self.session()._tokens
+        # the console rotates the token with every response, concurrent
+        # requests would send a token that was already replaced
+        with tokens.rotation('iam'):
+            r = self._token_request('iam', self._get_xsrf_token, send)
+
+            if 'X-CSRF-Token' in r.headers:
+                tokens.set('iam', r.headers['X-CSRF-Token'])
+
+        return r
+
+    def _get(self, api):
+        r = self._send('GET', api, {})
 
         if r.status_code != 200:
             print(r.text)
-            raise Exception("failed get {0}".format(api))
+            raise exceptions.response_error("failed get {0}".format(api), r)
 
-        return json.loads(r.text)
+        return self.session()._json.loads(r.content)
 
     def _post(self, api, data=None):
-        r = self.session()._post(
-            self._url(api),
-            headers={
-                'X-CSRF-Token': self._xsrf_token(),
-                'Content-Type': 'application/json',
-            },
-            data=json.dumps(data) if data is not None else None,
+        r = self._send(
+            'POST', api,
+            {'Content-Type': 'application/json'},
+            data=self.session()._json.dumps(data) if data is not None else None,
         )
 
-        if 'X-CSRF-Token' in r.headers:
-            self.__xsrf_token = r.headers['X-CSRF-Token']
-
         if r.status_code != 200:
             print(r.text)
-            raise Exception("failed post {0}".format(api))
+            raise exceptions.response_error("failed post {0}".format(api), r)
 
-        return json.loads(r.text)
+        return self.session()._json.loads(r.content)
 
     def _http(self, method, api, data=None):
-        r = self.session()._post(
-            self._url(api),
-            headers={
-                'X-CSRF-Token': self._xsrf_token(),
-                'x-http-method-override': method.upper(),
-            },
-            data=json.dumps(data) if data is not None else None,
+        r = self._send(
+            'POST', api,
+            {'x-http-method-override': method.upper()},
+            data=self.session()._json.dumps(data) if data is not None else None,
         )
 
-        if 'X-CSRF-Token' in r.headers:
-            self.__xsrf_token = r.headers['X-CSRF-Token']
-
         if r.status_code != 200:
             print(r.text)
-            raise Exception("failed delete {0}".format(api))
+            raise exceptions.response_error("failed delete {0}".format(api), r)
 
-        return json.loads(r.text)
+        return self.session()._json.loads(r.content)
 
     # iam api
 
+    @cached
     def get_account_info(self):
         """
         Retrieves a summary of account information.
@@ -191,6 +187,7 @@ class Client(BaseClient):
         """
         return self._get('service/account')
 
+    @cached
     def list_root_mfa_devices(self):
         """
         Lists enabled root MFA devices.
@@ -266,6 +263,7 @@ class Client(BaseClient):
         })
         return r
 
+    @invalidates('list_root_mfa_devices', 'get_account_info')
     def enable_root_mfa_device(self,
                                SerialNumber,
                                Base32StringSeed=None,
@@ -316,6 +314,8 @@ class Client(BaseClient):
         if Base32StringSeed:
             current = datetime.now()
             previous = current - timedelta(seconds=30)
+            from pyotp import TOTP
+
             totp = TOTP(Base32StringSeed)
             AuthenticationCode1 = totp.at(previous)
             AuthenticationCode2 = totp.at(current)
@@ -329,6 +329,7 @@ class Client(BaseClient):
             })
         return r
 
+    @invalidates('list_root_mfa_devices', 'get_account_info')
     def deactivate_root_mfa_device(self, SerialNumber):
         """
         Deactivates the specified MFA device and removes it from association
@@ -349,6 +350,7 @@ class Client(BaseClient):
         r = self._post('api/mfa/deactivateMfaDevice', {'serialNumber': SerialNumber, 'userName': ''})
         return r
 
+    @cached
     def list_root_access_keys(self, Deleted=False):
         """
         List the access key pairs associated with the account root user.
@@ -387,6 +389,7 @@ class Client(BaseClient):
             r = self._get('service/root/keys')
         return r
 
+    @invalidates('list_root_access_keys', 'get_account_info')
     def create_root_access_key(self):
         """
         Creates a new AWS secret access key and corresponding AWS access key ID
@@ -413,6 +416,7 @@ class Client(BaseClient):
         r = self._post('service/root/keys')
         return r
 
+    @invalidates('list_root_access_keys', 'get_account_info')
     def update_root_access_key(self, AccessKeyId, Status='Inactive'):
         """
         Changes the status of the specified access key from Active to Inactive,
@@ -443,6 +447,7 @@ class Client(BaseClient):
             r = self._http('service/deactivate', "root/keys/{0}".format(AccessKeyId))
         return r['success']
 
+    @invalidates('list_root_access_keys', 'get_account_info')
     def delete_root_access_key(self, AccessKeyId):
         """
         Deletes the access key pair associated with the account root user.
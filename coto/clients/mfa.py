@@ -1,7 +1,5 @@
-from bs4 import BeautifulSoup
-from pyotp import TOTP
-import json
 from . import BaseClient
+from .. import exceptions
 
 
 class Client(BaseClient):
@@ -15,6 +13,7 @@ class Client(BaseClient):
     def get_mfa_status(self, email):
         r = self.session()._post(
             "https://signin.aws.amazon.com/mfa",
+            idempotent=True,
             data={
                 'email': email,
                 '_redirect_url': self._REDIRECT_URL,
@@ -23,6 +22,7 @@ class Client(BaseClient):
             })
 
         if r.status_code != 200:
-            raise Exception("failed get mfa status for {0}".format(email))
+            raise exceptions.response_error(
+                "failed get mfa status for {0}".format(email), r)
 
-        return json.loads(r.text)
+        return self.session()._json.loads(r.content)
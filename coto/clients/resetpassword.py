@@ -1,15 +1,10 @@
 from io import BytesIO
-from bs4 import BeautifulSoup
-from pyotp import TOTP
 from urllib import parse
-import json
 from . import BaseClient
+from .. import exceptions
 from .signin_amazon import ap_url
-import time
-from PIL import Image
-import shutil
+from .. import captcha
 import base64
-import tempfile
 
 
 class Client(BaseClient):
@@ -23,7 +18,7 @@ class Client(BaseClient):
 
     def _csrf_token(self):
         if self.__csrf_token == None:
-            self._get_tokens()
+            self._coalesce(('token', 'resetpassword'), self._get_tokens)
 
         return self.__csrf_token
 
@@ -33,13 +28,9 @@ class Client(BaseClient):
         )
 
         if r.status_code != 200:
-            raise Exception("failed get tokens")
+            raise exceptions.response_error("failed get tokens", r)
 
-        soup = BeautifulSoup(r.text, 'html.parser')
-        meta = {
-            m['name']: m['content']
-            for m in soup.find_all('meta') if 'name' in m.attrs
-        }
+        meta = self.session()._parser.meta(r.text, required=('csrf_token', ))
 
         if not 'csrf_token' in meta:
             raise Exception("failed get csrf_token")
@@ -70,14 +61,14 @@ class Client(BaseClient):
 
         if r.status_code != 200:
             print(r.text)
-            raise Exception("failed action {0}".format(action))
+            raise exceptions.response_error("failed action {0}".format(action), r)
 
-        out = json.loads(r.text)
+        out = self.session()._json.loads(r.content)
         if out['state'].lower() != 'success':
             if 'Message' in out['properties']:
-                raise Exception("failed action {0}: {1}".format(action, out['properties']['Message']))
+                raise exceptions.ActionError("failed action {0}: {1}".format(action, out['properties']['Message']), action, out['properties'])
             else:
-                raise Exception("failed action {0}".format(action))
+                raise exceptions.ActionError("failed action {0}".format(action), action, out.get('properties'))
 
         return out['properties']
 
@@ -98,7 +89,8 @@ class Client(BaseClient):
         Request an OTP to be sent to the email.
         """
         response = self.session()._get(ap_url(email, 'forgotpassword'))
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = self.session()._parser.soup(
+            response.text, form_id='ap_fpp_1a_form')
 
         error = soup.find(id="message_error")
         if error:
@@ -123,23 +115,16 @@ class Client(BaseClient):
             data=data
         )
 
-        captcha_page_soup = BeautifulSoup(captcha_page.text, 'html.parser')
+        captcha_page_soup = self.session()._parser.soup(captcha_page.text)
         div = captcha_page_soup.find_all('div', class_='cvf-captcha-img')
         solver = self.session()._captcha_solver
 
-        tmp_folder = tempfile.TemporaryDirectory()
-
-        _image = self._get_image(div[0].img['src'], tmp_folder.name)
-        b64_image = self.process_image(_image, tmp_folder.name)
-        guess_uuid = solver.solve(base64=b64_image)
-
-        while True:
-            guess = solver.result(guess_uuid)
-
-            if guess is None:
-                time.sleep(5)
-            else:
-                break
+        _image = self._get_image(div[0].img['src'])
+        b64_image = self.process_image(_image)
+        job = captcha.guess(
+            solver, base64=b64_image,
+            timeout=self.session()._captcha_timeout)
+        guess = job.result()
 
         error = captcha_page_soup.find(id="message_error")
         if error:
@@ -163,10 +148,10 @@ class Client(BaseClient):
             "https://www.amazon.com/ap/cvf/verify",
             data=data
         )
-        soup = BeautifulSoup(verify.text, 'html.parser')
+        soup = self.session()._parser.soup(verify.text)
         if soup.find_all(class_='cvf-widget-alert-id-cvf-captcha-error'):
             try:
-                solver.incorrect(guess_uuid)
+                solver.incorrect(job.job_id)
             except Exception as e:
                 print (f"ERROR Reporting {e}")
             return self.request_otp_forgot_password(email)
@@ -174,43 +159,46 @@ class Client(BaseClient):
         self.__reset_page = self.session()._get(
             verify.url
         )
-        tmp_folder.cleanup()
         return self.__reset_page
     
-    def _get_image(self, image_url, tmp_folder) -> Image:
-        r = self.session()._get(image_url, stream = True)
-        tmp_img = f'{tmp_folder}/original'
+    def _get_image(self, image_url) -> 'Image':
+        r = self.session()._get(image_url)
 
         # Check if the image was retrieved successfully
-        if r.status_code == 200:
-            # Set decode_content value to True, otherwise the downloaded image file's size will be zero.
-            r.raw.decode_content = True
-            
-            # Open a local file with wb ( write binary ) permission.
-            with open(tmp_img,'wb') as f:
-                shutil.copyfileobj(r.raw, f)
-        else:
+        if r.status_code != 200:
             raise IOError('Could not download: %s', image_url)
 
-        return Image.open(tmp_img)
+        from PIL import Image
+
+        return Image.open(BytesIO(r.content))
 
-    def process_image(self, imageObject:Image, tmp_folder:str):
-        images = []
+    def process_image(self, imageObject:'Image', tmp_folder:str=None):
+        """
+        Encode a captcha image for a captcha solver, keeping every sixth
+        frame of an animated GIF.
+
+        Args:
+            imageObject (PIL.Image.Image): Captcha image.
+            tmp_folder (str): Unused, images are processed in memory.
+
+        Returns:
+            str: Image as ``data:`` url.
+        """
         buffered = BytesIO()
         if imageObject.format != 'GIF':
             imageObject.save(fp=buffered, format=imageObject.format.lower())
         else:
+            images = []
             for frame in range(0,imageObject.n_frames, 6):
                 imageObject.seek(frame)
-                imageObject.save(f'{tmp_folder}/image_{frame}.gif')
-                images.append(Image.open(f'{tmp_folder}/image_{frame}.gif'))
+                images.append(imageObject.copy())
 
             gif = images[0]
             gif.save(fp=buffered, format='gif', save_all=True, append_images=images[1:], duration=250)
 
-        buffered.seek(0)
-        img_byte = buffered.getvalue()
-        img_str = f"data:image/{imageObject.format.lower()};base64," + base64.b64encode(img_byte).decode()
+        # encode straight from the buffer, without copying it out first
+        img_str = f"data:image/{imageObject.format.lower()};base64," + \
+            base64.b64encode(buffered.getbuffer()).decode('ascii')
 
         return img_str
 
@@ -218,7 +206,7 @@ class Client(BaseClient):
         """
         Parses the AWS Email to retrieve the OTP.
         """
-        soup = BeautifulSoup(content, 'html.parser')
+        soup = self.session()._parser.soup(content)
         otp = soup.find(id="verificationMsg").find(class_='otp').contents[0]
         return otp
 
@@ -231,7 +219,7 @@ class Client(BaseClient):
         if not request:
             request = self.__reset_page
 
-        soup = BeautifulSoup(request.text, 'html.parser')
+        soup = self.session()._parser.soup(request.text)
         form = soup.find(id="verification-code-form")
 
         data = {'metadata1': self.session()._metadata1_generator.generate()}
@@ -249,7 +237,7 @@ class Client(BaseClient):
             data=data
         )
 
-        reset_password = BeautifulSoup(verify.text, 'html.parser')
+        reset_password = self.session()._parser.soup(verify.text)
 
         form = reset_password.find('form', id="ap_fpp_1d_form")
         data = {}
@@ -266,7 +254,7 @@ class Client(BaseClient):
             form.get("action"),
             data=data
         )
-        soup_submit_password = BeautifulSoup(submit_password.text, 'html.parser')
+        soup_submit_password = self.session()._parser.soup(submit_password.text)
 
         if soup_submit_password.find_all('div', id="message_success"):
             return True
@@ -1,4 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 from .. import BaseClient
+from ... import exceptions
+
+
+def _stale(error):
+    # failures that cached account answers can explain
+    if isinstance(error, exceptions.AccountMismatchError):
+        return True
+    return isinstance(error, exceptions.ActionError) and \
+        error.action == 'authenticateRoot'
 
 
 class Client(BaseClient):
@@ -10,15 +21,45 @@ class Client(BaseClient):
         self._signin_aws = self.session().client('signin_aws')
         self._signin_amazon = self.session().client('signin_amazon')
 
-    def signin(self, email, password, mfa_secret=None):
-        # check account type
-        account_type = self._signin_aws.get_account_type(email)
+    def _account_type(self, email):
+        cache = self.session()._account_cache
+        account_type = cache.account_type(email)
+        if account_type is None:
+            account_type = self._signin_aws.get_account_type(email)
+            cache.set_account_type(email, account_type)
+        return account_type
+
+    def _lookup(self, email, pipeline):
+        mfa_required = None
+
+        if pipeline and self.session()._account_cache.account_type(email) is None:
+            # create what the lookup uses before it runs in another thread
+            self._signin_aws._csrf_token()
+            self.session().client('mfa')
 
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                # the lookup belongs to the signin in the instrumentation
+                mfa = executor.submit(
+                    contextvars.copy_context().run,
+                    self._signin_aws.mfa_required, email)
+                account_type = self._account_type(email)
+                # only a decoupled signin uses the mfa status
+                if account_type == 'Decoupled':
+                    mfa_required = mfa.result()
+        else:
+            account_type = self._account_type(email)
+            if account_type == 'Decoupled':
+                mfa_required = self._signin_aws.mfa_required(email)
+
+        return account_type, mfa_required
+
+    def _signin(self, email, password, mfa_secret, account_type, mfa_required):
         if account_type == 'Decoupled':
             return self._signin_aws.signin(
                 email,
                 password,
                 mfa_secret,
+                mfa_required=mfa_required,
             )
         elif account_type == 'Coupled':
             return self._signin_amazon.signin(
@@ -27,6 +68,59 @@ class Client(BaseClient):
                 mfa_secret,
             )
         elif account_type == 'Unknown':
-            raise Exception("account {0} not active".format(email))
+            raise exceptions.AccountMismatchError(
+                "account {0} not active".format(email))
         else:
-            raise Exception("unsupported account type {0}".format(email))
+            raise exceptions.AccountMismatchError(
+                "unsupported account type {0}".format(email))
+
+    def signin(self, email, password, mfa_secret=None, pipeline=True):
+        """
+        Signin into the AWS Management Console using account root user.
+
+        The account type is resolved and the mfa status of a decoupled
+        account looked up concurrently, both only need the tokens of the
+        signin page. Answers in the account cache of the session are not
+        requested again, see :py:class:`coto.session.accounts.AccountCache`.
+
+        When a signin using cached answers fails in a way they can explain,
+        ie., authentication is rejected, the account type is unexpected or
+        the account asks for mfa, the cache entry is invalidated and the
+        answers are requested again; the signin is retried once if they
+        changed. Other errors, eg., network errors, are raised right away.
+
+        Args:
+            email: Account email address.
+            password: Account password.
+            mfa_secret: Account mfa secret.
+            pipeline (bool): Look up the mfa status while the account type
+                is resolved, instead of after it.
+
+        Returns:
+            bool: Signin successful
+        """
+        cache = self.session()._account_cache
+        cached = cache.account_type(email) is not None
+
+        known = self._lookup(email, pipeline)
+        try:
+            result = self._signin(email, password, mfa_secret, *known)
+            error = None
+        except Exception as e:
+            if not cached or not _stale(e):
+                raise
+            result = False
+            error = e
+
+        # an unsuccessful coupled signin does not raise
+        if result or not cached:
+            return result
+
+        cache.invalidate(email)
+        fresh = self._lookup(email, pipeline)
+        if fresh == known:
+            if error is not None:
+                raise error
+            return result
+
+        return self._signin(email, password, mfa_secret, *fresh)
@@ -1,10 +1,5 @@
-from bs4 import BeautifulSoup
-from pyotp import TOTP
-from urllib import parse
-import json
 from .. import BaseClient
-import time
-from furl import furl
+from ... import captcha
 
 
 # import os
@@ -18,6 +13,8 @@ from furl import furl
 #     webbrowser.open(url)
 
 def ap_url(email, path='signin'):
+    from furl import furl
+
     url = furl(f"https://www.amazon.com/ap/{path}")
 
     url.args["openid.assoc_handle"] = "aws"
@@ -83,22 +80,14 @@ class Client(BaseClient):
             if not self.session()._captcha_solver:
                 raise Exception("captcha solver required")
 
-            captcha = soup.find(id="ap_captcha_img")
-            img = captcha.find("img")
-            src = img.get("src")
-            guess_uuid = self.session()._captcha_solver.solve(url=src)
-
-            while True:
-                guess = self.session()._captcha_solver.result(guess_uuid)
-
-                if guess is None:
-                    time.sleep(5)
-                else:
-                    data["guess"] = guess
-                    break
+            img = soup.find(id="ap_captcha_img").find("img")
+            job = captcha.guess(
+                self.session()._captcha_solver, url=img.get("src"),
+                timeout=self.session()._captcha_timeout)
+            data["guess"] = job.result()
 
         if "tokenCode" in data and mfa_secret:
-            data['tokenCode'] = TOTP(mfa_secret).now()
+            data['tokenCode'] = self.session()._totp.code(mfa_secret)
 
         overrides = {
             "password": password,
@@ -142,7 +131,8 @@ class Client(BaseClient):
 
         # first post password
         response = self.session()._get(ap_url(email))
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = self.session()._parser.soup(
+            response.text, form_id='ap_signin_form')
         response = self.find_and_submit_form(soup, email, password, mfa_secret)
         # view_html(response.text)
 
@@ -150,7 +140,8 @@ class Client(BaseClient):
 
         while counter < 10 and response.url != "https://console.aws.amazon.com/console/home":
             counter += 1
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self.session()._parser.soup(
+                response.text, form_id='ap_signin_form')
             response = self.find_and_submit_form(soup, email, password, mfa_secret)
 
         if response.url == "https://console.aws.amazon.com/console/home":
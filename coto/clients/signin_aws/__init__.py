@@ -1,10 +1,6 @@
-from bs4 import BeautifulSoup
-from pyotp import TOTP
-from urllib import parse
-import json
 from .. import BaseClient
 from . import exceptions
-import time
+from ... import captcha
 
 
 def captcha_decorator(func):
@@ -13,7 +9,7 @@ def captcha_decorator(func):
 
         captcha_guess = kwargs.get('captcha_guess')
         solver = self.session()._captcha_solver
-        guess_uuid = None
+        job = None
 
         while True:
             try:
@@ -25,19 +21,21 @@ def captcha_decorator(func):
                 if solver is None:
                     raise
 
-                if guess_uuid and captcha_guess and captcha_guess.action == e.action:
-                    solver.incorrect(guess_uuid)
-
-                guess_uuid = solver.solve(url=e.CaptchaURL)
-
-                while True:
-                    guess = solver.result(guess_uuid)
-
-                    if guess is None:
-                        time.sleep(5)
-                    else:
-                        break
-                captcha_guess = e.guess(guess)
+                if job and captcha_guess and captcha_guess.action == e.action:
+                    solver.incorrect(job.job_id)
+
+                awaited = captcha.awaited()
+                if awaited is not None:
+                    # the caller awaits the guess and calls again, the thread
+                    # is not blocked meanwhile
+                    raise awaited.pending(
+                        solver, e.action, e.guess, url=e.CaptchaURL,
+                        timeout=self.session()._captcha_timeout)
+
+                job = captcha.guess(
+                    solver, url=e.CaptchaURL,
+                    timeout=self.session()._captcha_timeout)
+                captcha_guess = e.guess(job.result())
                 continue
             break
 
@@ -53,15 +51,25 @@ class Client(BaseClient):
         self.__csrf_token = None
         self.__session_id = None
 
+    def _get_state(self):
+        return {
+            'csrf_token': self.__csrf_token,
+            'session_id': self.__session_id,
+        }
+
+    def _set_state(self, state):
+        self.__csrf_token = state.get('csrf_token')
+        self.__session_id = state.get('session_id')
+
     def _csrf_token(self):
         if self.__csrf_token == None:
-            self._get_tokens()
+            self._coalesce(('token', 'signin_aws'), self._get_tokens)
 
         return self.__csrf_token
 
     def _session_id(self):
         if self.__session_id == None:
-            self._get_tokens()
+            self._coalesce(('token', 'signin_aws'), self._get_tokens)
 
         return self.__session_id
 
@@ -71,23 +79,22 @@ class Client(BaseClient):
         )
 
         if r.status_code != 200:
-            raise Exception("failed get tokens")
+            raise exceptions.response_error("failed get tokens", r)
 
-        soup = BeautifulSoup(r.text, 'html.parser')
-        meta = {
-            m['name']: m['content']
-            for m in soup.find_all('meta') if 'name' in m.attrs
-        }
+        meta = self.session()._parser.meta(
+            r.text, required=('csrf_token', 'session_id'))
         self.__csrf_token = meta['csrf_token']
         self.__session_id = meta['session_id']
 
-    def _action(self, action, data=None, api="signin", captcha_guess=None):
+    def _action(self, action, data=None, api="signin", captcha_guess=None,
+                idempotent=None):
         """
         Execute an action on the signin API.
 
         Args:
             action: Action to execute.
             data: Arguments for the action.
+            idempotent: Whether the action only reads and may be retried.
 
         Returns:
             dict: Action response.
@@ -100,6 +107,9 @@ class Client(BaseClient):
         data['csrf'] = self._csrf_token()
         data['sessionId'] = self._session_id()
 
+        if captcha_guess is None and captcha.awaited() is not None:
+            captcha_guess = captcha.awaited().take(action)
+
         if captcha_guess and captcha_guess.action == action:
             data['captcha_token'] = captcha_guess.captcha_token
             data['captchaObfuscationToken'] = \
@@ -108,13 +118,15 @@ class Client(BaseClient):
 
         r = self.session()._post(
             "https://signin.aws.amazon.com/{}".format(api),
+            idempotent=idempotent,
             data=data,
         )
 
         if r.status_code != 200:
-            raise Exception("failed action {}: {}".format(action, r.text))
+            raise exceptions.response_error(
+                "failed action {}: {}".format(action, r.text), r)
 
-        out = json.loads(r.text)
+        out = self.session()._json.loads(r.content)
         state = out.get('state', 'none').lower()
         properties = out.get('properties', {})
 
@@ -126,10 +138,11 @@ class Client(BaseClient):
 
         if state != 'success':
             if 'Message' in properties:
-                raise Exception("failed action {}: {}".format(
-                    action, properties['Message']))
+                raise exceptions.ActionError("failed action {}: {}".format(
+                    action, properties['Message']), action, properties)
             else:
-                raise Exception("failed action {}: {}".format(action, r.text))
+                raise exceptions.ActionError("failed action {}: {}".format(
+                    action, r.text), action, properties)
 
         return properties
 
@@ -159,27 +172,28 @@ class Client(BaseClient):
         """
         response = self._action(
             'resolveAccountType', {'email': email},
-            captcha_guess=captcha_guess)
+            captcha_guess=captcha_guess, idempotent=True)
         return response['resolvedAccountType']
 
     def mfa_required(self, email):
-        mfa_client = self.session().client('mfa')
-        mfa = mfa_client.get_mfa_status(email)
-        if 'mfaType' in mfa:
-            if mfa['mfaType'] == 'NONE':
-                return False
-            else:
-                return True
+        cache = self.session()._account_cache
+        mfa_type = cache.mfa_type(email)
 
-            return True
+        if mfa_type is None:
+            mfa_client = self.session().client('mfa')
+            mfa = mfa_client.get_mfa_status(email)
+            mfa_type = mfa.get('mfaType', 'UNKNOWN')
+            cache.set_mfa_type(email, mfa_type)
 
-        return True
+        return mfa_type != 'NONE'
 
-    def signin(self, email, password, mfa_secret=None):
+    def signin(self, email, password, mfa_secret=None, mfa_required=None):
         # check mfa
-        mfa_required = self.mfa_required(email)
+        if mfa_required is None:
+            mfa_required = self.mfa_required(email)
         if mfa_required and (mfa_secret is None or len(mfa_secret) == 0):
-            raise Exception("account mfa protected but no secret provided")
+            raise exceptions.AccountMismatchError(
+                "account mfa protected but no secret provided")
 
         if not mfa_required:
             mfa_secret = None
@@ -222,7 +236,7 @@ class Client(BaseClient):
 
         if mfa_secret is not None:
             data['mfaType'] = 'OTP'
-            data['mfa1'] = TOTP(mfa_secret).now()
+            data['mfa1'] = self.session()._totp.code(mfa_secret)
             data['mfaSerial'] = 'undefined'
 
         # an exception is thrown if authentication was unsuccessful
@@ -1,6 +1,7 @@
 from .captcha_guess import CaptchaGuess
+from ...exceptions import ActionError, CotoError, response_error
 
-class CaptchaRequiredException(Exception):
+class CaptchaRequiredException(CotoError):
     def __init__(self, CES, CaptchaURL, captchaObfuscationToken, action):
         super().__init__(
             "Captcha required for action: {}".format(action)
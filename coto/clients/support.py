@@ -1,8 +1,5 @@
-from bs4 import BeautifulSoup
-from pyotp import TOTP
-from datetime import datetime, timedelta
-import json
-from . import BaseClient
+from . import BaseClient, cached, invalidates
+from .. import exceptions
 
 
 class ReauthException(Exception):
@@ -27,16 +24,12 @@ class Client(BaseClient):
     """
     def __init__(self, session):
         super().__init__(session)
-        self.__xsrf_token = None
 
     def _url(self, api):
         return "https://console.aws.amazon.com/support/plans/service/{0}?state=hashArgs%23".format(api)
 
     def _xsrf_token(self):
-        if self.__xsrf_token is None:
-            self._get_xsrf_token()
-
-        return self.__xsrf_token
+        return self.session()._tokens.get('support', self._get_xsrf_token)
 
     def _get_xsrf_token(self):
         r = self.session()._get(
@@ -44,43 +37,51 @@ class Client(BaseClient):
         )
         
         if r.status_code != 200:
-            raise Exception("failed get support xsrf token")
+            raise exceptions.response_error("failed get support xsrf token", r)
 
         for cookie in r.cookies:
             if cookie.name == 'XSRF-TOKEN':
-                self.__xsrf_token = cookie.value
-                break
+                return cookie.value
 
-    def _get(self, api):
-        r = self.session()._get(
-            self._url(api), headers={'X-XSRF-TOKEN': self._xsrf_token()})
+        return None
 
-        if 'X-CSRF-TOKEN' in r.headers:
-            self.__xsrf_token = r.headers['X-CSRF-Token']
+    def _send(self, method, api, headers, data=None, idempotent=None):
+        def send(token):
+            _headers = dict(headers)
+            _headers['X-XSRF-TOKEN'] = token
+            return self.session()._request(
+                method, self._url(api), idempotent=idempotent,
+                headers=_headers, data=data)
 
-        if r.status_code != 200:
-            raise Exception("failed get {0}".format(api))
-
-        return json.loads(r.text)
-
-    def _post(self, api, data=None):
-        r = self.session()._post(
-            self._url(api),
-            headers={
-                'Content-Type': 'application/json',
-                'X-XSRF-TOKEN': self._xsrf_token(),
-            },
-            data=json.dumps(data) if data is not None else None,
-        )
+        r = self._token_request('support', self._get_xsrf_token, send)
 
         if 'X-CSRF-Token' in r.headers:
-            self.__xsrf_token = r.headers['X-CSRF-TOKEN']
+            self.session()._tokens.set('support', r.headers['X-CSRF-Token'])
+
+        return r
+
+    def _get(self, api):
+        r = self._send('GET', api, {})
+
+        if r.status_code != 200:
+            raise exceptions.response_error("failed get {0}".format(api), r)
+
+        return self.session()._json.loads(r.content)
+
+    def _post(self, api, data=None, idempotent=None):
+        r = self._send(
+            'POST', api,
+            {'Content-Type': 'application/json'},
+            data=self.session()._json.dumps(data) if data is not None else None,
+            idempotent=idempotent,
+        )
 
         if r.status_code != 200:
-            raise Exception("failed post {0}".format(api))
+            raise exceptions.response_error("failed post {0}".format(api), r)
 
-        return json.loads(r.text)
+        return self.session()._json.loads(r.content)
 
+    @cached
     def get_support_level(self):
         """
         Lists the current support contract level for the account.
@@ -100,12 +101,14 @@ class Client(BaseClient):
                     'canChange': bool
                 }
         """
-        r = self._post('describeSupportLevelSummary', { "lang": "en" })
+        r = self._post(
+            'describeSupportLevelSummary', { "lang": "en" }, idempotent=True)
         return {
             'supportLevel': r['response']['supportLevel'],
             'canChange': r['response']['canChange']
         }
 
+    @invalidates('get_support_level')
     def update_support_level(self, support_level):
         """
         Change the support contract level for the account.
@@ -0,0 +1,78 @@
+import json
+
+CODECS = ('json', 'orjson')
+
+
+def _has_orjson():
+    try:
+        import orjson
+    except ImportError:
+        return False
+    return True
+
+
+class Codec:
+    """
+    Decodes the JSON responses of the AWS Management Console and encodes the
+    JSON request bodies.
+
+    Modes:
+        ``json``:
+            The Python json module.
+        ``orjson``:
+            The ``orjson`` package, several times faster.
+
+    Both modes give identical results: responses are decoded from the raw
+    response body, without decoding it to a str first, and request bodies
+    are encoded as compact UTF-8 bytes.
+    """
+
+    def __init__(self, mode=None):
+        """
+        Args:
+            mode (str): ``json`` or ``orjson``, ``None`` for ``orjson`` when
+                it is installed and ``json`` otherwise.
+        """
+        if mode is None:
+            mode = 'orjson' if _has_orjson() else 'json'
+
+        if mode not in CODECS:
+            raise Exception("json codec {0} unsupported".format(mode))
+
+        if mode == 'orjson':
+            try:
+                import orjson
+            except ImportError:
+                raise Exception("json codec orjson requires the orjson package")
+            self._loads = orjson.loads
+            self._dumps = orjson.dumps
+        else:
+            self._loads = json.loads
+            self._dumps = self._json_dumps
+
+        self.mode = mode
+
+    @staticmethod
+    def _json_dumps(obj):
+        return json.dumps(
+            obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data):
+        """
+        Args:
+            data (bytes): JSON document, eg., ``response.content``.
+
+        Returns:
+            object: Decoded document.
+        """
+        return self._loads(data)
+
+    def dumps(self, obj):
+        """
+        Args:
+            obj (object): JSON serializable object.
+
+        Returns:
+            bytes: Encoded document.
+        """
+        return self._dumps(obj)
@@ -0,0 +1,113 @@
+"""
+Errors raised by coto.
+
+All errors derive from :py:class:`CotoError`, which derives from
+``Exception``, and keep the messages of the generic exceptions raised
+before, so existing ``except Exception`` handlers keep working.
+"""
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+class CotoError(Exception):
+    """
+    Base class of the errors raised by coto.
+
+    Attributes:
+        retryable (bool): Whether repeating the request may succeed.
+    """
+
+    retryable = False
+
+
+class ResponseError(CotoError):
+    """
+    The console answered with an unexpected status code.
+
+    Attributes:
+        response (requests.Response): The response.
+        status_code (int): HTTP status code.
+        method (str): HTTP method of the request.
+        url (str): Url of the request.
+        request_id (str): Request id of the console, if any.
+    """
+
+    def __init__(self, message, response):
+        super().__init__(message)
+        self.response = response
+        self.status_code = response.status_code
+        self.method = getattr(response.request, 'method', None)
+        self.url = response.url
+        self.request_id = response.headers.get('x-amzn-RequestId')
+
+    @property
+    def retryable(self):
+        return self.status_code in RETRYABLE_STATUS
+
+
+class ClientError(ResponseError):
+    """
+    The console rejected the request with a 4xx status, eg., a validation
+    error or an expired session. Repeating it fails the same way.
+    """
+
+
+class ThrottlingError(ResponseError):
+    """
+    The console throttled the request with a 429 status.
+    """
+
+
+class ServerError(ResponseError):
+    """
+    The console failed with a 5xx status, usually transient.
+    """
+
+
+class ActionError(CotoError):
+    """
+    A console action completed with a state other than success.
+
+    Attributes:
+        action (str): Name of the action.
+        properties (dict): Properties of the action response.
+    """
+
+    def __init__(self, message, action, properties=None):
+        super().__init__(message)
+        self.action = action
+        self.properties = properties or {}
+
+
+class AccountMismatchError(CotoError):
+    """
+    The account does not match the account type or mfa type used to sign
+    in, eg., because they changed since they were cached.
+    """
+
+
+class DeadlineExceeded(CotoError):
+    """
+    The deadline of an operation passed before it completed.
+    """
+
+
+def response_error(message, response):
+    """
+    Create the error for a response with an unexpected status code.
+
+    Args:
+        message (str): Error message.
+        response (requests.Response): The response.
+
+    Returns:
+        ResponseError: :py:class:`ThrottlingError`, :py:class:`ServerError`
+        or :py:class:`ClientError` by status code.
+    """
+    if response.status_code == 429:
+        return ThrottlingError(message, response)
+    if response.status_code >= 500:
+        return ServerError(message, response)
+    if response.status_code >= 400:
+        return ClientError(message, response)
+    return ResponseError(message, response)
@@ -0,0 +1,169 @@
+from html import unescape
+from html.parser import HTMLParser
+import re
+
+PARSERS = ('html.parser', 'lxml', 'head', 'regex')
+
+_CHUNK_SIZE = 4096
+_META_RE = re.compile(r"""<meta\b((?:[^>"']|"[^"]*"|'[^']*')*)>""", re.I)
+# html parsers do not see tags inside scripts, styles and comments
+_SKIP_RE = re.compile(
+    r'<!--.*?-->|<(script|style)\b[^>]*>.*?</\1\s*>', re.I | re.S)
+_ATTR_RE = re.compile(
+    r"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?""")
+
+
+def _meta_dict(metas, attr, value):
+    return {m[attr]: m[value] for m in metas if attr in m and value in m}
+
+
+class _MetaParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.metas = []
+        self.head_done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta':
+            self.metas.append({k: v if v is not None else '' for k, v in attrs})
+        elif tag == 'body':
+            self.head_done = True
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.head_done = True
+
+
+def _soup_metas(text, backend):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(text, backend)
+    return [m.attrs for m in soup.find_all('meta')]
+
+
+def _regex_metas(text):
+    metas = []
+    for tag in _META_RE.finditer(_SKIP_RE.sub('', text)):
+        attrs = {}
+        for m in _ATTR_RE.finditer(tag.group(1)):
+            name, double, single, bare = m.groups()
+            v = next((x for x in (double, single, bare) if x is not None), '')
+            attrs[name.lower()] = unescape(v)
+        metas.append(attrs)
+    return metas
+
+
+def _head_meta(text, attr, value, required):
+    parser = _MetaParser()
+    head = True
+
+    for pos in range(0, len(text), _CHUNK_SIZE):
+        parser.feed(text[pos:pos + _CHUNK_SIZE])
+
+        if head and parser.head_done:
+            meta = _meta_dict(parser.metas, attr, value)
+            if all(k in meta for k in required):
+                return meta
+            # a required tag is outside of the head, parse the rest as well
+            head = False
+
+    parser.close()
+    return _meta_dict(parser.metas, attr, value)
+
+
+def _until_form(text, form_id):
+    m = re.search(r"""id\s*=\s*["']{0}["']""".format(re.escape(form_id)), text)
+    if not m:
+        return text
+
+    end = re.compile(r'</form\s*>', re.I).search(text, m.end())
+    if not end:
+        return text
+
+    return text[:end.end()]
+
+
+class Parser:
+    """
+    Extracts data from the HTML pages of the AWS Management Console and the
+    Amazon signin pages.
+
+    Modes:
+        ``html.parser``:
+            Parse the whole page with BeautifulSoup and the Python html
+            parser (default).
+        ``lxml``:
+            Parse the whole page with BeautifulSoup and lxml, requires the
+            ``lxml`` package.
+        ``head``:
+            Stream the page and stop parsing after the ``<head>`` for meta
+            tags, or after the target form for forms.
+        ``regex``:
+            Find the meta tags with a regular expression, without parsing
+            the page.
+
+    All modes give identical results for the pages coto works with, whose
+    meta tags are in the ``<head>``; the ``head`` mode only returns the meta
+    tags of the ``<head>`` when the required ones are found there.
+    """
+
+    def __init__(self, mode='html.parser'):
+        """
+        Args:
+            mode (str): One of ``html.parser``, ``lxml``, ``head`` or
+                ``regex``.
+        """
+        if mode not in PARSERS:
+            raise Exception("html parser {0} unsupported".format(mode))
+
+        if mode == 'lxml':
+            try:
+                import lxml
+            except ImportError:
+                raise Exception("html parser lxml requires the lxml package")
+
+        self.mode = mode
+        self._backend = 'lxml' if mode == 'lxml' else 'html.parser'
+
+    def meta(self, text, attr='name', value='content', required=()):
+        """
+        Extract the meta tags of a page.
+
+        Args:
+            text (str): HTML page.
+            attr (str): Attribute identifying the meta tag, eg., ``name``.
+            value (str): Attribute holding the value, eg., ``content``.
+            required (tuple): Identifiers the caller needs; the ``head`` mode
+                continues after the ``<head>`` when these are not found.
+
+        Returns:
+            dict: Value of the meta tags by identifier.
+        """
+        if self.mode == 'head':
+            return _head_meta(text, attr, value, required)
+
+        if self.mode == 'regex':
+            metas = _regex_metas(text)
+        else:
+            metas = _soup_metas(text, self._backend)
+
+        return _meta_dict(metas, attr, value)
+
+    def soup(self, text, form_id=None):
+        """
+        Parse a page into a BeautifulSoup document.
+
+        Args:
+            text (str): HTML page.
+            form_id (str): Id of the form the caller needs; the ``head``
+                mode stops parsing after this form.
+
+        Returns:
+            bs4.BeautifulSoup: Document.
+        """
+        if form_id is not None and self.mode == 'head':
+            text = _until_form(text, form_id)
+
+        from bs4 import BeautifulSoup
+
+        return BeautifulSoup(text, self._backend)
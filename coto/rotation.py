@@ -0,0 +1,276 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+import time
+from . import exceptions
+
+
+class RootKeyRotation:
+    """
+    Rotates the access keys of the account root user of many accounts.
+
+    For every account a new key is created, the old active keys are
+    deactivated, and optionally deleted. Accounts are rotated in parallel,
+    the steps for one account always run in order. Progress is written to a
+    checkpoint file, so an interrupted rotation continues where it stopped
+    when run again.
+
+    .. code-block:: python
+
+        import coto
+        from coto.rotation import RootKeyRotation
+
+        def store_key(account, key):
+            # store key['id'] and key['secret'] somewhere safe
+            ...
+
+        rotation = RootKeyRotation(
+            sessions,
+            checkpoint='rotation.json',
+            on_key_created=store_key,
+        )
+        report = rotation.run()
+
+    The new secret access key is only passed to ``on_key_created``, it is
+    never written to the checkpoint. When ``on_key_created`` raises, the new
+    key is deleted and the account fails before its old keys are touched. A
+    key created by an interrupted run whose secret may not have been
+    delivered is deleted and created again, a key an interrupted run already
+    deleted is not deleted again.
+    """
+
+    def __init__(
+        self, sessions, checkpoint=None, on_key_created=None,
+        delete=True, max_workers=10
+    ):
+        """
+        Args:
+            sessions (dict | coto.SessionPool): Signed in root sessions by
+                account name, or a session pool.
+            checkpoint (str): Path of the checkpoint file, ``None`` to not
+                checkpoint.
+            on_key_created (callable): Called with the account name and the
+                response of :py:meth:`coto.clients.iam.Client.create_root_access_key`.
+            delete (bool): Delete the old keys after deactivating them.
+            max_workers (int): Maximum number of accounts rotated
+                concurrently.
+        """
+        self._sessions = sessions
+        self._checkpoint_path = checkpoint
+        self._on_key_created = on_key_created
+        self._delete = delete
+        self._max_workers = max_workers
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._state = self._load()
+
+    # sessions
+    def _accounts(self):
+        if hasattr(self._sessions, 'accounts'):
+            return self._sessions.accounts()
+        return list(self._sessions)
+
+    def _iam(self, account):
+        if hasattr(self._sessions, 'session'):
+            session = self._sessions.session(account)
+        else:
+            session = self._sessions[account]
+        return session.client('iam')
+
+    def _call(self, func, *args, **kwargs):
+        with self._lock:
+            self._calls += 1
+        return func(*args, **kwargs)
+
+    # checkpoint
+    def _load(self):
+        if self._checkpoint_path is None or not os.path.exists(self._checkpoint_path):
+            return {}
+
+        with open(self._checkpoint_path) as fp:
+            return json.load(fp)
+
+    def _save(self):
+        if self._checkpoint_path is None:
+            return
+
+        tmp = "{0}.tmp".format(self._checkpoint_path)
+        with open(tmp, 'w') as fp:
+            json.dump(self._state, fp, indent=2)
+        os.replace(tmp, self._checkpoint_path)
+
+    def _update(self, account, **kwargs):
+        with self._lock:
+            self._state.setdefault(account, {}).update(kwargs)
+            self._save()
+
+    # planning
+    def _plan_account(self, account):
+        keys = self._call(self._iam(account).list_root_access_keys)
+        active = [k['id'] for k in keys if k['status'] == 'Active']
+        inactive = [k['id'] for k in keys if k['status'] == 'Inactive']
+
+        # an account root user can have at most two access keys
+        steps = []
+        if len(active) + len(inactive) >= 2:
+            if not inactive:
+                raise Exception(
+                    "account {0} has two active root access keys".format(account))
+            steps += [{'action': 'delete', 'key': k} for k in inactive[:1]]
+
+        steps.append({'action': 'create', 'key': None})
+        steps += [{'action': 'deactivate', 'key': k} for k in active]
+        if self._delete:
+            steps += [{'action': 'delete', 'key': k} for k in active]
+
+        return {'keys': active + inactive, 'steps': steps}
+
+    def plan(self, accounts=None):
+        """
+        Plan the rotation, listing the keys of every account concurrently.
+        Accounts with a plan in the checkpoint keep that plan.
+
+        Args:
+            accounts (list): Names of the accounts, defaults to all.
+
+        Returns:
+            dict: Response Syntax
+
+            .. code-block:: python
+
+                {
+                    'account': {
+                        'keys': [str],
+                        'steps': [
+                            {
+                                'action': 'create' | 'deactivate' | 'delete',
+                                'key': str,
+                            },
+                        ],
+                    }
+                }
+        """
+        if accounts is None:
+            accounts = self._accounts()
+
+        def plan(account):
+            if 'steps' in self._state.get(account, {}):
+                return self._state[account]
+
+            planned = self._plan_account(account)
+            self._update(account, done=0, **planned)
+            return planned
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            return dict(zip(accounts, executor.map(plan, accounts)))
+
+    # execution
+    def _delete_orphans(self, iam, account):
+        # a key created before an interruption is not in the planned keys;
+        # its secret may never have reached on_key_created, so it is
+        # replaced instead of adopted
+        known = set(self._state[account]['keys'])
+        for key in self._call(iam.list_root_access_keys):
+            if key['id'] not in known:
+                self._call(iam.delete_root_access_key, key['id'])
+
+    def _create(self, iam, account):
+        key = self._call(iam.create_root_access_key)
+        if self._on_key_created is not None:
+            try:
+                self._on_key_created(account, key)
+            except Exception:
+                # nobody has the secret of this key
+                self._call(iam.delete_root_access_key, key['id'])
+                raise
+        # only recorded once the secret was delivered
+        self._update(account, created=key['id'])
+
+    def _step(self, iam, account, step, resumed):
+        action = step['action']
+
+        if action == 'create':
+            if resumed and 'created' in self._state[account]:
+                # the key was delivered, only the progress was not saved
+                return
+            if resumed:
+                self._delete_orphans(iam, account)
+            self._create(iam, account)
+
+        elif action == 'deactivate':
+            self._call(iam.update_root_access_key, step['key'], 'Inactive')
+
+        elif action == 'delete':
+            try:
+                self._call(iam.delete_root_access_key, step['key'])
+            except exceptions.ClientError as e:
+                # the key was deleted, only the progress was not saved
+                if not resumed or e.status_code != 404:
+                    raise
+
+    def _rotate(self, account):
+        state = self._state[account]
+        resumed = state.get('started', False)
+        self._update(account, started=True)
+
+        iam = self._iam(account)
+        for i in range(state['done'], len(state['steps'])):
+            self._step(iam, account, state['steps'][i], resumed)
+            self._update(account, done=i + 1)
+            resumed = False
+
+    def run(self, accounts=None):
+        """
+        Rotate the keys, planning accounts that have no plan yet.
+
+        Args:
+            accounts (list): Names of the accounts, defaults to all.
+
+        Returns:
+            dict: Response Syntax
+
+            .. code-block:: python
+
+                {
+                    'rotated': {'account': str},
+                    'failed': {'account': str},
+                    'calls': int,
+                    'seconds': float,
+                }
+
+            **rotated** (*dict*) -- Id of the new access key by account.
+
+            **failed** (*dict*) -- Error by account; run again to continue.
+
+            **calls** (*int*) -- Console API calls issued by this run.
+
+            **seconds** (*float*) -- Wall-clock time of this run.
+        """
+        start = time.perf_counter()
+        self._calls = 0
+
+        if accounts is None:
+            accounts = self._accounts()
+
+        rotated = {}
+        failed = {}
+
+        def rotate(account):
+            try:
+                if 'steps' not in self._state.get(account, {}):
+                    self._update(account, done=0, **self._plan_account(account))
+                self._rotate(account)
+                rotated[account] = self._state[account].get('created')
+            except Exception as e:
+                failed[account] = str(e)
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            list(executor.map(rotate, accounts))
+
+        return {
+            'rotated': rotated,
+            'failed': failed,
+            'calls': self._calls,
+            'seconds': time.perf_counter() - start,
+        }
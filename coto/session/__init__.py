@@ -1 +1,33 @@
+import importlib
 from .session import Session
+
+# imported on first use, to keep `import coto` fast
+_LAZY = {
+    'MemoryStore': 'store',
+    'FileStore': 'store',
+    'SqliteStore': 'store',
+    'SessionPool': 'pool',
+    'PoolResult': 'pool',
+    'HostLimiter': 'pool',
+    'AsyncSession': 'async_session',
+    'AsyncClient': 'async_session',
+    'Instrumentation': 'instrumentation',
+    'OpenTelemetryExporter': 'instrumentation',
+    'SigninTokenCache': 'tokens',
+    'OrganizationPool': 'organization',
+    'RoleCredentialCache': 'organization',
+    'AccountCache': 'accounts',
+    'TotpAllocator': 'totp',
+    'RateLimiter': 'ratelimit',
+    'RetryPolicy': 'retry',
+    'ResponseCache': 'cache',
+    'SingleFlight': 'singleflight',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        module = importlib.import_module('.' + _LAZY[name], __name__)
+        return getattr(module, name)
+
+    raise AttributeError("module {0} has no attribute {1}".format(__name__, name))
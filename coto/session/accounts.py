@@ -0,0 +1,81 @@
+from .store import MemoryStore
+
+
+class AccountCache:
+    """
+    Caches the account type and mfa type of root users by email address, so
+    a signin to a known account skips the ``resolveAccountType`` and mfa
+    status lookups.
+
+    Entries are kept in a session store, eg., a
+    :py:class:`coto.session.store.SqliteStore` to share them between
+    processes. An entry is invalidated when a signin using it fails.
+
+    .. code-block:: python
+
+        import coto
+        from coto.session.accounts import AccountCache
+        from coto.session.store import SqliteStore
+
+        cache = AccountCache(SqliteStore('accounts.db'))
+        session = coto.Session(
+            account_cache=cache,
+            email='email@example.com',
+            password='s3cr3t',
+        )
+    """
+
+    def __init__(self, store=None, account_type_ttl=604800, mfa_type_ttl=86400):
+        """
+        Args:
+            store (coto.session.store.MemoryStore): Store for the entries,
+                defaults to a new :py:class:`coto.session.store.MemoryStore`.
+            account_type_ttl (float): Seconds an account type is cached
+                (default 7 days).
+            mfa_type_ttl (float): Seconds an mfa type is cached (default 1
+                day).
+        """
+        self._store = MemoryStore() if store is None else store
+        self.account_type_ttl = account_type_ttl
+        self.mfa_type_ttl = mfa_type_ttl
+
+    @staticmethod
+    def _key(kind, email):
+        return "{0}:{1}".format(kind, email.lower())
+
+    def _get(self, kind, email):
+        entry = self._store.get(self._key(kind, email))
+        return entry['value'] if entry is not None else None
+
+    def account_type(self, email):
+        """
+        Returns:
+            str: ``Coupled``, ``Decoupled`` or ``Unknown``, ``None`` when not
+            cached.
+        """
+        return self._get('account-type', email)
+
+    def set_account_type(self, email, account_type):
+        self._store.put(
+            self._key('account-type', email), {'value': account_type},
+            self.account_type_ttl)
+
+    def mfa_type(self, email):
+        """
+        Returns:
+            str: Mfa type of the mfa status response, eg., ``NONE`` or
+            ``SW``, ``None`` when not cached.
+        """
+        return self._get('mfa-type', email)
+
+    def set_mfa_type(self, email, mfa_type):
+        self._store.put(
+            self._key('mfa-type', email), {'value': mfa_type},
+            self.mfa_type_ttl)
+
+    def invalidate(self, email):
+        """
+        Forget everything cached for an email address.
+        """
+        self._store.delete(self._key('account-type', email))
+        self._store.delete(self._key('mfa-type', email))
@@ -0,0 +1,142 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from .session import Session
+from .. import captcha, exceptions
+
+
+class AsyncClient:
+    """
+    Awaitable wrapper around a service client. Every public method of the
+    wrapped client is available as a coroutine with the same arguments and
+    return value.
+
+    .. code-block:: python
+
+        iam = session.client('iam')
+        response = await iam.get_account_info()
+    """
+
+    def __init__(self, async_session, client):
+        self._async_session = async_session
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self._async_session._run(attr, *args, **kwargs)
+
+        return method
+
+
+class AsyncSession:
+    """
+    The AsyncSession class represents a session with the AWS Management
+    Console for use with asyncio.
+
+    The requests of all clients share one connection pool; they are executed
+    by a pool of worker threads, so the event loop is never blocked.
+
+    Every call in flight occupies a worker thread until it completes, so at
+    most ``max_workers`` calls are in flight; further calls wait for a free
+    worker. Captchas of the console signin are awaited on the event loop
+    instead, the worker is free until the guess is known; captchas of the
+    Amazon signin and password reset pages are still awaited in the worker. Each worker costs a thread stack and a pooled connection, raise
+    ``max_workers`` to run more calls concurrently. Calls of the same
+    session share tokens and cookies safely, see :doc:`threads`; IAM calls
+    run one at a time, as every response rotates the IAM token.
+
+    .. code-block:: python
+
+        import coto
+
+        async def main():
+            async with coto.AsyncSession() as session:
+                await session.signin(boto3_session=boto3.Session())
+                iam = session.client('iam')
+                return await iam.get_account_info()
+    """
+
+    def __init__(self, max_workers=32, **kwargs):
+        """
+        Args:
+            max_workers (int): Maximum number of calls in flight, each
+                taking a worker thread, also used as the size of the
+                connection pool per host (default 32).
+            **kwargs: Arguments for :py:class:`coto.Session`, except the
+                signin arguments, use :py:meth:`signin` instead.
+        """
+        kwargs.setdefault('pool_maxsize', max_workers)
+        self.session = Session(**kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._clients = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """
+        Wait for running requests and stop the workers.
+        """
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self._executor.shutdown, wait=True))
+        self.session.session.close()
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        context.run(captcha.await_guesses)
+        call = functools.partial(context.run, func, *args, **kwargs)
+
+        while True:
+            try:
+                return await loop.run_in_executor(self._executor, call)
+            except captcha.CaptchaPending as pending:
+                pending.resume(await self._guess(pending.job))
+
+    async def _guess(self, job):
+        timeout = self.session._captcha_timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(job), timeout)
+        except asyncio.TimeoutError:
+            job.cancel()
+            raise exceptions.DeadlineExceeded(
+                "captcha not solved within {0} seconds".format(timeout))
+
+    @property
+    def authenticated(self):
+        return self.session.authenticated
+
+    async def signin(self, **kwargs):
+        """
+        Signin to the AWS Management Console, see
+        :py:meth:`coto.Session.signin` for the arguments.
+        """
+        return await self._run(self.session.signin, **kwargs)
+
+    def client(self, service):
+        """
+        Create a client for a service, see :py:meth:`coto.Session.client`
+        for the supported services.
+
+        Args:
+            service: name of the service, eg., `billing`
+
+        Returns:
+            AsyncClient: service client with awaitable methods
+        """
+        service = service.lower()
+
+        if service not in self._clients:
+            self._clients[service] = AsyncClient(
+                self, self.session.client(service))
+
+        return self._clients[service]
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import threading
+import uuid
+from .store import MemoryStore
+
+
+class ResponseCache:
+    """
+    Caches the results of read-only client methods, eg.,
+    ``iam.get_account_info`` or ``billing.list_alternate_contacts``, per
+    signed in principal.
+
+    Client methods changing the account invalidate the cached results they
+    affect, eg., ``billing.set_alternate_contacts`` invalidates
+    ``billing.list_alternate_contacts``, also when they fail.
+
+    Results are kept in memory with least recently used eviction, or in a
+    session store, eg., a :py:class:`coto.session.store.SqliteStore` to keep
+    them across restarts and share them between processes.
+
+    .. code-block:: python
+
+        import coto
+        from coto.session.cache import ResponseCache
+
+        cache = ResponseCache(
+            ttls={'billing.account_status': 60, 'iam.get_account_info': 900},
+            default_ttl=300,
+        )
+        session = coto.Session(
+            response_cache=cache,
+            email='email@example.com',
+            password='s3cr3t',
+        )
+    """
+
+    def __init__(self, ttls=None, default_ttl=300, maxsize=1024, store=None):
+        """
+        Args:
+            ttls (dict): Seconds results are cached by method name, eg.,
+                ``iam.list_root_access_keys``. ``0`` to not cache a method.
+            default_ttl (float): Seconds results of methods not in ``ttls``
+                are cached (default 300).
+            maxsize (int): Maximum number of entries kept in memory.
+            store (coto.session.store.MemoryStore): Store for the entries
+                instead of memory, see :py:mod:`coto.session.store`.
+        """
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self._store = MemoryStore(maxsize) if store is None else store
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def ttl(self, name):
+        """
+        Returns:
+            float: Seconds the results of method ``name`` are cached.
+        """
+        return self.ttls.get(name, self.default_ttl)
+
+    # a generation per principal and method is part of the entry keys,
+    # invalidation replaces it so old entries are never read again, even
+    # when they are written by a request that started before
+    def _generation(self, scope, name):
+        key = 'generation:{0}:{1}'.format(scope, name)
+        entry = self._store.get(key)
+        if entry is not None:
+            return entry['value']
+
+        generation = uuid.uuid4().hex
+        self._store.put(key, {'value': generation})
+        return generation
+
+    @staticmethod
+    def _key(scope, name, generation, args, kwargs):
+        arguments = json.dumps([args, kwargs], sort_keys=True, default=repr)
+        digest = hashlib.sha256(arguments.encode()).hexdigest()
+        return 'response:{0}:{1}:{2}:{3}'.format(scope, name, generation, digest)
+
+    def call(self, scope, name, fetch, args=(), kwargs=None):
+        """
+        Return the cached result of a method call, calling ``fetch`` when
+        not cached.
+
+        Args:
+            scope (str): Principal the result belongs to.
+            name (str): Method name, eg., ``iam.get_account_info``.
+            fetch (callable): Returns the result.
+            args (tuple): Positional arguments of the method call.
+            kwargs (dict): Keyword arguments of the method call.
+
+        Returns:
+            object: The result.
+        """
+        ttl = self.ttl(name)
+        if not ttl:
+            return fetch()
+
+        key = self._key(scope, name, self._generation(scope, name), args, kwargs or {})
+        entry = self._store.get(key)
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            return entry['value']
+
+        with self._lock:
+            self.misses += 1
+        value = fetch()
+        self._store.put(key, {'value': value}, ttl)
+        return value
+
+    def invalidate(self, scope, name):
+        """
+        Forget the cached results of method ``name`` for a principal.
+        """
+        self._store.delete('generation:{0}:{1}'.format(scope, name))
@@ -0,0 +1,36 @@
+from urllib.parse import urlsplit
+
+_CONSOLE_SERVICES = ('iam', 'billing', 'support')
+_SIGNIN_APIS = ('mfa', 'updateaccount', 'federation', 'resetpassword')
+
+
+def endpoint(url):
+    """
+    Classify a request url by the console endpoint family it belongs to.
+
+    Families:
+        ``signin``, ``mfa``, ``updateaccount``, ``federation`` and
+        ``resetpassword`` on signin.aws.amazon.com; ``iam``, ``billing``,
+        ``support`` and ``console`` on console.aws.amazon.com; ``amazon`` for
+        the Amazon signin pages; ``other`` for anything else.
+
+    Args:
+        url (str): Request url.
+
+    Returns:
+        str: Endpoint family.
+    """
+    parts = urlsplit(url)
+    host = parts.hostname or ''
+    first = parts.path.lstrip('/').split('/', 1)[0]
+
+    if host == 'signin.aws.amazon.com':
+        return first if first in _SIGNIN_APIS else 'signin'
+
+    if host == 'console.aws.amazon.com':
+        return first if first in _CONSOLE_SERVICES else 'console'
+
+    if host.endswith('amazon.com') and not host.endswith('aws.amazon.com'):
+        return 'amazon'
+
+    return 'other'
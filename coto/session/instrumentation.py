@@ -0,0 +1,192 @@
+import threading
+import time
+from ..clients import current_operation
+from .endpoints import endpoint
+
+
+class RequestEvent:
+    """
+    A request sent by a session, passed to the instrumentation hooks.
+
+    Attributes:
+        method (str): HTTP method.
+        url (str): Request url.
+        endpoint (str): Endpoint family, see
+            :py:func:`coto.session.endpoints.endpoint`.
+        operation (str): Client method the request is sent for, eg.,
+            ``iam.get_account_info``, ``None`` outside of client methods.
+        kwargs (dict): Arguments for ``requests``, ``before_request`` hooks
+            may modify these, eg., to add headers.
+        start_time (float): Epoch time the request was sent.
+        response (requests.Response): Response, ``None`` on error.
+        error (Exception): Exception raised by the request, if any.
+        timings (dict): Seconds spent, ``total`` for the whole request
+            including redirects and body, ``server`` until the response
+            headers were received, summed over redirects. Waiting for the
+            rate and host limiters is not included.
+    """
+
+    def __init__(self, method, url, kwargs):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint(url)
+        self.operation = current_operation()
+        self.kwargs = kwargs
+        self.start_time = None
+        self.response = None
+        self.error = None
+        self.timings = {}
+
+    @property
+    def status_code(self):
+        return self.response.status_code if self.response is not None else None
+
+
+class Instrumentation:
+    """
+    Hooks and counters for the requests of a session.
+
+    .. code-block:: python
+
+        from coto.session.instrumentation import Instrumentation
+
+        instrumentation = Instrumentation()
+        instrumentation.add_hook(
+            'after_request',
+            lambda event: print(event.endpoint, event.timings['total']))
+
+        session = coto.Session(instrumentation=instrumentation)
+
+    Sessions without instrumentation skip all of this.
+    """
+
+    EVENTS = ('before_request', 'after_request')
+
+    def __init__(self, exporter=None):
+        """
+        Args:
+            exporter (OpenTelemetryExporter): Exports a span per request.
+        """
+        self._hooks = {event: [] for event in self.EVENTS}
+        self._counters = {}
+        self._lock = threading.Lock()
+        if exporter is not None:
+            self.add_hook('after_request', exporter.export)
+
+    def add_hook(self, event, func):
+        """
+        Args:
+            event (str): ``before_request`` or ``after_request``.
+            func (callable): Called with the :py:class:`RequestEvent`.
+        """
+        if event not in self._hooks:
+            raise Exception("event {0} unsupported".format(event))
+        self._hooks[event].append(func)
+
+    def counters(self):
+        """
+        Request counters per client method, endpoint family and HTTP
+        method.
+
+        Returns:
+            dict: Response Syntax
+
+            .. code-block:: python
+
+                {
+                    ('iam.get_account_info', 'iam', 'GET'): {
+                        'requests': int,
+                        'errors': int,
+                        'seconds': float,
+                    }
+                }
+        """
+        with self._lock:
+            return {k: dict(v) for k, v in self._counters.items()}
+
+    def reset(self):
+        """
+        Reset the counters.
+        """
+        with self._lock:
+            self._counters = {}
+
+    def _record(self, event):
+        key = (event.operation, event.endpoint, event.method)
+        failed = event.error is not None or event.status_code >= 400
+        with self._lock:
+            counter = self._counters.setdefault(
+                key, {'requests': 0, 'errors': 0, 'seconds': 0.0})
+            counter['requests'] += 1
+            counter['errors'] += int(failed)
+            counter['seconds'] += event.timings['total']
+
+    def instrument(self, send, method, url, kwargs):
+        """
+        Send a request, running the hooks and updating the counters.
+        """
+        event = RequestEvent(method, url, kwargs)
+        for hook in self._hooks['before_request']:
+            hook(event)
+
+        event.start_time = time.time()
+        start = time.perf_counter()
+        try:
+            event.response = send(event.method, event.url, event.kwargs)
+            return event.response
+        except Exception as e:
+            event.error = e
+            raise
+        finally:
+            event.timings['total'] = time.perf_counter() - start
+            if event.response is not None:
+                event.timings['server'] = sum(
+                    i.elapsed.total_seconds()
+                    for i in event.response.history + [event.response])
+
+            self._record(event)
+            for hook in self._hooks['after_request']:
+                hook(event)
+
+
+class OpenTelemetryExporter:
+    """
+    Exports a span per request to OpenTelemetry, requires the
+    ``opentelemetry-api`` package.
+    """
+
+    def __init__(self, tracer=None):
+        """
+        Args:
+            tracer (opentelemetry.trace.Tracer): Tracer to create the spans
+                with, defaults to the tracer of the global provider.
+        """
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer('coto')
+
+    def export(self, event):
+        start = int(event.start_time * 1e9)
+        end = start + int(event.timings['total'] * 1e9)
+        attributes = {
+            'http.method': event.method,
+            'http.url': event.url,
+            'coto.endpoint': event.endpoint,
+        }
+        if event.operation is not None:
+            attributes['coto.operation'] = event.operation
+        if event.response is not None:
+            attributes['http.status_code'] = event.response.status_code
+
+        span = self._tracer.start_span(
+            "{0} {1}".format(event.endpoint, event.method),
+            kind=self._trace.SpanKind.CLIENT,
+            start_time=start,
+            attributes=attributes,
+        )
+        if event.error is not None:
+            span.record_exception(event.error)
+        if event.error is not None or event.status_code >= 400:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        span.end(end_time=end)
@@ -0,0 +1,201 @@
+import threading
+import time
+from .pool import SessionPool
+from .tokens import SigninTokenCache
+
+
+class RoleCredentials:
+    """
+    Temporary credentials of an assumed role, shaped like the credentials of
+    a boto3 session.
+    """
+
+    def __init__(self, credentials):
+        """
+        Args:
+            credentials (dict): ``Credentials`` of an STS ``assume_role``
+                response.
+        """
+        self.access_key = credentials['AccessKeyId']
+        self.secret_key = credentials['SecretAccessKey']
+        self.token = credentials['SessionToken']
+        # same attribute as botocore refreshable credentials
+        self._expiry_time = credentials['Expiration']
+
+    @property
+    def expires(self):
+        """
+        float: Epoch time the credentials expire.
+        """
+        return self._expiry_time.timestamp()
+
+
+class RoleCredentialCache:
+    """
+    Caches assumed role credentials until shortly before they expire.
+
+    Concurrent callers for the same role wait for a single ``assume_role``
+    call.
+    """
+
+    def __init__(self, refresh_margin=300):
+        """
+        Args:
+            refresh_margin (float): Seconds before expiry credentials are
+                assumed again (default 5 minutes).
+        """
+        self.refresh_margin = refresh_margin
+        self._credentials = {}
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+
+    def _fetch_lock(self, key):
+        with self._lock:
+            if key not in self._fetch_locks:
+                self._fetch_locks[key] = threading.Lock()
+            return self._fetch_locks[key]
+
+    def _valid(self, key):
+        credentials = self._credentials.get(key)
+        if credentials is not None and \
+                credentials.expires - self.refresh_margin > time.time():
+            return credentials
+        return None
+
+    def get(self, key, fetch):
+        """
+        Args:
+            key (str): Role arn.
+            fetch (callable): Returns the ``Credentials`` of an
+                ``assume_role`` response, called when there are no valid
+                cached credentials.
+
+        Returns:
+            RoleCredentials: Credentials.
+        """
+        credentials = self._valid(key)
+        if credentials is not None:
+            return credentials
+
+        with self._fetch_lock(key):
+            credentials = self._valid(key)
+            if credentials is None:
+                credentials = RoleCredentials(fetch())
+                with self._lock:
+                    self._credentials[key] = credentials
+            return credentials
+
+    def invalidate(self, key):
+        with self._lock:
+            self._credentials.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._credentials = {}
+
+
+class _RoleSession:
+    # the part of a boto3 session the federation client uses
+    def __init__(self, pool, account):
+        self._pool = pool
+        self._account = account
+
+    def get_credentials(self):
+        return self._pool.credentials(self._account)
+
+
+class OrganizationPool(SessionPool):
+    """
+    A :py:class:`coto.SessionPool` for the member accounts of an
+    organization, signing in through a role assumed from a management
+    account.
+
+    Assuming the role, minting the signin token and signing in to the
+    console run concurrently for the accounts.
+
+    .. code-block:: python
+
+        import boto3
+        import coto
+
+        pool = coto.OrganizationPool(
+            boto3.Session(),
+            'OrganizationAccountAccessRole',
+            ['111111111111', '222222222222'],
+        )
+
+        for r in pool.signin():
+            if r.error:
+                print(r.account, 'failed', r.error)
+
+        session = pool.session('111111111111')
+    """
+
+    def __init__(
+        self, boto3_session, role_name, account_ids,
+        credential_cache=None, role_session_name='coto', duration=3600,
+        partition='aws', signin_token_cache=None, **kwargs
+    ):
+        """
+        Args:
+            boto3_session (boto3.session.Session): Session of the management
+                account.
+            role_name (str): Name of the role to assume in every account,
+                optionally with a path.
+            account_ids (list): Account ids.
+            credential_cache (RoleCredentialCache): Cache for the assumed
+                role credentials, share it between pools to reuse
+                credentials across them.
+            role_session_name (str): Name of the role sessions.
+            duration (int): Seconds the role credentials are valid.
+            partition (str): Partition of the role arns.
+            signin_token_cache (coto.session.tokens.SigninTokenCache): Cache
+                for the federation signin tokens, shared by the sessions.
+            **kwargs: Arguments for :py:class:`coto.SessionPool`.
+        """
+        self._sts = boto3_session.client('sts')
+        self._role_name = role_name.strip('/')
+        self._role_session_name = role_session_name
+        self._duration = duration
+        self._partition = partition
+        self._credential_cache = (
+            RoleCredentialCache() if credential_cache is None
+            else credential_cache)
+
+        super().__init__(
+            {
+                account: {'boto3_session': _RoleSession(self, account)}
+                for account in account_ids
+            },
+            signin_token_cache=(
+                SigninTokenCache() if signin_token_cache is None
+                else signin_token_cache),
+            **kwargs
+        )
+
+    def role_arn(self, account):
+        """
+        Returns:
+            str: Arn of the role assumed in an account.
+        """
+        return "arn:{0}:iam::{1}:role/{2}".format(
+            self._partition, account, self._role_name)
+
+    def credentials(self, account):
+        """
+        Get the role credentials for an account, assuming the role when
+        there are no valid cached credentials.
+
+        Returns:
+            RoleCredentials: Credentials.
+        """
+        arn = self.role_arn(account)
+
+        def assume():
+            return self._sts.assume_role(
+                RoleArn=arn,
+                RoleSessionName=self._role_session_name,
+                DurationSeconds=self._duration,
+            )['Credentials']
+
+        return self._credential_cache.get(arn, assume)
@@ -0,0 +1,202 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import threading
+from .session import Session
+
+PoolResult = namedtuple('PoolResult', ['account', 'result', 'error'])
+PoolResult.__doc__ = """
+Outcome of a call for one account of a :py:class:`SessionPool`.
+
+Exactly one of ``result`` and ``error`` is set; ``error`` holds the
+exception raised during signin or by the client method.
+"""
+
+
+class HostLimiter:
+    """
+    Limits the number of concurrent requests per host.
+    """
+
+    def __init__(self, limits=None, default=None):
+        """
+        Args:
+            limits (dict): Maximum number of concurrent requests by host name,
+                eg., ``{'signin.aws.amazon.com': 4}``.
+            default (int): Maximum number of concurrent requests for hosts
+                not in ``limits``, ``None`` for no limit.
+        """
+        self._limits = dict(limits or {})
+        self._default = default
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                limit = self._limits.get(host, self._default)
+                if limit is None:
+                    self._semaphores[host] = None
+                else:
+                    self._semaphores[host] = threading.BoundedSemaphore(limit)
+            return self._semaphores[host]
+
+    @contextmanager
+    def limit(self, url):
+        """
+        Context manager holding a request slot for the host of ``url``.
+        """
+        semaphore = self._semaphore(urlparse(url).hostname)
+        if semaphore is None:
+            yield
+            return
+
+        with semaphore:
+            yield
+
+
+class SessionPool:
+    """
+    A pool of sessions for many accounts, signing in and calling clients
+    concurrently.
+
+    .. code-block:: python
+
+        import coto
+
+        pool = coto.SessionPool({
+            '111111111111': {'boto3_session': boto3_session_1},
+            '222222222222': {'email': 'email@example.com', 'password': 's3cr3t'},
+        })
+
+        for r in pool.map('iam', 'get_account_info'):
+            if r.error:
+                print(r.account, 'failed', r.error)
+            else:
+                print(r.account, r.result)
+
+    A failing account, eg., one waiting for a captcha or with invalid
+    credentials, only occupies its own worker; the results for the other
+    accounts are streamed as they finish.
+    """
+
+    def __init__(
+        self, credentials, max_workers=10, host_limits=None,
+        default_host_limit=None, **kwargs
+    ):
+        """
+        Args:
+            credentials (dict): Signin arguments for
+                :py:meth:`coto.Session.signin` by account name.
+            max_workers (int): Maximum number of accounts processed
+                concurrently.
+            host_limits (dict): Maximum number of concurrent requests by host
+                name, over all sessions in the pool.
+            default_host_limit (int): Maximum number of concurrent requests
+                for hosts not in ``host_limits``.
+            **kwargs: Arguments for every :py:class:`coto.Session` created,
+                eg., ``captcha_solver``.
+        """
+        self._credentials = dict(credentials)
+        self._session_kwargs = kwargs
+        self._host_limiter = HostLimiter(host_limits, default_host_limit)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._sessions = {}
+        self._locks = {account: threading.Lock() for account in self._credentials}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Wait for running calls and stop the workers.
+        """
+        self._executor.shutdown(wait=True)
+
+    def accounts(self):
+        """
+        Returns:
+            list: Names of the accounts in the pool.
+        """
+        return list(self._credentials)
+
+    def session(self, account):
+        """
+        Get the signed in session for an account, signing in if needed.
+
+        Args:
+            account (str): Account name.
+
+        Returns:
+            coto.Session: Signed in session.
+        """
+        with self._locks[account]:
+            if account not in self._sessions:
+                session = Session(
+                    host_limiter=self._host_limiter, **self._session_kwargs)
+                if not session.signin(**self._credentials[account]):
+                    raise Exception("failed signin {0}".format(account))
+                self._sessions[account] = session
+
+            return self._sessions[account]
+
+    def _call(self, account, func):
+        try:
+            return PoolResult(account, func(self.session(account)), None)
+        except Exception as e:
+            return PoolResult(account, None, e)
+
+    def _stream(self, func, accounts):
+        if accounts is None:
+            accounts = self.accounts()
+
+        futures = [
+            self._executor.submit(self._call, account, func)
+            for account in accounts
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def signin(self, accounts=None):
+        """
+        Sign in to the accounts concurrently.
+
+        Args:
+            accounts (list): Names of the accounts, defaults to all accounts.
+
+        Returns:
+            generator: :py:class:`PoolResult` per account as it finishes, the
+            result is the session.
+        """
+        return self._stream(lambda session: session, accounts)
+
+    def map(self, service, method, accounts=None, **kwargs):
+        """
+        Call a client method for every account concurrently, signing in
+        where needed.
+
+        Request Syntax:
+            .. code-block:: python
+
+                results = pool.map(
+                    'billing',
+                    'list_alternate_contacts',
+                )
+
+        Args:
+            service (str): Name of the service, eg., ``billing``.
+            method (str): Name of the client method.
+            accounts (list): Names of the accounts, defaults to all accounts.
+            **kwargs: Arguments for the client method.
+
+        Returns:
+            generator: :py:class:`PoolResult` per account as it finishes.
+        """
+        def call(session):
+            return getattr(session.client(service), method)(**kwargs)
+
+        return self._stream(call, accounts)
@@ -0,0 +1,188 @@
+from contextlib import contextmanager
+import threading
+import time
+from .endpoints import endpoint
+from .store import SqliteConnections
+
+THROTTLED = (429, 503)
+
+
+class _MemoryBuckets:
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def state(self, family):
+        with self._lock:
+            yield self._states.setdefault(family, {})
+
+
+class _SqliteBuckets:
+    def __init__(self, path):
+        self.path = path
+        self._connections = SqliteConnections(
+            path, timeout=30, isolation_level=None)
+
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "family TEXT PRIMARY KEY, tokens REAL, updated REAL, rate REAL)")
+
+    def _connection(self):
+        return self._connections.get()
+
+    @contextmanager
+    def state(self, family):
+        conn = self._connection()
+        # take the write lock up front, the state is read and written
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated, rate FROM buckets WHERE family = ?",
+                (family, )).fetchone()
+            state = {}
+            if row is not None:
+                state = {'tokens': row[0], 'updated': row[1], 'rate': row[2]}
+
+            yield state
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (family, tokens, updated, rate) "
+                "VALUES (?, ?, ?, ?)",
+                (family, state['tokens'], state['updated'], state['rate']))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+class RateLimiter:
+    """
+    Limits the request rate per console endpoint family with token buckets,
+    adapting the rate to throttling.
+
+    A ``429`` or ``503`` response lowers the rate of its family by
+    ``decrease``, every other response raises it again by ``recovery`` of
+    the configured rate, up to the configured rate. A ``Retry-After`` header
+    pauses the family for that long.
+
+    With a ``path`` the buckets are kept in a SQLite database, so all
+    processes using the same file share the rates.
+
+    .. code-block:: python
+
+        import coto
+        from coto.session.ratelimit import RateLimiter
+
+        limiter = RateLimiter(
+            {'signin': 2, 'iam': 10, 'billing': 5, 'support': 5},
+            path='/tmp/coto-rates.db',
+        )
+        session = coto.Session(rate_limiter=limiter)
+
+    Endpoint families are those of :py:func:`coto.session.endpoints.endpoint`.
+    """
+
+    def __init__(
+        self, rates, default_rate=None, burst=None, path=None,
+        decrease=0.5, recovery=0.02, min_rate=0.1
+    ):
+        """
+        Args:
+            rates (dict): Maximum requests per second by endpoint family.
+            default_rate (float): Maximum requests per second for families
+                not in ``rates``, ``None`` to not limit them.
+            burst (float): Requests that can be sent at once after being
+                idle, defaults to one second worth of requests.
+            path (str): SQLite database shared between processes, ``None``
+                to keep the buckets in memory.
+            decrease (float): Factor the rate is multiplied with on
+                throttling.
+            recovery (float): Fraction of the configured rate added back for
+                every response that was not throttled.
+            min_rate (float): Lowest rate in requests per second.
+        """
+        self.rates = dict(rates)
+        self.default_rate = default_rate
+        self.burst = burst
+        self.decrease = decrease
+        self.recovery = recovery
+        self.min_rate = min_rate
+        self._buckets = _MemoryBuckets() if path is None else _SqliteBuckets(path)
+
+    def _max_rate(self, family):
+        return self.rates.get(family, self.default_rate)
+
+    def _refill(self, state, max_rate, now):
+        rate = min(state.get('rate') or max_rate, max_rate)
+        burst = self.burst if self.burst is not None else max(rate, 1)
+
+        if 'tokens' not in state or state['tokens'] is None:
+            state['tokens'] = burst
+        else:
+            elapsed = max(0, now - state['updated'])
+            state['tokens'] = min(burst, state['tokens'] + elapsed * rate)
+        state['updated'] = now
+        state['rate'] = rate
+        return rate
+
+    def acquire(self, url):
+        """
+        Wait until a request to ``url`` may be sent.
+
+        Returns:
+            float: Seconds waited.
+        """
+        family = endpoint(url)
+        max_rate = self._max_rate(family)
+        if max_rate is None:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._buckets.state(family) as state:
+                rate = self._refill(state, max_rate, time.time())
+                if state['tokens'] >= 1:
+                    state['tokens'] -= 1
+                    return waited
+                wait = (1 - state['tokens']) / rate
+
+            time.sleep(wait)
+            waited += wait
+
+    def feedback(self, url, response):
+        """
+        Adapt the rate of the family of ``url`` to a response.
+        """
+        family = endpoint(url)
+        max_rate = self._max_rate(family)
+        if max_rate is None:
+            return
+
+        throttled = response.status_code in THROTTLED
+        with self._buckets.state(family) as state:
+            rate = self._refill(state, max_rate, time.time())
+
+            if throttled:
+                state['rate'] = max(self.min_rate, rate * self.decrease)
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    # no tokens until the server accepts requests again
+                    state['tokens'] = min(
+                        state['tokens'], -int(retry_after) * state['rate'])
+            else:
+                state['rate'] = min(max_rate, rate + max_rate * self.recovery)
+
+    def rate(self, family):
+        """
+        Returns:
+            float: Current requests per second of an endpoint family,
+            ``None`` when not limited.
+        """
+        max_rate = self._max_rate(family)
+        if max_rate is None:
+            return None
+
+        with self._buckets.state(family) as state:
+            return self._refill(state, max_rate, time.time())
@@ -0,0 +1,168 @@
+from contextlib import contextmanager
+import random
+import threading
+import time
+import requests
+from ..exceptions import DeadlineExceeded, RETRYABLE_STATUS
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+_deadlines = threading.local()
+
+
+@contextmanager
+def deadline(seconds):
+    """
+    Context manager limiting the time of an operation, including its
+    retries, for the current thread.
+
+    Requests are not retried when the backoff would end after the deadline,
+    and a request started after the deadline raises
+    :py:class:`coto.exceptions.DeadlineExceeded`. Nested deadlines can only
+    shorten the outer one.
+
+    .. code-block:: python
+
+        from coto.session.retry import deadline
+
+        with deadline(30):
+            session.client('iam').get_account_info()
+    """
+    outer = getattr(_deadlines, 'at', None)
+    at = time.monotonic() + seconds
+    _deadlines.at = at if outer is None else min(at, outer)
+    try:
+        yield
+    finally:
+        _deadlines.at = outer
+
+
+def _deadline():
+    return getattr(_deadlines, 'at', None)
+
+
+def check_deadline(method, url, end=None):
+    """
+    Raise :py:class:`coto.exceptions.DeadlineExceeded` when the deadline of
+    the current operation, or ``end``, passed.
+    """
+    if end is None:
+        end = _deadline()
+    if end is not None and time.monotonic() >= end:
+        raise DeadlineExceeded(
+            "deadline exceeded before {0} {1}".format(method, url))
+
+
+def idempotent(method, kwargs):
+    """
+    Classify a request as idempotent, following the
+    ``x-http-method-override`` header the console APIs use.
+
+    Returns:
+        bool: Whether sending the request twice has the effect of sending it
+        once.
+    """
+    headers = kwargs.get('headers') or {}
+    for name, value in headers.items():
+        if name.lower() == 'x-http-method-override':
+            method = value
+    return method.upper() in IDEMPOTENT_METHODS
+
+
+class RetryPolicy:
+    """
+    Retries idempotent requests that failed with a transient error: a
+    connection error, a timeout or a ``429``, ``500``, ``502``, ``503`` or
+    ``504`` response.
+
+    Retries wait an exponential backoff with full jitter, at least the
+    ``Retry-After`` of the response, and stop at the deadline of the
+    request or the operation, see :py:func:`deadline`.
+
+    .. code-block:: python
+
+        import coto
+        from coto.session.retry import RetryPolicy
+
+        session = coto.Session(retry_policy=RetryPolicy(max_attempts=5))
+
+    Requests that are not idempotent, eg., signin actions, are sent once.
+    Clients mark POST requests that only read as idempotent.
+    """
+
+    def __init__(
+        self, max_attempts=4, base=0.2, cap=5, deadline=30,
+        retry_status=RETRYABLE_STATUS
+    ):
+        """
+        Args:
+            max_attempts (int): Maximum number of attempts per request.
+            base (float): Seconds of the first backoff.
+            cap (float): Maximum seconds of a backoff.
+            deadline (float): Maximum seconds per request including retries,
+                ``None`` for no limit.
+            retry_status (tuple): Status codes that are retried.
+        """
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.deadline = deadline
+        self.retry_status = retry_status
+
+    def backoff(self, attempt, response=None):
+        """
+        Returns:
+            float: Seconds to wait before retrying after ``attempt``.
+        """
+        delay = random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+
+        retry_after = response.headers.get('Retry-After', '') \
+            if response is not None else ''
+        if retry_after.isdigit():
+            delay = max(delay, int(retry_after))
+
+        return delay
+
+    def send(self, send, method, url, kwargs, is_idempotent=None):
+        """
+        Send a request, retrying transient errors.
+
+        Args:
+            send (callable): Sends the request, called with ``method``,
+                ``url`` and ``kwargs``.
+            is_idempotent (bool): Whether the request may be retried,
+                ``None`` to classify it with :py:func:`idempotent`.
+
+        Returns:
+            requests.Response: The last response.
+        """
+        if is_idempotent is None:
+            is_idempotent = idempotent(method, kwargs)
+
+        end = _deadline()
+        if self.deadline is not None:
+            own = time.monotonic() + self.deadline
+            end = own if end is None else min(end, own)
+
+        attempt = 0
+        while True:
+            check_deadline(method, url, end)
+
+            attempt += 1
+            try:
+                r = send(method, url, kwargs)
+                if r.status_code not in self.retry_status:
+                    return r
+                error = None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                r = None
+                error = e
+
+            delay = self.backoff(attempt, r)
+            if not is_idempotent or attempt >= self.max_attempts or \
+                    (end is not None and time.monotonic() + delay >= end):
+                if error is not None:
+                    raise error
+                return r
+
+            time.sleep(delay)
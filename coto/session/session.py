@@ -1,11 +1,23 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
+from requests.cookies import create_cookie
 from urllib.parse import unquote
-from colors import color
+import hashlib
+import importlib
+import threading
 from .. import clients
+from . import retry, totp
+from .accounts import AccountCache
+from .singleflight import SingleFlight
+from .tokens import SigninTokenCache, TokenManager
+from ..codec import Codec
+from ..parsing import Parser
 
 
 def dr(r):
+    from colors import color
+
     for i in r.history + [r]:
         if i.status_code < 400:
             fg = 'green'
@@ -39,18 +51,60 @@ def dr(r):
             print(color('EOF', fg='blue'))
 
 
+def dump_cookies(jar):
+    # responses received by other threads update the jar under this lock
+    with jar._cookies_lock:
+        return _dump_cookies(jar)
+
+
+def _dump_cookies(jar):
+    return [
+        {
+            'name': c.name,
+            'value': c.value,
+            'domain': c.domain,
+            'path': c.path,
+            'secure': c.secure,
+            'expires': c.expires,
+            'rest': c._rest,
+        } for c in jar
+    ]
+
+
+def load_cookies(jar, cookies):
+    for c in cookies:
+        jar.set_cookie(create_cookie(**c))
+
+
 class Session:
     """
     The Session class represents a session with the AWS Management Console.
 
     Use the `client` method to obtain a client for one of the supported
     services.
+
+    A signed in session and its clients can be shared by many threads, eg.,
+    the workers of a ``ThreadPoolExecutor``: clients are created once,
+    tokens are fetched once and rotated atomically, and identical
+    concurrent calls share one request. Set ``pool_maxsize`` to at least
+    the number of threads. IAM calls are sent one at a time, as every
+    response rotates the IAM token; use a session per worker to run them in
+    parallel.
     """
 
     def __init__(
         self, debug=False, verify=True,
         metadata1_generator=None,
-        captcha_solver=None, **kwargs
+        captcha_solver=None,
+        session_store=None, session_ttl=3600,
+        host_limiter=None,
+        pool_connections=10, pool_maxsize=10, pool_block=False,
+        max_retries=0, keep_alive=True,
+        token_manager=None, html_parser='html.parser',
+        instrumentation=None, captcha_timeout=None,
+        signin_token_cache=None, account_cache=None, totp_allocator=None,
+        json_codec=None, rate_limiter=None, retry_policy=None,
+        response_cache=None, **kwargs
     ):
         """
         Args:
@@ -59,18 +113,111 @@ class Session:
                 CA certificates file. ``False`` to ignore certificate errors.
                 ``True`` to use defaults (default).
             captcha_solver (coto.captcha.Solver): Class implementing a way to solve captchas (e.g., send them to Slack for you to solve).
+                Solvers implementing only ``solve``, ``result`` and
+                ``incorrect`` are wrapped in a
+                :py:class:`coto.captcha.PollingSolver`.
+            captcha_timeout (float): Seconds to wait for a captcha to be
+                solved, ``None`` to wait indefinitely (default).
             metadata1_generator (coto.metadata1.Generator): Class implementing a way to generate metadata1.
+            session_store (coto.session.store.MemoryStore): Store used to
+                save the console session after signin, and to resume it
+                on a later signin with the same credentials. See
+                :py:mod:`coto.session.store` for the available stores.
+            session_ttl (float): Seconds a saved console session is
+                considered valid (default 3600).
+            host_limiter (coto.session.pool.HostLimiter): Limits the number
+                of concurrent requests per host, shared by the sessions of a
+                :py:class:`coto.SessionPool`.
+            pool_connections (int): Number of hosts to keep connection pools
+                for (default 10).
+            pool_maxsize (int): Maximum number of connections kept per host
+                (default 10). Set this to at least the number of threads
+                sharing the session.
+            pool_block (bool): Wait for a free connection when all
+                connections to a host are in use, instead of opening a
+                connection that is discarded after the request (default).
+            max_retries (int | urllib3.util.Retry): Retry policy for failed
+                connections (default 0).
+            keep_alive (bool): Reuse connections between requests (default
+                ``True``).
+            token_manager (coto.session.tokens.TokenManager): Cache for the
+                xsrf tokens of the service clients, to configure token time
+                to live and background refresh.
+            html_parser (str): Mode used to extract tokens and forms from
+                HTML pages, see :py:class:`coto.parsing.Parser`.
+            json_codec (str): Mode used to decode responses and encode
+                request bodies, see :py:class:`coto.codec.Codec`. Defaults
+                to ``orjson`` when installed.
+            rate_limiter (coto.session.ratelimit.RateLimiter): Limits the
+                request rate per endpoint family, adapting to throttling.
+            retry_policy (coto.session.retry.RetryPolicy): Retries
+                idempotent requests that failed with a transient error,
+                ``None`` to send every request once (default).
+            response_cache (coto.session.cache.ResponseCache): Caches the
+                results of read-only client methods, share it between
+                sessions to reuse results across them.
+            instrumentation (coto.session.instrumentation.Instrumentation):
+                Hooks and counters for every request.
+            signin_token_cache (coto.session.tokens.SigninTokenCache): Cache
+                for federation signin tokens, share it between sessions to
+                reuse tokens across them.
+            account_cache (coto.session.accounts.AccountCache): Cache for
+                the account type and mfa type of root users, share it
+                between sessions to skip these lookups on signin.
+            totp_allocator (coto.session.totp.TotpAllocator): Issues the mfa
+                codes, defaults to an allocator shared by all sessions of the
+                process so concurrent signins never submit the same code.
             **kwargs: You can pass arguments for the signin method here.
         """
         self.debug = debug
         self._metadata1_generator = metadata1_generator
-        self._captcha_solver = captcha_solver
+        self._captcha_solver = None
+        if captcha_solver is not None:
+            from .. import captcha
+            self._captcha_solver = captcha.solver(captcha_solver)
+        self._captcha_timeout = captcha_timeout
         self.root = False
         self.coupled = None
         self.session = requests.Session()
         self.session.verify = verify
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=max_retries,
+        ))
+        self.keep_alive = keep_alive
         self.authenticated = False
         self._clients = {}
+        self._client_states = {}
+        # reentrant, creating a client may create the clients it uses
+        self._clients_lock = threading.RLock()
+        self._session_store = session_store
+        self._session_ttl = session_ttl
+        self.session_key = None
+        self._host_limiter = host_limiter
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+        self._response_cache = response_cache
+        self._cache_scope = None
+        self._flight = SingleFlight()
+        # changes per principal and method, see coto.clients.invalidates
+        self._write_epochs = {}
+        self._write_epochs_lock = threading.Lock()
+        self._tokens = (
+            TokenManager(single_flight=self._flight) if token_manager is None
+            else token_manager)
+        self._signin_tokens = (
+            SigninTokenCache() if signin_token_cache is None
+            else signin_token_cache)
+        self._account_cache = (
+            AccountCache() if account_cache is None else account_cache)
+        self._totp = (
+            totp.default_allocator if totp_allocator is None
+            else totp_allocator)
+        self._parser = Parser(html_parser)
+        self._json = Codec(json_codec)
+        self._instrumentation = instrumentation
 
         self.timeout = (3.1, 10)
         self.user_agent = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_13_3) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/64.0.3282.186 Safari/537.36'
@@ -95,17 +242,152 @@ class Session:
             mfa_secret (str): AWS account root user mfa secret to use for login.
                 The Base32 seed defined as specified in RFC3548.
                 The Base32StringSeed is Base64-encoded.
+
+        When the session was created with a ``session_store``, a still valid
+        console session saved for the same credentials is resumed instead of
+        signing in again.
+
+        Concurrent signins with the same credentials on a session share one
+        signin.
         """
+        key = self._credentials_key(kwargs)
+        if key is None:
+            return self._signin(kwargs)
+
+        result, _ = self._flight.do(
+            ('signin', key), lambda: self._signin(kwargs))
+        return result
+
+    def _signin(self, kwargs):
+        store_key = self._store_key(kwargs)
+        if store_key is not None and self._resume(store_key):
+            self._cache_scope = self._principal(kwargs)
+            return True
+
         if 'boto3_session' in kwargs:
             boto3_session = kwargs.get('boto3_session')
-            return self.client('federation').signin(boto3_session)
+            result = self.client('federation').signin(boto3_session)
 
         elif 'email' in kwargs and 'password' in kwargs:
             args = {}
             for key in ['email', 'password', 'mfa_secret']:
                 if key in kwargs:
                     args[key] = kwargs.get(key)
-            return self.client('signin').signin(**args)
+            result = self.client('signin').signin(**args)
+
+        else:
+            return None
+
+        if result:
+            self._cache_scope = self._principal(kwargs)
+
+        if result and store_key is not None:
+            self.session_key = store_key
+            self.save()
+
+        return result
+
+    # session store
+    def _store_key(self, kwargs):
+        if self._session_store is None:
+            return None
+
+        return self._credentials_key(kwargs)
+
+    @classmethod
+    def _credentials_key(cls, kwargs):
+        # the principal and a digest of its secrets, so a saved session or a
+        # signin in flight is only shared by callers with the same secrets
+        principal = cls._principal(kwargs)
+        if principal is None:
+            return None
+
+        if 'boto3_session' in kwargs:
+            credentials = kwargs['boto3_session'].get_credentials()
+            secrets = (credentials.secret_key, credentials.token)
+        else:
+            secrets = (kwargs.get('password'), kwargs.get('mfa_secret'))
+
+        digest = hashlib.sha256('\0'.join(
+            secret or '' for secret in secrets).encode()).hexdigest()
+        return '{0}:{1}'.format(principal, digest)
+
+    @staticmethod
+    def _principal(kwargs):
+        if 'boto3_session' in kwargs:
+            credentials = kwargs['boto3_session'].get_credentials()
+            return 'federation:{0}'.format(credentials.access_key)
+
+        elif 'email' in kwargs:
+            return 'root:{0}'.format(kwargs['email'].lower())
+
+        return None
+
+    def _resume(self, key):
+        state = self._session_store.get(key)
+        if state is None:
+            return False
+
+        load_cookies(self.session.cookies, state['cookies'])
+        self.authenticated = state['authenticated']
+        self.root = state['root']
+        self._client_states = state['clients']
+        self._tokens.load(state.get('tokens', {}))
+        self.session_key = key
+
+        if self._probe():
+            return True
+
+        # the saved console session is no longer valid, start over
+        self._session_store.delete(key)
+        self.session.cookies.clear()
+        self.authenticated = False
+        self.root = False
+        self._clients = {}
+        self._client_states = {}
+        self._tokens.clear()
+        self.session_key = None
+        return False
+
+    def _probe(self):
+        # an unauthenticated request for the console is redirected to signin
+        try:
+            r = self._get(
+                'https://console.aws.amazon.com/console/home',
+                allow_redirects=False)
+        except requests.RequestException:
+            return False
+
+        return r.status_code == 200
+
+    def save(self):
+        """
+        Save the console session in the session store, including the tokens
+        obtained by the clients created so far.
+
+        This is done automatically after signin; call it again to also store
+        tokens obtained afterwards.
+        """
+        if self._session_store is None or self.session_key is None:
+            raise Exception("session has no session store to save to")
+
+        with self._clients_lock:
+            states = dict(self._client_states)
+            created = list(self._clients.items())
+
+        for service, client in created:
+            state = client._get_state()
+            if state:
+                states[service] = state
+
+        self._session_store.put(
+            self.session_key, {
+                'cookies': dump_cookies(self.session.cookies),
+                'authenticated': self.authenticated,
+                'root': self.root,
+                'clients': states,
+                'tokens': self._tokens.dump(),
+            }, self._session_ttl)
 
     # http requests
     def _set_defaults(self, kwargs):
@@ -117,34 +399,130 @@ class Session:
 
         kwargs['headers']['User-Agent'] = self.user_agent
 
-    def _get(self, url, **kwargs):
-        self._set_defaults(kwargs)
-        r = self.session.get(url, **kwargs)
-        if self.debug:
-            dr(r)
+        if not self.keep_alive:
+            kwargs['headers']['Connection'] = 'close'
+
+    def pool_stats(self):
+        """
+        Connection pool utilisation per host.
+
+        Returns:
+            dict: Response Syntax
+
+            .. code-block:: python
+
+                {
+                    'console.aws.amazon.com:443': {
+                        'maxsize': int,
+                        'in_use': int,
+                        'idle': int,
+                        'connections': int,
+                        'requests': int,
+                    }
+                }
+
+            **in_use** (*int*) -- Connections currently serving a request.
+
+            **idle** (*int*) -- Open connections available for reuse.
+
+            **connections** (*int*) -- Connections opened so far; when
+            much larger than ``maxsize``, increase ``pool_maxsize``.
+
+            **requests** (*int*) -- Requests sent so far.
+        """
+        stats = {}
+        for adapter in self.session.adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None or pool.pool is None:
+                    continue
+
+                queued = list(pool.pool.queue)
+                stats["{0}:{1}".format(pool.host, pool.port)] = {
+                    'maxsize': pool.pool.maxsize,
+                    'in_use': pool.pool.maxsize - len(queued),
+                    'idle': len([c for c in queued if c is not None]),
+                    'connections': pool.num_connections,
+                    'requests': pool.num_requests,
+                }
+
+        return stats
+
+    def single_flight_stats(self):
+        """
+        Calls shared between concurrent callers of the session.
+
+        Returns:
+            dict: Response Syntax
+
+            .. code-block:: python
+
+                {
+                    'token': {'calls': int, 'saved': int},
+                    'request': {'calls': int, 'saved': int},
+                    'signin': {'calls': int, 'saved': int},
+                }
+
+            **calls** (*int*) -- Calls made.
+
+            **saved** (*int*) -- Calls not made because an identical call
+            was in flight, the callers shared its result.
+        """
+        return self._flight.stats()
+
+    def _send(self, method, url, kwargs):
+        # waiting for the limiters is not part of the instrumented request
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(url)
+
+        if self._host_limiter is not None:
+            with self._host_limiter.limit(url):
+                r = self._send_instrumented(method, url, kwargs)
+        else:
+            r = self._send_instrumented(method, url, kwargs)
+
+        if self._rate_limiter is not None:
+            self._rate_limiter.feedback(url, r)
         return r
 
-    def _post(self, url, **kwargs):
+    def _send_instrumented(self, method, url, kwargs):
+        if self._instrumentation is None:
+            return self._http(method, url, kwargs)
+
+        return self._instrumentation.instrument(self._http, method, url, kwargs)
+
+    def _http(self, method, url, kwargs):
+        return self.session.request(method, url, **kwargs)
+
+    def _request(self, method, url, idempotent=None, **kwargs):
         self._set_defaults(kwargs)
 
-        r = self.session.post(url, **kwargs)
+        if self._retry_policy is None:
+            retry.check_deadline(method, url)
+            r = self._send(method, url, kwargs)
+        else:
+            r = self._retry_policy.send(
+                self._send, method, url, kwargs, idempotent)
+
+        if self._totp.wants_sample() and 'Date' in r.headers:
+            self._totp.observe(r.headers['Date'])
+
         if self.debug:
             dr(r)
         return r
 
+    def _get(self, url, **kwargs):
+        return self._request('GET', url, **kwargs)
+
+    def _post(self, url, **kwargs):
+        return self._request('POST', url, **kwargs)
+
     def _put(self, url, **kwargs):
-        self._set_defaults(kwargs)
-        r = self.session.put(url, **kwargs)
-        if self.debug:
-            dr(r)
-        return r
+        return self._request('PUT', url, **kwargs)
 
     def _delete(self, url, **kwargs):
-        self._set_defaults(kwargs)
-        r = self.session.delete(url, **kwargs)
-        if self.debug:
-            dr(r)
-        return r
+        return self._request('DELETE', url, **kwargs)
 
     def client(self, service):
         """
@@ -169,17 +547,30 @@ class Session:
         """
         service = service.lower()
 
-        if service not in self._clients:
-            if not hasattr(clients, service):
-                raise Exception("service {0} unsupported".format(service))
+        client = self._clients.get(service)
+        if client is not None:
+            return client
+
+        if service not in clients.SERVICES:
+            raise Exception("service {0} unsupported".format(service))
+
+        module = importlib.import_module(
+            '{0}.{1}'.format(clients.__name__, service))
+        klass = module.Client
+
+        if klass.REQUIRES_AUTHENTICATION and not self.authenticated:
+            raise Exception(
+                "signin before creating {0} service client".format(
+                    service))
 
-            klass = getattr(clients, service).Client
+        with self._clients_lock:
+            if service not in self._clients:
+                client = klass(self)
 
-            if klass.REQUIRES_AUTHENTICATION and not self.authenticated:
-                raise Exception(
-                    "signin before creating {0} service client".format(
-                        service))
+                state = self._client_states.pop(service, None)
+                if state:
+                    client._set_state(state)
 
-            self._clients[service] = klass(self)
+                self._clients[service] = client
 
         return self._clients[service]
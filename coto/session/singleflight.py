@@ -0,0 +1,78 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: while a call for a key is in
+    flight, callers with the same key wait for it and share its result or
+    exception instead of calling again.
+
+    Keys are tuples whose first item is the kind of call, eg., ``token``,
+    ``request`` or ``signin``, used to count the calls saved per kind.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        Call ``fn``, unless a call for ``key`` is in flight.
+
+        Args:
+            key (tuple): Identifies identical calls.
+            fn (callable): Makes the call.
+
+        Returns:
+            tuple: The result, and whether it is shared with another caller
+            who made the call.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(key[0], {'calls': 0, 'saved': 0})
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                stats['calls'] += 1
+                leader = True
+            else:
+                stats['saved'] += 1
+                leader = False
+
+        if leader:
+            try:
+                call.value = fn()
+                return call.value, False
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.value, True
+
+    def stats(self):
+        """
+        Returns:
+            dict: Calls made and calls saved by kind of call.
+
+            .. code-block:: python
+
+                {
+                    'token': {'calls': 1, 'saved': 7},
+                }
+        """
+        with self._lock:
+            return {kind: dict(stats) for kind, stats in self._stats.items()}
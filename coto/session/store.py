@@ -0,0 +1,260 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class MemoryStore:
+    """
+    Session store keeping entries in process memory.
+
+    Entries are lost when the process exits, use :py:class:`FileStore` or
+    :py:class:`SqliteStore` to resume sessions across processes.
+    """
+
+    def __init__(self, maxsize=None):
+        """
+        Args:
+            maxsize (int): Maximum number of entries, the least recently
+                used are evicted, ``None`` for no limit.
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Args:
+            key (str): Entry key.
+
+        Returns:
+            dict: The stored value, or ``None`` if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires, value = entry
+            if expires is not None and expires <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return json.loads(value)
+
+    def put(self, key, value, ttl=None):
+        """
+        Args:
+            key (str): Entry key.
+            value (dict): JSON serializable value.
+            ttl (float): Seconds until the entry expires, ``None`` to never
+                expire.
+        """
+        expires = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, json.dumps(value))
+            self._entries.move_to_end(key)
+            while self.maxsize is not None and len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """
+        Args:
+            key (str): Entry key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class FileStore:
+    """
+    Session store keeping one JSON file per entry in a directory.
+
+    Files are created readable by the owner only, as they contain console
+    session cookies.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory (str): Directory to keep the entries in, created if it
+                does not exist.
+        """
+        self.directory = directory
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, name + '.json')
+
+    def get(self, key):
+        """
+        Args:
+            key (str): Entry key.
+
+        Returns:
+            dict: The stored value, or ``None`` if missing or expired.
+        """
+        path = self._path(key)
+        try:
+            with open(path) as fp:
+                entry = json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+        if entry['expires'] is not None and entry['expires'] <= time.time():
+            self.delete(key)
+            return None
+
+        return entry['value']
+
+    def put(self, key, value, ttl=None):
+        """
+        Args:
+            key (str): Entry key.
+            value (dict): JSON serializable value.
+            ttl (float): Seconds until the entry expires, ``None`` to never
+                expire.
+        """
+        entry = {
+            'expires': time.time() + ttl if ttl is not None else None,
+            'value': value,
+        }
+
+        # write to a temporary file first, so readers never see partial data
+        path = self._path(key)
+        tmp = "{0}.{1}.tmp".format(path, os.getpid())
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as fp:
+            json.dump(entry, fp)
+        os.replace(tmp, path)
+
+    def delete(self, key):
+        """
+        Args:
+            key (str): Entry key.
+        """
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class SqliteConnections:
+    """
+    Connections to a SQLite database, one per thread as sqlite connections
+    can not be shared between threads.
+    """
+
+    def __init__(self, path, **kwargs):
+        """
+        Args:
+            path (str): Path of the database file.
+            kwargs: Arguments of ``sqlite3.connect``.
+
+        Raises:
+            ValueError: ``path`` is ``:memory:``, every thread would get
+                its own empty database.
+        """
+        if path == ':memory:':
+            raise ValueError("in-memory databases are per thread")
+
+        self.path = path
+        self._kwargs = kwargs
+        self._local = threading.local()
+
+    def get(self):
+        """
+        Returns:
+            sqlite3.Connection: The connection of the current thread.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            import sqlite3
+
+            conn = sqlite3.connect(self.path, **self._kwargs)
+            self._local.conn = conn
+        return conn
+
+
+class SqliteStore:
+    """
+    Session store keeping entries in a SQLite database, which can be shared
+    by multiple processes.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the database file, created if it does not
+                exist.
+
+        Raises:
+            ValueError: ``path`` is ``:memory:``, every thread would get
+                its own empty database, use a :py:class:`MemoryStore`.
+        """
+        self.path = path
+        self._connections = SqliteConnections(path, timeout=30)
+
+        # the database contains console session cookies, readable by the
+        # owner only like the files of a FileStore
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0o600))
+
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)")
+
+    def _connection(self):
+        return self._connections.get()
+
+    def get(self, key):
+        """
+        Args:
+            key (str): Entry key.
+
+        Returns:
+            dict: The stored value, or ``None`` if missing or expired.
+        """
+        row = self._connection().execute(
+            "SELECT value, expires FROM entries WHERE key = ?",
+            (key, )).fetchone()
+
+        if row is None:
+            return None
+
+        value, expires = row
+        if expires is not None and expires <= time.time():
+            self.delete(key)
+            return None
+
+        return json.loads(value)
+
+    def put(self, key, value, ttl=None):
+        """
+        Args:
+            key (str): Entry key.
+            value (dict): JSON serializable value.
+            ttl (float): Seconds until the entry expires, ``None`` to never
+                expire.
+        """
+        expires = time.time() + ttl if ttl is not None else None
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires) "
+                "VALUES (?, ?, ?)", (key, json.dumps(value), expires))
+
+    def delete(self, key):
+        """
+        Args:
+            key (str): Entry key.
+        """
+        with self._connection() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key, ))
@@ -0,0 +1,286 @@
+from collections import OrderedDict
+import contextlib
+import hashlib
+import threading
+import time
+from .singleflight import SingleFlight
+
+
+class TokenManager:
+    """
+    Caches the xsrf tokens of the service clients of a session.
+
+    Every token has a time to live. A token served in the last part of its
+    life is refreshed in the background, so callers rarely wait for a token
+    page to be fetched.
+    """
+
+    def __init__(
+        self, ttl=900, refresh_ahead=0.2, background=True, single_flight=None
+    ):
+        """
+        Args:
+            ttl (float): Default seconds a token is valid.
+            refresh_ahead (float): Fraction of the time to live before expiry
+                in which a token is refreshed in the background.
+            background (bool): Refresh tokens in a background thread.
+            single_flight (coto.session.singleflight.SingleFlight): Counts
+                the token fetches saved by concurrent callers waiting for
+                one fetch, defaults to a new one.
+        """
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.background = background
+        self._tokens = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self._rotation_locks = {}
+        self._flight = SingleFlight() if single_flight is None else single_flight
+
+    def _fetch_lock(self, name):
+        with self._lock:
+            if name not in self._fetch_locks:
+                self._fetch_locks[name] = threading.Lock()
+            return self._fetch_locks[name]
+
+    def _valid(self, name, now):
+        entry = self._tokens.get(name)
+        if entry is not None and entry[1] > now:
+            return entry
+        return None
+
+    def get(self, name, fetch, ttl=None):
+        """
+        Get a token, fetching it when missing or expired.
+
+        Args:
+            name (str): Token name, eg., ``iam``.
+            fetch (callable): Returns a new token, or ``None`` if no token
+                could be obtained.
+            ttl (float): Seconds a fetched token is valid, defaults to the
+                manager default.
+
+        Returns:
+            str: Token.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+
+        with self._lock:
+            entry = self._valid(name, now)
+
+        if entry is None:
+            # only one thread fetches a token, the others share it
+            value, _ = self._flight.do(
+                ('token', name), lambda: self._fetch(name, fetch, ttl))
+            return value
+
+        value, expires = entry
+        if self.background and expires - now < ttl * self.refresh_ahead:
+            self._refresh(name, fetch, ttl)
+
+        return value
+
+    def _fetch(self, name, fetch, ttl):
+        # the lock orders the fetch after a background refresh in progress
+        with self._fetch_lock(name):
+            with self._lock:
+                entry = self._valid(name, time.time())
+            if entry is not None:
+                return entry[0]
+
+            value = fetch()
+            self.set(name, value, ttl)
+            return value
+
+    def _refresh(self, name, fetch, ttl):
+        with self._lock:
+            if name in self._refreshing:
+                return
+            self._refreshing.add(name)
+
+        def refresh():
+            try:
+                # a rotating token is not replaced while a request sends it
+                with self._rotation_lock(name), self._fetch_lock(name):
+                    self.set(name, fetch(), ttl)
+            except Exception:
+                # the token is fetched again when it expires
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(name)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def set(self, name, value, ttl=None):
+        """
+        Store a token, eg., one rotated by a response header.
+
+        Args:
+            name (str): Token name.
+            value (str): Token, ``None`` is not stored.
+            ttl (float): Seconds the token is valid.
+        """
+        if value is None:
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._tokens[name] = (value, time.time() + ttl)
+
+    def invalidate(self, name, value=None):
+        """
+        Drop a token, eg., after it was rejected.
+
+        Args:
+            name (str): Token name.
+            value (str): The rejected token. When given, the token is only
+                dropped if it was not replaced in the meantime, eg., by
+                another thread.
+        """
+        with self._lock:
+            entry = self._tokens.get(name)
+            if entry is not None and (value is None or entry[0] == value):
+                del self._tokens[name]
+
+    def _rotation_lock(self, name):
+        with self._lock:
+            lock = self._rotation_locks.get(name)
+        return contextlib.nullcontext() if lock is None else lock
+
+    def rotation(self, name):
+        """
+        Lock held while sending a request with a token the response rotates,
+        so concurrent requests never send a token that was already replaced.
+        Requests with the token are sent one at a time, and background
+        refreshes of the token wait for the lock too.
+
+        .. code-block:: python
+
+            with tokens.rotation('iam'):
+                r = send(tokens.get('iam', fetch))
+                tokens.set('iam', r.headers['X-CSRF-Token'])
+
+        Args:
+            name (str): Token name.
+
+        Returns:
+            threading.RLock: The lock of the token.
+        """
+        with self._lock:
+            if name not in self._rotation_locks:
+                self._rotation_locks[name] = threading.RLock()
+            return self._rotation_locks[name]
+
+    def clear(self):
+        """
+        Drop all tokens.
+        """
+        with self._lock:
+            self._tokens = {}
+
+    def dump(self):
+        """
+        Returns:
+            dict: The valid tokens, to save in a session store.
+        """
+        now = time.time()
+        with self._lock:
+            return {
+                name: {'value': value, 'expires': expires}
+                for name, (value, expires) in self._tokens.items()
+                if expires > now
+            }
+
+    def load(self, tokens):
+        """
+        Args:
+            tokens (dict): Tokens as returned by :py:meth:`dump`.
+        """
+        with self._lock:
+            for name, token in tokens.items():
+                self._tokens[name] = (token['value'], token['expires'])
+
+
+class SigninTokenCache:
+    """
+    Caches federation signin tokens and urls by the credentials they were
+    minted for, see :py:meth:`coto.clients.federation.Client.get_signin_url`.
+
+    Entries expire before the signin token does, or when the credentials
+    expire if that is earlier. The least recently used entries are evicted
+    when the cache is full. Share one cache between sessions to reuse tokens
+    across them.
+
+    .. code-block:: python
+
+        from coto.session.tokens import SigninTokenCache
+
+        cache = SigninTokenCache(maxsize=10000)
+        federation = coto.Session(signin_token_cache=cache).client('federation')
+        url = federation.get_signin_url(boto3_session)
+    """
+
+    def __init__(self, maxsize=1024, ttl=840):
+        """
+        Args:
+            maxsize (int): Maximum number of cached tokens.
+            ttl (float): Seconds a token is cached, signin tokens are valid
+                for 15 minutes (default 14 minutes).
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(credentials):
+        """
+        Cache key of credentials, a digest of the access key and the session
+        token.
+        """
+        return hashlib.sha256("{0}\0{1}".format(
+            credentials.access_key, credentials.token or '').encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Returns:
+            dict: ``token`` and ``url`` of the key, ``None`` when missing or
+            expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, expires=None):
+        """
+        Args:
+            key (str): Key from :py:meth:`key`.
+            value (dict): ``token`` and ``url``.
+            expires (float): Epoch time the credentials expire, if known.
+        """
+        until = time.time() + self.ttl
+        if expires is not None:
+            until = min(until, expires)
+
+        with self._lock:
+            self._entries[key] = (value, until)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,108 @@
+from email.utils import parsedate_to_datetime
+import hashlib
+import threading
+import time
+
+
+class TotpAllocator:
+    """
+    Issues mfa codes that are never issued twice for the same secret.
+
+    AWS rejects a code that was used before, eg., by a concurrent signin to
+    the same root user or by a quick retry. When the code of the current
+    time window was already issued, the allocator waits for the next window
+    and issues its code.
+
+    The windows follow the clock of the server, the skew of the local clock
+    is measured from the ``Date`` header of responses.
+
+    Sessions share a process wide allocator by default, pass one to
+    :py:class:`coto.Session` to use another.
+    """
+
+    def __init__(self, interval=30, sample_interval=60, smoothing=0.3):
+        """
+        Args:
+            interval (int): Seconds a code is valid.
+            sample_interval (float): Seconds between clock skew samples.
+            smoothing (float): Weight of the latest clock skew sample.
+        """
+        self.interval = interval
+        self.sample_interval = sample_interval
+        self.smoothing = smoothing
+        self.skew = 0.0
+        self._sampled = None
+        self._issued = {}
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    def _secret_lock(self, key):
+        with self._lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def now(self):
+        """
+        Returns:
+            float: Estimated epoch time of the server.
+        """
+        return time.time() + self.skew
+
+    def wants_sample(self):
+        """
+        Returns:
+            bool: Whether a new clock skew sample is due.
+        """
+        return self._sampled is None or \
+            time.monotonic() - self._sampled >= self.sample_interval
+
+    def observe(self, date):
+        """
+        Update the clock skew from the ``Date`` header of a response.
+
+        Args:
+            date (str): Value of the ``Date`` header.
+        """
+        try:
+            server = parsedate_to_datetime(date).timestamp()
+        except (TypeError, ValueError):
+            return
+
+        # the header has a resolution of a second, assume the middle of it
+        sample = server + 0.5 - time.time()
+        with self._lock:
+            if self._sampled is None:
+                self.skew = sample
+            else:
+                self.skew += self.smoothing * (sample - self.skew)
+            self._sampled = time.monotonic()
+
+    def code(self, secret):
+        """
+        Issue a code for a secret.
+
+        Args:
+            secret (str): Base32 mfa secret.
+
+        Returns:
+            str: Code that was not issued before.
+        """
+        from pyotp import TOTP
+
+        key = hashlib.sha256(secret.encode()).hexdigest()
+        with self._secret_lock(key):
+            counter = int(self.now() // self.interval)
+            last = self._issued.get(key)
+
+            if last is not None and counter <= last:
+                counter = last + 1
+                delay = counter * self.interval - self.now()
+                if delay > 0:
+                    time.sleep(delay)
+
+            self._issued[key] = counter
+            return TOTP(secret, interval=self.interval).generate_otp(counter)
+
+
+default_allocator = TotpAllocator()
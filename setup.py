@@ -13,7 +13,7 @@ setup(
     author_email = "info@sentia.com",
     license = "Apache",
     version = "0.4.2",
-    packages = find_packages(),
+    packages = find_packages(exclude=["benchmarks", "benchmarks.*"]),
     install_requires = [
         'ansicolors==1.1.8',
         'appdirs==1.4.4',
@@ -35,6 +35,11 @@ setup(
         'urllib3==1.26.3',
         'Pillow==8.4.0',
     ],
+    extras_require = {
+        'lxml': ['lxml'],
+        'opentelemetry': ['opentelemetry-api'],
+        'orjson': ['orjson'],
+    },
     classifiers=[
         # How mature is this project? Common values are
         #   3 - Alpha
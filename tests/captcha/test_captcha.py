@@ -0,0 +1,102 @@
+import threading
+import time
+from tests import BaseTestCase
+from tests.fake_console import ConsoleTestCase
+from coto import captcha, exceptions
+
+
+class LegacySolver:
+    def __init__(self, guess, polls=2):
+        self.guess = guess
+        self.polls = polls
+        self.wrong = []
+
+    def solve(self, base64=None, url=None):
+        return 'job-1'
+
+    def result(self, job_id):
+        self.polls -= 1
+        return self.guess if self.polls < 0 else None
+
+    def incorrect(self, job_id):
+        self.wrong.append(job_id)
+
+
+class DelayedSolver(captcha.Solver):
+    """
+    Answers every captcha from another thread after a delay.
+    """
+
+    def __init__(self, guess, delay):
+        self.guess = guess
+        self.delay = delay
+        self.jobs = []
+
+    def submit(self, base64=None, url=None, deadline=None):
+        job = captcha.CaptchaJob('job')
+        self.jobs.append(job)
+
+        def answer():
+            if not job.cancel_requested():
+                job.set_result(self.guess)
+
+        threading.Timer(self.delay, answer).start()
+        return job
+
+
+class TestPollingSolver(BaseTestCase):
+
+    def test_adapter(self):
+        legacy = LegacySolver('abc')
+        solver = captcha.solver(legacy)
+        self.assertIsInstance(solver, captcha.PollingSolver)
+        solver.interval = 0.01
+
+        job = captcha.guess(solver, url='https://example.com/captcha')
+        self.assertEqual('abc', job.result())
+        self.assertEqual('job-1', job.job_id)
+
+        solver.incorrect(job.job_id)
+        self.assertEqual(['job-1'], legacy.wrong)
+
+    def test_native(self):
+        solver = DelayedSolver('abc', 0)
+        self.assertIs(solver, captcha.solver(solver))
+
+    def test_timeout(self):
+        solver = DelayedSolver('abc', 0.2)
+        with self.assertRaises(exceptions.DeadlineExceeded):
+            captcha.guess(solver, url='https://example.com/captcha', timeout=0.05)
+        # the solver stops working on the guess
+        self.assertTrue(solver.jobs[0].cancel_requested())
+
+    def test_deadline(self):
+        solver = captcha.PollingSolver(LegacySolver('abc', polls=100), interval=0.01)
+        job = solver.submit(url='https://example.com/captcha', deadline=time.time() + 0.05)
+        with self.assertRaises(exceptions.DeadlineExceeded):
+            job.result(timeout=1)
+
+    def test_cancel_running(self):
+        legacy = LegacySolver('abc', polls=1000)
+        solver = captcha.PollingSolver(legacy, interval=0.01, max_interval=0.01)
+        job = solver.submit(url='https://example.com/captcha')
+        time.sleep(0.05)
+
+        job.cancel()
+        with self.assertRaises(captcha.CancelledError):
+            job.result(timeout=1)
+        polls = legacy.polls
+        time.sleep(0.05)
+        self.assertEqual(polls, legacy.polls)
+
+
+class TestCaptchaSignin(ConsoleTestCase):
+
+    def test_resume_on_answer(self):
+        self.console.require_captcha('resolveAccountType')
+        solver = DelayedSolver(self.console.CAPTCHA_ANSWER, 0.2)
+
+        start = time.time()
+        session = self.root_session(captcha_solver=solver)
+        self.assertTrue(session.authenticated)
+        self.assertLess(time.time() - start, 1)
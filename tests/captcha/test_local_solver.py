@@ -0,0 +1,82 @@
+import os
+import tempfile
+from tests import mock, BaseTestCase
+from tests import fake_captcha
+from coto import captcha
+from coto.captcha.local_solver import GlyphModel, LocalSolver, load_image
+
+
+class TestLocalSolver(BaseTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model = GlyphModel()
+        cls.model.train(
+            (load_image(data=data), text)
+            for data, text in fake_captcha.samples(40, seed=1))
+
+    def test_solve(self):
+        solver = LocalSolver(self.model)
+        data, text = fake_captcha.samples(1, seed=2)[0]
+
+        job_id = solver.solve(base64=fake_captcha.to_base64(data))
+        self.assertEqual(text, solver.result(job_id))
+        self.assertGreater(solver.confidence(job_id), 0.5)
+
+        solver.incorrect(job_id)
+        self.assertIn(job_id, solver.wrong)
+
+    def test_animated_gif(self):
+        solver = LocalSolver(self.model)
+        data, text = fake_captcha.samples(1, seed=3, frames=3)[0]
+
+        job = captcha.guess(
+            solver, base64=fake_captcha.to_base64(data, 'gif'), timeout=5)
+        self.assertEqual(text, job.result())
+        self.assertGreater(job.confidence, 0.5)
+
+    def test_batch(self):
+        solver = LocalSolver(self.model)
+        samples = fake_captcha.samples(5, seed=4)
+
+        results = solver.recognize_batch(
+            [load_image(data=data) for data, _ in samples])
+        self.assertEqual(
+            [text for _, text in samples], [guess for guess, _ in results])
+
+    def test_min_confidence(self):
+        solver = LocalSolver(self.model, min_confidence=1.1)
+        data, _ = fake_captcha.samples(1, seed=2)[0]
+
+        with self.assertRaises(Exception):
+            captcha.guess(solver, base64=fake_captcha.to_base64(data), timeout=5)
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.json')
+            self.model.save(path)
+            solver = LocalSolver(path)
+
+        self.assertEqual(self.model.templates, solver.model.templates)
+
+    def test_bounded(self):
+        solver = LocalSolver(self.model, max_jobs=2)
+        data, _ = fake_captcha.samples(1, seed=2)[0]
+
+        job_ids = [solver.solve(base64=fake_captcha.to_base64(data)) for _ in range(3)]
+        for job_id in job_ids:
+            solver.incorrect(job_id)
+        self.assertEqual(job_ids[1:], list(solver.jobs))
+        self.assertEqual(job_ids[1:], list(solver.wrong))
+
+    def test_url(self):
+        solver = LocalSolver(self.model, timeout=3, verify='/etc/ca.pem')
+        data, text = fake_captcha.samples(1, seed=2)[0]
+
+        with mock.patch('coto.captcha.local_solver.requests.get') as get:
+            get.return_value.content = data
+            job_id = solver.solve(url='https://example.com/captcha')
+
+        get.assert_called_once_with(
+            'https://example.com/captcha', timeout=3, verify='/etc/ca.pem')
+        self.assertEqual(text, solver.result(job_id))
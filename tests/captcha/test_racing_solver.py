@@ -0,0 +1,111 @@
+import threading
+import time
+from tests import mock, BaseTestCase
+from coto import captcha
+from coto.captcha.racing_solver import RacingSolver
+
+
+class RelaySolver(captcha.Solver):
+    """
+    Answers from another thread after a delay, like a chat relay.
+    """
+
+    def __init__(self, guess, delay):
+        self.guess = guess
+        self.delay = delay
+        self.submitted = 0
+        self.wrong = []
+
+    def _answer(self, job):
+        if job.set_running_or_notify_cancel():
+            job.set_result(self.guess)
+
+    def submit(self, base64=None, url=None, deadline=None):
+        self.submitted += 1
+        job = captcha.CaptchaJob('relay-{0}'.format(self.submitted))
+        threading.Timer(self.delay, self._answer, [job]).start()
+        return job
+
+    def incorrect(self, job_id):
+        self.wrong.append(job_id)
+
+
+class TestRacingSolver(BaseTestCase):
+
+    def test_first_guess_wins(self):
+        fast = RelaySolver('fast', 0)
+        slow = RelaySolver('slow', 0.2)
+        solver = RacingSolver({'fast': fast, 'slow': slow})
+
+        job = captcha.guess(solver, url='https://example.com/captcha', timeout=1)
+        self.assertEqual('fast', job.result())
+        self.assertEqual(1, slow.submitted)
+
+        solver.incorrect(job.job_id)
+        self.assertEqual(['relay-1'], fast.wrong)
+        self.assertEqual(1, solver.stats()['fast']['incorrect'])
+        self.assertEqual(0.0, solver.stats()['fast']['accuracy'])
+
+    def test_routes_to_accurate_backend(self):
+        wrong = RelaySolver('wrong', 0)
+        right = RelaySolver('right', 0.02)
+        solver = RacingSolver({'wrong': wrong, 'right': right}, min_samples=1)
+
+        job = captcha.guess(solver, url='https://example.com/captcha', timeout=1)
+        self.assertEqual('wrong', job.result())
+        solver.incorrect(job.job_id)
+
+        job = captcha.guess(solver, url='https://example.com/captcha', timeout=1)
+        self.assertEqual('right', job.result())
+        self.assertEqual(1, wrong.submitted)
+
+    def test_fanout(self):
+        backends = {str(i): RelaySolver(str(i), 0.01 * i) for i in range(3)}
+        solver = RacingSolver(backends, fanout=1, min_samples=1)
+
+        for _ in range(3):
+            job = captcha.guess(solver, url='https://example.com/captcha', timeout=1)
+            self.assertEqual('0', job.result())
+
+        self.assertEqual(3, backends['0'].submitted)
+        self.assertEqual(1, backends['2'].submitted)
+        self.assertEqual(3, solver.stats()['0']['wins'])
+
+    def test_routes_to_fastest_by_default(self):
+        fast = RelaySolver('fast', 0)
+        slow = RelaySolver('slow', 0.05)
+        solver = RacingSolver({'slow': slow, 'fast': fast})
+
+        for _ in range(6):
+            job = captcha.guess(solver, url='https://example.com/captcha', timeout=1)
+            self.assertEqual('fast', job.result())
+
+        # raced until measured, then no longer submitted to
+        self.assertEqual(3, slow.submitted)
+        self.assertEqual(6, fast.submitted)
+
+    def test_all_fail(self):
+        failing = mock.Mock(spec=['solve', 'result', 'incorrect'])
+        failing.solve.side_effect = Exception("backend down")
+        solver = RacingSolver([failing])
+
+        with self.assertRaises(Exception):
+            captcha.guess(solver, url='https://example.com/captcha', timeout=1)
+
+    def test_polled_loser_stops(self):
+        fast = mock.Mock(spec=['solve', 'result', 'incorrect'])
+        fast.solve.return_value = 'f-1'
+        fast.result.return_value = 'fast'
+        never = mock.Mock(spec=['solve', 'result', 'incorrect'])
+        never.solve.return_value = 'n-1'
+        never.result.return_value = None
+        solver = RacingSolver({'fast': fast, 'never': never})
+
+        job = captcha.guess(solver, url='https://example.com/captcha', timeout=1)
+        self.assertEqual('fast', job.result())
+        # the loser counts as slow as the winner and stops polling
+        self.assertEqual(1, solver.stats()['never']['samples'])
+        time.sleep(0.3)
+        polls = never.result.call_count
+        time.sleep(0.3)
+        self.assertEqual(polls, never.result.call_count)
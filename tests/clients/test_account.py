@@ -0,0 +1,10 @@
+from tests.fake_console import ConsoleTestCase
+
+
+class TestAccount(ConsoleTestCase):
+
+    def test_account_name(self):
+        account = self.root_session().client('account')
+        self.assertEqual('root', account.get_account_info()['accountName'])
+        account.update_account_name('renamed')
+        self.assertEqual('renamed', account.get_account_info()['accountName'])
@@ -0,0 +1,16 @@
+from tests.fake_console import ConsoleTestCase
+
+
+class TestBilling(ConsoleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.billing = self.root_session().client('billing')
+
+    def test_alternate_contacts(self):
+        contacts = [{'contactType': 'billing', 'email': 'billing@example.com'}]
+        self.billing.set_alternate_contacts(contacts)
+        self.assertEqual(contacts, self.billing.list_alternate_contacts())
+
+    def test_account_status(self):
+        self.assertEqual('ACTIVE', self.billing.account_status())
@@ -0,0 +1,83 @@
+import datetime
+from tests import BaseTestCase
+from tests.fake_console import ConsoleTestCase
+from coto.session.tokens import SigninTokenCache
+
+
+class FakeCredentials:
+    secret_key = 'secret'
+
+    def __init__(self, access_key='ASIAEXAMPLE', token='token', expiry=None):
+        self.access_key = access_key
+        self.token = token
+        if expiry is not None:
+            self._expiry_time = expiry
+
+
+class FakeBoto3Session:
+    def __init__(self, **kwargs):
+        self.credentials = FakeCredentials(**kwargs)
+
+    def get_credentials(self):
+        return self.credentials
+
+
+class TestFederation(ConsoleTestCase):
+
+    def federation_requests(self):
+        return len([r for r in self.console.requests if r[2] == '/federation'])
+
+    def test_cached_url(self):
+        client = self.console.session().client('federation')
+
+        url = client.get_signin_url(FakeBoto3Session())
+        self.assertEqual(url, client.get_signin_url(FakeBoto3Session()))
+        self.assertEqual(1, self.federation_requests())
+
+        client.get_signin_url(FakeBoto3Session(token='other'))
+        self.assertEqual(2, self.federation_requests())
+
+    def test_shared_cache(self):
+        cache = SigninTokenCache()
+        for _ in range(2):
+            session = self.console.session(
+                boto3_session=FakeBoto3Session(), signin_token_cache=cache)
+            self.assertTrue(session.authenticated)
+
+        # one token request, two logins
+        self.assertEqual(3, self.federation_requests())
+
+    def test_expired_credentials(self):
+        expiry = datetime.datetime.now(datetime.timezone.utc)
+        client = self.console.session().client('federation')
+
+        client.get_signin_token(FakeBoto3Session(expiry=expiry))
+        client.get_signin_token(FakeBoto3Session(expiry=expiry))
+        self.assertEqual(2, self.federation_requests())
+
+    def test_batch(self):
+        client = self.console.session().client('federation')
+        sessions = {
+            str(i): FakeBoto3Session(access_key='ASIA{0}'.format(i))
+            for i in range(5)}
+
+        urls = client.get_signin_urls(sessions, max_workers=5)
+        self.assertEqual(sorted(sessions), sorted(urls))
+        self.assertEqual(5, len(set(urls.values())))
+        self.assertEqual(
+            [urls['0'], urls['1']],
+            client.get_signin_urls([sessions['0'], sessions['1']]))
+
+
+class TestSigninTokenCache(BaseTestCase):
+
+    def test_lru(self):
+        cache = SigninTokenCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual(1, cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(2, len(cache))
@@ -0,0 +1,33 @@
+from tests.fake_console import ConsoleTestCase
+
+
+class TestIam(ConsoleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.iam = self.root_session().client('iam')
+
+    def test_get_account_info(self):
+        self.assertIn('summaryMap', self.iam.get_account_info())
+
+    def test_root_access_keys(self):
+        key = self.iam.create_root_access_key()
+        self.assertEqual('Active', key['status'])
+
+        self.assertTrue(self.iam.update_root_access_key(key['id']))
+        keys = self.iam.list_root_access_keys()
+        self.assertEqual(['Inactive'], [k['status'] for k in keys])
+
+        self.assertTrue(self.iam.delete_root_access_key(key['id']))
+        self.assertEqual([], self.iam.list_root_access_keys())
+        self.assertEqual(1, len(self.iam.list_root_access_keys(Deleted=True)))
+
+    def test_rejected_token(self):
+        self.iam.get_account_info()
+        self.iam.session()._tokens.set('iam', 'stale')
+        self.assertIn('summaryMap', self.iam.get_account_info())
+
+    def test_failure(self):
+        self.console.inject_error('/iam/service/account', status=500)
+        with self.assertRaises(Exception):
+            self.iam.get_account_info()
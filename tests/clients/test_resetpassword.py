@@ -0,0 +1,35 @@
+from io import BytesIO
+import base64
+from tests import fake_captcha
+from tests.fake_console import ConsoleTestCase
+
+
+class TestResetPassword(ConsoleTestCase):
+
+    def decode(self, url):
+        from PIL import Image
+
+        header, data = url.split(',', 1)
+        return header, Image.open(BytesIO(base64.b64decode(data)))
+
+    def test_process_gif(self):
+        from PIL import Image
+
+        client = self.console.session().client('resetpassword')
+        data = fake_captcha.render('abc', frames=13)
+
+        url = client.process_image(Image.open(BytesIO(data)))
+        header, image = self.decode(url)
+        self.assertEqual('data:image/gif;base64', header)
+        # frames 0, 6 and 12
+        self.assertEqual(3, image.n_frames)
+
+    def test_process_png(self):
+        from PIL import Image
+
+        client = self.console.session().client('resetpassword')
+        data = fake_captcha.render('abc')
+
+        header, image = self.decode(client.process_image(Image.open(BytesIO(data))))
+        self.assertEqual('data:image/png;base64', header)
+        self.assertEqual((80, 44), image.size)
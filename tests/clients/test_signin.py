@@ -0,0 +1,92 @@
+from tests.fake_console import ConsoleTestCase
+
+
+class FakeCredentials:
+    access_key = 'ASIAEXAMPLE'
+    secret_key = 'secret'
+    token = 'token'
+
+
+class FakeBoto3Session:
+    def get_credentials(self):
+        return FakeCredentials()
+
+
+class FakeSolver:
+    def __init__(self, guess):
+        self.guess = guess
+        self.solved = []
+
+    def solve(self, base64=None, url=None):
+        self.solved.append(url)
+        return len(self.solved)
+
+    def result(self, job_id):
+        return self.guess
+
+    def incorrect(self, job_id):
+        pass
+
+
+class TestSignin(ConsoleTestCase):
+
+    def test_decoupled(self):
+        session = self.root_session()
+        self.assertTrue(session.authenticated)
+        self.assertTrue(session.root)
+
+    def test_decoupled_mfa(self):
+        self.account.mfa_secret = self.MFA_SECRET
+        session = self.root_session(mfa_secret=self.MFA_SECRET)
+        self.assertTrue(session.authenticated)
+
+    def test_decoupled_mfa_missing(self):
+        self.account.mfa_secret = self.MFA_SECRET
+        with self.assertRaises(Exception):
+            self.root_session()
+
+    def test_wrong_password(self):
+        with self.assertRaises(Exception):
+            self.console.session(email='root@example.com', password='wrong')
+
+    def test_coupled(self):
+        self.account.account_type = 'Coupled'
+        self.account.mfa_secret = self.MFA_SECRET
+        session = self.root_session(mfa_secret=self.MFA_SECRET)
+        self.assertTrue(session.authenticated)
+
+    def test_captcha(self):
+        solver = FakeSolver(self.console.CAPTCHA_ANSWER)
+        self.console.require_captcha('resolveAccountType')
+
+        session = self.root_session(captcha_solver=solver)
+        self.assertTrue(session.authenticated)
+        self.assertEqual(1, len(solver.solved))
+
+    def test_federation(self):
+        session = self.console.session(boto3_session=FakeBoto3Session())
+        self.assertTrue(session.authenticated)
+        self.assertFalse(session.root)
+
+    def test_pipelined(self):
+        self.console.latency = 0.1
+
+        in_flight = {}
+        for pipeline in (True, False):
+            session = self.console.session()
+            self.console.reset_requests()
+            session.client('signin').signin(
+                'root@example.com', self.PASSWORD, pipeline=pipeline)
+            in_flight[pipeline] = self.console.max_in_flight
+            self.assertTrue(session.authenticated)
+
+        # the mfa lookup overlaps with resolving the account type
+        self.assertEqual({True: 2, False: 1}, in_flight)
+
+    def test_known_answers(self):
+        session = self.root_session()
+        self.console.reset_requests()
+
+        session.client('signin').signin('root@example.com', self.PASSWORD)
+        self.assertEqual([('POST', '/signin')], [
+            (method, route) for method, host, route in self.console.requests])
@@ -0,0 +1,13 @@
+from tests.fake_console import ConsoleTestCase
+
+
+class TestSupport(ConsoleTestCase):
+
+    def test_support_level(self):
+        support = self.root_session().client('support')
+        self.assertEqual(
+            {'supportLevel': 'basic', 'canChange': True},
+            support.get_support_level())
+        self.assertEqual(
+            {'supportLevel': 'business'},
+            support.update_support_level('business'))
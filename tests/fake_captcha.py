@@ -0,0 +1,77 @@
+"""
+Synthetic captchas for the local captcha solver tests and benchmark.
+"""
+from io import BytesIO
+import base64
+import random
+import string
+
+ALPHABET = string.ascii_lowercase + string.digits
+
+
+def _font():
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.load_default(size=24)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def render(text, frames=1, noise=20, seed=None):
+    """
+    Render a captcha, dark characters on a light background with noise
+    pixels. With ``frames`` > 1 an animated GIF is returned in which every
+    character is only visible in some of the frames.
+
+    Returns:
+        bytes: PNG or GIF image.
+    """
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    font = _font()
+    size = (20 * len(text) + 20, 44)
+    offsets = [(10 + 20 * i + rng.randint(0, 2), rng.randint(2, 8))
+               for i in range(len(text))]
+
+    images = []
+    for frame in range(frames):
+        image = Image.new('L', size, 235)
+        draw = ImageDraw.Draw(image)
+        for i, (char, xy) in enumerate(zip(text, offsets)):
+            if i % frames == frame:
+                draw.text(xy, char, fill=rng.randint(0, 60), font=font)
+        for _ in range(noise):
+            xy = (rng.randrange(size[0]), rng.randrange(size[1]))
+            image.putpixel(xy, rng.randint(150, 200))
+        images.append(image)
+
+    buffered = BytesIO()
+    if frames == 1:
+        images[0].save(buffered, format='png')
+    else:
+        images[0].save(
+            buffered, format='gif', save_all=True,
+            append_images=images[1:], duration=250, loop=0)
+    return buffered.getvalue()
+
+
+def to_base64(data, fmt='png'):
+    return "data:image/{0};base64,{1}".format(
+        fmt, base64.b64encode(data).decode())
+
+
+def samples(count, length=6, seed=0, **kwargs):
+    """
+    Labelled captchas.
+
+    Returns:
+        list: ``(image bytes, text)`` tuples.
+    """
+    rng = random.Random(seed)
+    result = []
+    for i in range(count):
+        text = ''.join(rng.choice(ALPHABET) for _ in range(length))
+        result.append((render(text, seed=rng.random(), **kwargs), text))
+    return result
@@ -0,0 +1,720 @@
+"""
+A local stand-in for the AWS Management Console endpoints used by coto.
+
+.. code-block:: python
+
+    with FakeConsole(latency=0.01) as console:
+        console.add_account('root@example.com', 'password')
+        session = console.session(email='root@example.com', password='password')
+        session.client('iam').get_account_info()
+
+Requests for the real hosts are routed to the local server by a transport
+adapter, so the clients run unmodified. Latency, captchas and errors can be
+injected to measure and test the signin and client flows.
+"""
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, urlunsplit, parse_qs, quote
+import json
+import threading
+import time
+import unittest
+import uuid
+from pyotp import TOTP
+from requests.adapters import HTTPAdapter
+import coto
+from coto.metadata1.static_generator import StaticGenerator
+from coto.session.totp import TotpAllocator
+
+SIGNIN = 'signin.aws.amazon.com'
+CONSOLE = 'console.aws.amazon.com'
+AMAZON = 'www.amazon.com'
+CONSOLE_HOME = 'https://console.aws.amazon.com/console/home'
+AUTH_COOKIE = 'aws-creds'
+
+
+class FakeConsoleAdapter(HTTPAdapter):
+    """
+    Routes https requests for any host to the fake console server.
+    """
+
+    def __init__(self, address, **kwargs):
+        self._address = address
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        original = request.url
+        parts = urlsplit(original)
+
+        routed = request.copy()
+        routed.url = urlunsplit(
+            ('http', self._address, parts.path or '/', parts.query, ''))
+        routed.headers['Host'] = parts.netloc
+
+        r = super().send(routed, **kwargs)
+        r.url = original
+        r.request = request
+        return r
+
+
+class Account:
+    def __init__(self, email, password, mfa_secret, account_type):
+        self.email = email
+        self.password = password
+        self.mfa_secret = mfa_secret
+        self.account_type = account_type
+        self.name = email.split('@')[0]
+        self.used_codes = set()
+        self.access_keys = []
+        self.mfa_devices = []
+        self.alternate_contacts = []
+        self.tax_registrations = []
+        self.support_level = 'basic'
+        self.status = 'ACTIVE'
+
+
+class FakeConsole:
+    """
+    Local HTTP server emulating the signin, federation, IAM, billing, support
+    and Amazon signin endpoints.
+    """
+
+    CAPTCHA_ANSWER = 'c4ptch4'
+
+    def __init__(self, latency=0, reuse_codes=False):
+        """
+        Args:
+            latency (float): Seconds every request is delayed.
+            reuse_codes (bool): Accept an MFA code that was used before, as
+                needed to sign in to an account repeatedly in a benchmark.
+        """
+        self.latency = latency
+        self.reuse_codes = reuse_codes
+        self.accounts = {}
+        self.requests = []
+        # most requests handled at the same time since the last reset
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._csrf_tokens = set()
+        self._xsrf_tokens = {}
+        self._signin_tokens = {}
+        self._sessions = {}
+        self._captchas = {}
+        self._errors = []
+        # mfa codes used on this server, instead of the process wide history
+        self.totp = TotpAllocator()
+        self._server = None
+        self.add_account('federated@example.com', None, account_type='Federated')
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        console = self
+
+        class Handler(RequestHandler):
+            pass
+        Handler.console = console
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.address = '127.0.0.1:{0}'.format(self._server.server_port)
+        threading.Thread(
+            target=self._server.serve_forever, args=(0.05, ), daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # configuration
+    def add_account(self, email, password, mfa_secret=None, account_type='Decoupled'):
+        """
+        Args:
+            email (str): Root user email.
+            password (str): Root user password.
+            mfa_secret (str): Virtual MFA seed, ``None`` for no MFA.
+            account_type (str): ``Decoupled`` or ``Coupled``.
+
+        Returns:
+            Account: The account state.
+        """
+        account = Account(email, password, mfa_secret, account_type)
+        self.accounts[email.lower()] = account
+        return account
+
+    def require_captcha(self, action, times=1):
+        """
+        Require a captcha for the next ``times`` requests for an action, eg.,
+        ``resolveAccountType`` or ``ap_signin``.
+        """
+        with self._lock:
+            self._captchas[action] = self._captchas.get(action, 0) + times
+
+    def inject_error(self, path, status=503, times=1):
+        """
+        Fail the next ``times`` requests whose path starts with ``path``.
+        """
+        with self._lock:
+            self._errors.append([path, status, times])
+
+    def reset_requests(self):
+        with self._lock:
+            self.requests = []
+            self.max_in_flight = self._in_flight
+
+    def session(self, **kwargs):
+        """
+        Create a :py:class:`coto.Session` routed to this server. Signin
+        arguments are passed after the routing is in place.
+        """
+        signin = {}
+        for key in ['email', 'password', 'mfa_secret', 'boto3_session']:
+            if key in kwargs:
+                signin[key] = kwargs.pop(key)
+
+        kwargs.setdefault(
+            'metadata1_generator', StaticGenerator('m1'))
+        kwargs.setdefault(
+            'totp_allocator',
+            TotpAllocator() if self.reuse_codes else self.totp)
+        session = coto.Session(**kwargs)
+        self.route(session)
+
+        if signin:
+            session.signin(**signin)
+        return session
+
+    def route(self, session):
+        """
+        Route the requests of an existing session to this server.
+        """
+        adapter = session.session.get_adapter('https://')
+        session.session.mount('https://', FakeConsoleAdapter(
+            self.address,
+            pool_connections=adapter._pool_connections,
+            pool_maxsize=adapter._pool_maxsize,
+            pool_block=adapter._pool_block,
+            max_retries=adapter.max_retries,
+        ))
+
+    # state helpers
+    def _take(self, counters, key):
+        with self._lock:
+            if counters.get(key, 0) > 0:
+                counters[key] -= 1
+                return True
+            return False
+
+    def _error_for(self, path):
+        with self._lock:
+            for error in self._errors:
+                if path.startswith(error[0]) and error[2] > 0:
+                    error[2] -= 1
+                    return error[1]
+        return None
+
+    def _new_session(self, account):
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[token] = account
+        return token
+
+    def _check_code(self, account, code):
+        if not code or not TOTP(account.mfa_secret).verify(code, valid_window=1):
+            return False
+
+        # codes can not be used twice
+        with self._lock:
+            if code in account.used_codes and not self.reuse_codes:
+                return False
+            account.used_codes.add(code)
+        return True
+
+
+def _signin_page(csrf, session_id):
+    return (
+        "<html><head>"
+        "<meta name='csrf_token' content='{0}'>"
+        "<meta name='session_id' content='{1}'>"
+        "</head><body></body></html>").format(csrf, session_id)
+
+
+def _amazon_form(fields, captcha=False):
+    inputs = ''.join(
+        "<input type='hidden' name='{0}' value='{1}'>".format(k, v)
+        for k, v in fields.items())
+    inputs += "<input type='email' name='email'><input type='password' name='password'>"
+    if captcha:
+        inputs += (
+            "<div id='ap_captcha_img'><img src='https://www.amazon.com/captcha.jpg'></div>"
+            "<input type='text' name='guess'>")
+    if 'tokenCode' in fields:
+        inputs = inputs.replace(
+            "<input type='hidden' name='tokenCode' value=''>",
+            "<input type='text' name='tokenCode'>")
+
+    return (
+        "<html><head></head><body>"
+        "<form id='ap_signin_form' method='post' action='https://www.amazon.com/ap/signin'>"
+        + inputs + "</form></body></html>")
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    wbufsize = 65536
+    console = None
+
+    def log_message(self, format, *args):
+        pass
+
+    # responses
+    def respond(self, status=200, body=b'', content_type='application/json',
+                headers=None, cookies=None):
+        if not isinstance(body, bytes):
+            if content_type == 'application/json':
+                body = json.dumps(body)
+            body = body.encode()
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Date', self.date_time_string())
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        for c in cookies or []:
+            self.send_header('Set-Cookie', c)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def redirect(self, location, cookies=None):
+        self.respond(302, b'', 'text/html', {'Location': location}, cookies)
+
+    def action(self, state, properties):
+        self.respond(body={'state': state, 'properties': properties})
+
+    # request parsing
+    def parse(self):
+        parts = urlsplit(self.path)
+        self.host = self.headers.get('Host', '')
+        self.route = parts.path
+        self.query = {k: v[0] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+        self.form = {}
+        if self.headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded'):
+            self.form = {
+                k: v[0] for k, v in
+                parse_qs(self.body.decode(), keep_blank_values=True).items()}
+
+        self.cookies = {}
+        if 'Cookie' in self.headers:
+            for k, morsel in SimpleCookie(self.headers['Cookie']).items():
+                self.cookies[k] = morsel.value
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    def account(self):
+        with self.console._lock:
+            return self.console._sessions.get(self.cookies.get(AUTH_COOKIE))
+
+    def auth_cookie(self, account):
+        return "{0}={1}; Domain=.amazon.com; Path=/".format(
+            AUTH_COOKIE, self.console._new_session(account))
+
+    def handle_any(self):
+        self.parse()
+        console = self.console
+        with console._lock:
+            console.requests.append((self.command, self.host, self.route))
+            console._in_flight += 1
+            console.max_in_flight = max(console.max_in_flight, console._in_flight)
+        try:
+            self.handle_request()
+        finally:
+            with console._lock:
+                console._in_flight -= 1
+
+    def handle_request(self):
+        console = self.console
+        if console.latency:
+            time.sleep(console.latency)
+
+        status = console._error_for(self.route)
+        if status is not None:
+            return self.respond(status, {'error': 'injected'})
+
+        handler = {
+            SIGNIN: self.signin_host,
+            CONSOLE: self.console_host,
+            AMAZON: self.amazon_host,
+        }.get(self.host)
+
+        if handler is None:
+            return self.respond(404, {'error': 'unknown host'})
+        return handler()
+
+    do_GET = handle_any
+    do_POST = handle_any
+    do_PUT = handle_any
+    do_DELETE = handle_any
+
+    # signin.aws.amazon.com
+    def signin_host(self):
+        console = self.console
+
+        if self.command == 'GET' and self.route in ('/signin', '/updateaccount', '/resetpassword'):
+            csrf = uuid.uuid4().hex
+            with console._lock:
+                console._csrf_tokens.add(csrf)
+            return self.respond(
+                body=_signin_page(csrf, uuid.uuid4().hex), content_type='text/html')
+
+        if self.route == '/federation':
+            return self.federation()
+
+        if self.command != 'POST':
+            return self.respond(404, {'error': 'not found'})
+
+        with console._lock:
+            valid_csrf = self.form.get('csrf') in console._csrf_tokens
+        if not valid_csrf:
+            return self.action('FAIL', {'Message': 'invalid csrf'})
+
+        if self.route == '/mfa':
+            account = console.accounts.get(self.form.get('email', '').lower())
+            mfa = 'SW' if account and account.mfa_secret else 'NONE'
+            return self.respond(body={'mfaType': mfa})
+
+        if self.route == '/updateaccount':
+            return self.update_account()
+
+        if self.route == '/signin':
+            return self.signin_action()
+
+        return self.respond(404, {'error': 'not found'})
+
+    def captcha_required(self, action):
+        console = self.console
+        if self.form.get('captcha_guess') == console.CAPTCHA_ANSWER:
+            return False
+        if not console._take(console._captchas, action):
+            return False
+
+        self.action('FAIL', {
+            'Captcha': 'true',
+            'CES': uuid.uuid4().hex,
+            'CaptchaURL': 'https://signin.aws.amazon.com/captcha?c=1',
+            'captchaObfuscationToken': uuid.uuid4().hex,
+        })
+        return True
+
+    def signin_action(self):
+        console = self.console
+        action = self.form.get('action')
+
+        if self.captcha_required(action):
+            return
+
+        if action == 'resolveAccountType':
+            account = console.accounts.get(self.form.get('email', '').lower())
+            account_type = account.account_type if account else 'Unknown'
+            return self.action('SUCCESS', {'resolvedAccountType': account_type})
+
+        if action == 'authenticateRoot':
+            account = console.accounts.get(self.form.get('email', '').lower())
+            if account is None or account.password != self.form.get('password'):
+                return self.action('FAIL', {'Message': 'Authentication failed'})
+            if account.mfa_secret and not console._check_code(account, self.form.get('mfa1')):
+                return self.action('FAIL', {'Message': 'Your authentication information is incorrect'})
+            return self.respond(
+                body={'state': 'SUCCESS', 'properties': {'redirectUrl': CONSOLE_HOME}},
+                cookies=[self.auth_cookie(account)])
+
+        if action == 'captcha':
+            return self.action('SUCCESS', {
+                'Captcha': 'true',
+                'CES': uuid.uuid4().hex,
+                'CaptchaURL': 'https://signin.aws.amazon.com/captcha?c=1',
+                'captchaObfuscationToken': uuid.uuid4().hex,
+            })
+
+        if action == 'getResetPasswordToken':
+            if self.form.get('captcha_guess') != console.CAPTCHA_ANSWER:
+                return self.action('FAIL', {'Message': 'Enter the characters and try again'})
+            return self.action('SUCCESS', {'recovery_result': 'email_sent'})
+
+        return self.action('FAIL', {'Message': 'unknown action'})
+
+    def update_account(self):
+        account = self.account()
+        if account is None:
+            return self.action('FAIL', {'action': 'reAuth'})
+
+        action = self.form.get('action')
+        if action == 'getAuthState':
+            return self.action('SUCCESS', {
+                'accountEmail': account.email,
+                'accountName': account.name,
+                'Message': '',
+                'Title': '',
+            })
+        if action == 'updateAccountName':
+            account.name = self.form['newAccountName']
+            return self.action('SUCCESS', {
+                'updatedAccountName': account.name, 'Message': '', 'Title': ''})
+
+        return self.action('FAIL', {'Message': 'unknown action'})
+
+    def federation(self):
+        console = self.console
+        action = self.query.get('Action')
+
+        if action == 'getSigninToken':
+            credentials = json.loads(self.query.get('Session', '{}'))
+            if not credentials.get('sessionId'):
+                return self.respond(400, {'error': 'invalid session'})
+            token = uuid.uuid4().hex
+            with console._lock:
+                console._signin_tokens[token] = credentials['sessionId']
+            return self.respond(body={'SigninToken': token})
+
+        if action == 'login':
+            with console._lock:
+                valid = self.query.get('SigninToken') in console._signin_tokens
+            if not valid:
+                return self.respond(400, b'invalid token', 'text/html')
+            account = console.accounts['federated@example.com']
+            return self.redirect(
+                self.query.get('Destination', CONSOLE_HOME),
+                [self.auth_cookie(account)])
+
+        return self.respond(400, {'error': 'unknown action'})
+
+    # console.aws.amazon.com
+    def console_host(self):
+        account = self.account()
+        if account is None:
+            return self.redirect('https://signin.aws.amazon.com/signin?redirect_uri=' + quote(CONSOLE_HOME))
+
+        if self.route == '/':
+            return self.redirect(CONSOLE_HOME)
+        if self.route == '/console/home':
+            return self.respond(body='<html><body>console</body></html>', content_type='text/html')
+
+        for prefix, handler in [
+            ('/iam/', self.iam),
+            ('/billing/', self.billing),
+            ('/support/plans/', self.support),
+        ]:
+            if self.route.startswith(prefix):
+                return handler(account, self.route[len(prefix):])
+
+        return self.respond(404, {'error': 'not found'})
+
+    def xsrf(self, service, account, header):
+        console = self.console
+        key = (service, self.cookies[AUTH_COOKIE])
+        token = self.headers.get(header)
+        with console._lock:
+            return token is not None and console._xsrf_tokens.get(key) == token
+
+    def new_xsrf(self, service, account):
+        token = uuid.uuid4().hex
+        with self.console._lock:
+            self.console._xsrf_tokens[(service, self.cookies[AUTH_COOKIE])] = token
+        return token
+
+    def iam(self, account, api):
+        if api == 'home':
+            token = self.new_xsrf('iam', account)
+            return self.respond(
+                body="<html><head><meta id='xsrf-token' data-token='{0}'></head></html>".format(token),
+                content_type='text/html')
+
+        if not self.xsrf('iam', account, 'X-CSRF-Token'):
+            return self.respond(403, {'error': 'invalid token'})
+
+        # the token is rotated with every response
+        headers = {'X-CSRF-Token': self.new_xsrf('iam', account)}
+        method = self.headers.get('x-http-method-override', self.command).upper()
+
+        if api == 'service/account':
+            return self.respond(body={
+                'aliases': [],
+                'summaryMap': {
+                    'AccountMFAEnabled': int(bool(account.mfa_devices)),
+                    'AccountAccessKeysPresent': int(any(k['status'] != 'Deleted' for k in account.access_keys)),
+                },
+            }, headers=headers)
+
+        if api == 'api/mfa' and method == 'GET':
+            return self.respond(body={
+                'serialNumber': account.mfa_devices, 'truncated': False,
+            }, headers=headers)
+
+        if api == 'api/mfa/createVirtualMfa':
+            serial = 'arn:aws:iam::123456789012:mfa/' + self.json()['virtualMFADeviceName']
+            return self.respond(body={
+                'serialNumber': serial,
+                'qrCodePNG': '',
+                'base32StringSeed': 'JBSWY3DPEHPK3PXP',
+            }, headers=headers)
+
+        if api == 'api/mfa/enableMfaDevice':
+            account.mfa_devices.append(self.json()['serialNumber'])
+            return self.respond(body={}, headers=headers)
+
+        if api == 'api/mfa/deactivateMfaDevice':
+            serial = self.json()['serialNumber']
+            account.mfa_devices = [d for d in account.mfa_devices if d != serial]
+            return self.respond(body={}, headers=headers)
+
+        if api.rstrip('/') == 'service/root/keys':
+            if method == 'GET':
+                deleted = self.query.get('deleted') == '1'
+                keys = [k for k in account.access_keys if (k['status'] == 'Deleted') == deleted]
+                return self.respond(body=keys, headers=headers)
+
+            active = [k for k in account.access_keys if k['status'] != 'Deleted']
+            if len(active) >= 2:
+                return self.respond(409, {'error': 'LimitExceeded'}, headers=headers)
+            key = {
+                'id': 'AKIA' + uuid.uuid4().hex[:16].upper(),
+                'status': 'Active',
+                'secret': uuid.uuid4().hex,
+                'createDate': int(time.time() * 1000),
+                'deleteDate': None,
+            }
+            account.access_keys.append(dict(key))
+            return self.respond(body=key, headers=headers)
+
+        for prefix in ('root/keys/', 'service/root/keys/'):
+            if api.startswith(prefix):
+                key_id = api[len(prefix):]
+                for key in account.access_keys:
+                    if key['id'] == key_id and key['status'] != 'Deleted':
+                        key['status'] = {
+                            'SERVICE/ACTIVATE': 'Active',
+                            'SERVICE/DEACTIVATE': 'Inactive',
+                            'DELETE': 'Deleted',
+                        }.get(method, key['status'])
+                        key.pop('secret', None)
+                        return self.respond(body={'success': True}, headers=headers)
+                return self.respond(404, {'success': False}, headers=headers)
+
+        return self.respond(404, {'error': 'not found'}, headers=headers)
+
+    def billing(self, account, api):
+        if api == 'home':
+            return self.respond(
+                body='<html></html>', content_type='text/html',
+                headers={'x-awsbc-xsrf-token': self.new_xsrf('billing', account)})
+
+        if not self.xsrf('billing', account, 'x-awsbc-xsrf-token'):
+            return self.respond(403, {'error': 'invalid token'})
+
+        api = api[len('rest/v1.0/'):]
+        if api == 'additionalcontacts':
+            if self.command == 'PUT':
+                account.alternate_contacts = self.json()
+            return self.respond(body=account.alternate_contacts)
+
+        if api == 'taxexemption/eu/vat/information':
+            if self.command == 'PUT':
+                account.tax_registrations = [self.json()]
+            return self.respond(body={'taxRegistrationList': account.tax_registrations})
+
+        if api == 'account/status':
+            return self.respond(body=account.status)
+
+        if api == 'account' and self.command == 'PUT':
+            account.status = 'SUSPENDED'
+            return self.respond(body={})
+
+        return self.respond(404, {'error': 'not found'})
+
+    def support(self, account, api):
+        if api == 'home':
+            token = self.new_xsrf('support', account)
+            return self.respond(
+                body='<html></html>', content_type='text/html',
+                cookies=['XSRF-TOKEN={0}; Path=/'.format(token)])
+
+        if not self.xsrf('support', account, 'X-XSRF-TOKEN'):
+            return self.respond(403, {'error': 'invalid token'})
+
+        if api == 'service/describeSupportLevelSummary':
+            return self.respond(body={'response': {
+                'supportLevel': account.support_level, 'canChange': True}})
+
+        if api == 'service/updateSupportLevel':
+            account.support_level = self.json()['supportLevel']
+            return self.respond(body={'response': {'supportLevel': account.support_level}})
+
+        return self.respond(404, {'error': 'not found'})
+
+    # www.amazon.com
+    def amazon_host(self):
+        console = self.console
+
+        if self.route != '/ap/signin':
+            return self.respond(404, b'not found', 'text/html')
+
+        if self.command == 'GET':
+            captcha = console._take(console._captchas, 'ap_signin')
+            return self.respond(
+                body=_amazon_form({'appActionToken': uuid.uuid4().hex}, captcha),
+                content_type='text/html')
+
+        account = console.accounts.get(self.form.get('email', '').lower())
+        if 'guess' in self.form and self.form['guess'] != console.CAPTCHA_ANSWER:
+            return self.respond(
+                body=_amazon_form({'appActionToken': uuid.uuid4().hex}, True),
+                content_type='text/html')
+
+        if account is None or account.password != self.form.get('password'):
+            return self.respond(
+                body="<html><body><div id='message_error'>Your password is incorrect</div></body></html>",
+                content_type='text/html')
+
+        if account.mfa_secret:
+            if 'tokenCode' not in self.form:
+                return self.respond(
+                    body=_amazon_form({'appActionToken': uuid.uuid4().hex, 'tokenCode': ''}),
+                    content_type='text/html')
+            if not console._check_code(account, self.form['tokenCode']):
+                return self.respond(
+                    body="<html><body><div id='message_error'>Invalid code</div></body></html>",
+                    content_type='text/html')
+
+        return self.redirect(CONSOLE_HOME, [self.auth_cookie(account)])
+
+
+class ConsoleTestCase(unittest.TestCase):
+    """
+    Test case running a :py:class:`FakeConsole` with a decoupled root
+    account ``root@example.com``.
+    """
+
+    PASSWORD = 'p4ssw0rd'
+    MFA_SECRET = 'JBSWY3DPEHPK3PXPJBSWY3DPEHPK3PXP'
+
+    def setUp(self):
+        self.console = FakeConsole()
+        self.console.start()
+        self.account = self.console.add_account('root@example.com', self.PASSWORD)
+
+    def tearDown(self):
+        self.console.stop()
+
+    def root_session(self, **kwargs):
+        return self.console.session(
+            email='root@example.com', password=self.PASSWORD, **kwargs)
@@ -0,0 +1,67 @@
+import os
+import tempfile
+from tests.fake_console import ConsoleTestCase
+from coto.session.accounts import AccountCache
+from coto.session.store import SqliteStore
+
+
+class TestAccountCache(ConsoleTestCase):
+
+    def requests(self):
+        return [(method, route) for method, host, route in self.console.requests]
+
+    def test_known_account(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SqliteStore(os.path.join(directory, 'accounts.db'))
+            self.root_session(account_cache=AccountCache(store))
+            self.console.reset_requests()
+
+            # a new cache on the same database, eg., in another process
+            cache = AccountCache(store)
+            self.assertEqual('Decoupled', cache.account_type('ROOT@example.com'))
+            self.assertEqual('NONE', cache.mfa_type('root@example.com'))
+
+            session = self.root_session(account_cache=cache)
+            self.assertTrue(session.authenticated)
+
+        # the signin page and authenticateRoot only
+        self.assertEqual(
+            [('GET', '/signin'), ('POST', '/signin')], self.requests())
+
+    def test_stale_mfa_type(self):
+        cache = AccountCache()
+        self.root_session(account_cache=cache)
+
+        # mfa enabled since the answers were cached
+        self.account.mfa_secret = self.MFA_SECRET
+        session = self.root_session(
+            account_cache=cache, mfa_secret=self.MFA_SECRET)
+        self.assertTrue(session.authenticated)
+        self.assertEqual('SW', cache.mfa_type('root@example.com'))
+
+    def test_failed_signin(self):
+        cache = AccountCache()
+        self.root_session(account_cache=cache)
+
+        with self.assertRaises(Exception):
+            self.console.session(
+                email='root@example.com', password='wrong',
+                account_cache=cache)
+
+        # looked up again, unchanged
+        self.assertEqual('Decoupled', cache.account_type('root@example.com'))
+
+    def test_unrelated_error(self):
+        cache = AccountCache()
+        self.root_session(account_cache=cache)
+        self.console.reset_requests()
+
+        # a server error says nothing about the cached answers, the
+        # credentials are not submitted again
+        self.console.inject_error('/signin', status=500)
+        with self.assertRaises(Exception):
+            self.root_session(account_cache=cache)
+
+        self.assertEqual([('GET', '/signin')], self.requests())
+        self.assertEqual('Decoupled', cache.account_type('root@example.com'))
+        self.assertEqual('NONE', cache.mfa_type('root@example.com'))
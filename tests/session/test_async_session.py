@@ -0,0 +1,103 @@
+import asyncio
+from tests import mock, BaseTestCase
+from tests.fake_console import ConsoleTestCase
+import coto
+from coto import captcha, exceptions
+from coto.metadata1.static_generator import StaticGenerator
+
+
+class TestAsyncSession(BaseTestCase):
+
+    def test_client(self):
+        async def run():
+            async with coto.AsyncSession(max_workers=4) as session:
+                session.session.authenticated = True
+                iam = session.client('iam')
+                self.assertIs(iam, session.client('IAM'))
+
+                with mock.patch.object(
+                        iam._client, 'get_account_info',
+                        return_value={'summaryMap': {}}):
+                    results = await asyncio.gather(
+                        *[iam.get_account_info() for _ in range(8)])
+
+                return results
+
+        results = asyncio.run(run())
+        self.assertEqual([{'summaryMap': {}}] * 8, results)
+
+    def test_signin(self):
+        async def run():
+            async with coto.AsyncSession() as session:
+                with mock.patch.object(
+                        session.session, 'signin', return_value=True) as signin:
+                    self.assertTrue(await session.signin(
+                        email='email@example.com', password='x'))
+                    signin.assert_called_once_with(
+                        email='email@example.com', password='x')
+
+        asyncio.run(run())
+
+
+class ManualSolver(captcha.Solver):
+    def __init__(self):
+        self.jobs = []
+        self.wrong = []
+
+    def submit(self, base64=None, url=None, deadline=None):
+        job = captcha.CaptchaJob('job-{0}'.format(len(self.jobs)))
+        self.jobs.append(job)
+        return job
+
+    def incorrect(self, job_id):
+        self.wrong.append(job_id)
+
+
+class TestAsyncCaptcha(ConsoleTestCase):
+
+    def async_session(self, **kwargs):
+        session = coto.AsyncSession(
+            metadata1_generator=StaticGenerator('m1'),
+            totp_allocator=self.console.totp, **kwargs)
+        self.console.route(session.session)
+        return session
+
+    async def jobs(self, solver, count):
+        while len(solver.jobs) < count:
+            await asyncio.sleep(0.001)
+        return solver.jobs[count - 1]
+
+    def test_captcha_frees_worker(self):
+        solver = ManualSolver()
+        self.console.require_captcha('authenticateRoot', times=2)
+
+        async def run():
+            async with self.async_session(
+                    max_workers=1, captcha_solver=solver) as session:
+                signin = asyncio.ensure_future(session.signin(
+                    email='root@example.com', password=self.PASSWORD))
+
+                # the only worker is free while the guess is awaited
+                job = await self.jobs(solver, 1)
+                self.assertEqual('done', await session._run(lambda: 'done'))
+                job.set_result('wrong')
+
+                (await self.jobs(solver, 2)).set_result(self.console.CAPTCHA_ANSWER)
+                self.assertTrue(await signin)
+
+        asyncio.run(run())
+        self.assertEqual(['job-0'], solver.wrong)
+
+    def test_captcha_timeout(self):
+        solver = ManualSolver()
+        self.console.require_captcha('authenticateRoot')
+
+        async def run():
+            async with self.async_session(
+                    captcha_solver=solver, captcha_timeout=0.05) as session:
+                with self.assertRaises(exceptions.DeadlineExceeded):
+                    await session.signin(
+                        email='root@example.com', password=self.PASSWORD)
+
+        asyncio.run(run())
+        self.assertTrue(solver.jobs[0].cancel_requested())
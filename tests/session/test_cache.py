@@ -0,0 +1,78 @@
+import os
+import tempfile
+from tests import BaseTestCase
+from tests.fake_console import ConsoleTestCase
+from coto.session.cache import ResponseCache
+from coto.session.store import SqliteStore
+
+
+class TestResponseCache(BaseTestCase):
+
+    def test_call(self):
+        cache = ResponseCache(ttls={'iam.list_root_access_keys': 0})
+        values = iter(range(10))
+
+        def fetch():
+            return {'value': next(values)}
+
+        self.assertEqual(0, cache.call('root:a', 'iam.get_account_info', fetch)['value'])
+        self.assertEqual(0, cache.call('root:a', 'iam.get_account_info', fetch)['value'])
+        # per principal and arguments
+        self.assertEqual(1, cache.call('root:b', 'iam.get_account_info', fetch)['value'])
+        self.assertEqual(2, cache.call('root:a', 'iam.get_account_info', fetch, (1, ))['value'])
+        # not cached
+        self.assertEqual(3, cache.call('root:a', 'iam.list_root_access_keys', fetch)['value'])
+        self.assertEqual(4, cache.call('root:a', 'iam.list_root_access_keys', fetch)['value'])
+
+        cache.invalidate('root:a', 'iam.get_account_info')
+        self.assertEqual(5, cache.call('root:a', 'iam.get_account_info', fetch)['value'])
+        self.assertEqual(1, cache.call('root:b', 'iam.get_account_info', fetch)['value'])
+        self.assertEqual((2, 4), (cache.hits, cache.misses))
+
+    def test_lru(self):
+        cache = ResponseCache(maxsize=4)
+        for i in range(10):
+            cache.call('root:a', 'iam.get_account_info', lambda: i, (i, ))
+        self.assertEqual(4, len(cache._store))
+
+    def test_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.db')
+            ResponseCache(store=SqliteStore(path)).call(
+                'root:a', 'billing.account_status', lambda: 'ACTIVE')
+
+            # survives a restart
+            cache = ResponseCache(store=SqliteStore(path))
+            self.assertEqual('ACTIVE', cache.call(
+                'root:a', 'billing.account_status', lambda: 'SUSPENDED'))
+
+
+class TestSessionCache(ConsoleTestCase):
+
+    def test_cached(self):
+        session = self.root_session(response_cache=ResponseCache())
+        billing = session.client('billing')
+        self.account.alternate_contacts = {'billing': None}
+
+        self.console.reset_requests()
+        self.assertEqual({'billing': None}, billing.list_alternate_contacts())
+        self.assertEqual({'billing': None}, billing.list_alternate_contacts())
+        self.assertEqual(1, len([r for r in self.console.requests if r[2].endswith('additionalcontacts')]))
+
+    def test_invalidates(self):
+        session = self.root_session(response_cache=ResponseCache())
+        support = session.client('support')
+        self.assertEqual('basic', support.get_support_level()['supportLevel'])
+        support.update_support_level('developer')
+        self.assertEqual('developer', support.get_support_level()['supportLevel'])
+
+        iam = session.client('iam')
+        self.assertEqual([], iam.list_root_access_keys())
+        iam.create_root_access_key()
+        self.assertEqual(1, len(iam.list_root_access_keys()))
+
+    def test_not_signed_in(self):
+        cache = ResponseCache()
+        session = self.console.session(response_cache=cache)
+        session.client('mfa')
+        self.assertIsNone(session._cache_scope)
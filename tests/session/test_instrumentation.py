@@ -0,0 +1,79 @@
+from tests import mock, BaseTestCase
+from tests.fake_console import ConsoleTestCase
+from coto.session.endpoints import endpoint
+from coto.session.instrumentation import Instrumentation
+from coto.session.ratelimit import RateLimiter
+
+
+class TestEndpoint(BaseTestCase):
+
+    def test_endpoint(self):
+        self.assertEqual('signin', endpoint('https://signin.aws.amazon.com/signin?x=1'))
+        self.assertEqual('mfa', endpoint('https://signin.aws.amazon.com/mfa'))
+        self.assertEqual('iam', endpoint('https://console.aws.amazon.com/iam/home'))
+        self.assertEqual('console', endpoint('https://console.aws.amazon.com/console/home'))
+        self.assertEqual('amazon', endpoint('https://www.amazon.com/ap/signin'))
+        self.assertEqual('other', endpoint('https://example.com/'))
+
+
+class TestInstrumentation(ConsoleTestCase):
+
+    def test_hooks_and_counters(self):
+        instrumentation = Instrumentation()
+        before = []
+        after = []
+
+        def add_header(event):
+            event.kwargs['headers']['X-Trace'] = 'abc'
+            before.append(event.endpoint)
+
+        instrumentation.add_hook('before_request', add_header)
+        instrumentation.add_hook('after_request', after.append)
+
+        session = self.root_session(instrumentation=instrumentation)
+        session.client('iam').get_account_info()
+
+        # the mfa lookup runs concurrently with resolving the account type
+        self.assertEqual(
+            ['iam', 'iam', 'iam', 'mfa', 'signin', 'signin', 'signin'],
+            sorted(before))
+        self.assertEqual(sorted(before), sorted(e.endpoint for e in after))
+        self.assertEqual('abc', after[0].response.request.headers['X-Trace'])
+        self.assertTrue(all(e.timings['total'] >= e.timings['server'] for e in after))
+
+        # requests are counted for the client method the caller called
+        counters = instrumentation.counters()
+        self.assertEqual(1, counters[('signin.signin', 'signin', 'GET')]['requests'])
+        self.assertEqual(2, counters[('signin.signin', 'signin', 'POST')]['requests'])
+        self.assertEqual(1, counters[('signin.signin', 'mfa', 'POST')]['requests'])
+        self.assertEqual(3, counters[('iam.get_account_info', 'iam', 'GET')]['requests'])
+        self.assertEqual(0, counters[('iam.get_account_info', 'iam', 'GET')]['errors'])
+
+    def test_error_counter(self):
+        instrumentation = Instrumentation()
+        session = self.root_session(instrumentation=instrumentation)
+        self.console.inject_error('/iam/service/account', status=500)
+
+        with self.assertRaises(Exception):
+            session.client('iam').get_account_info()
+
+        self.assertEqual(1, instrumentation.counters()[
+            ('iam.get_account_info', 'iam', 'GET')]['errors'])
+
+    def test_limiter_wait_not_timed(self):
+        instrumentation = Instrumentation()
+        session = self.root_session(
+            instrumentation=instrumentation,
+            rate_limiter=RateLimiter({'iam': 5}, burst=1))
+        events = []
+        instrumentation.add_hook('after_request', events.append)
+
+        session.client('iam').get_account_info()
+        # three iam requests at 5 per second wait 0.4 seconds
+        self.assertEqual(3, len(events))
+        self.assertLess(sum(e.timings['total'] for e in events), 0.3)
+
+    def test_exporter(self):
+        exporter = mock.Mock()
+        self.root_session(instrumentation=Instrumentation(exporter))
+        self.assertEqual(4, exporter.export.call_count)
@@ -0,0 +1,91 @@
+import datetime
+import threading
+from tests import mock
+from tests.fake_console import ConsoleTestCase
+import coto
+from coto.session.organization import RoleCredentialCache
+
+
+class FakeSTS:
+    """
+    Stand-in for the STS client of a management account.
+    """
+
+    def __init__(self, duration=3600, denied=()):
+        self.duration = duration
+        self.denied = denied
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def assume_role(self, RoleArn, RoleSessionName, DurationSeconds):
+        account = RoleArn.split(':')[4]
+        with self._lock:
+            self.calls.append(RoleArn)
+            n = len(self.calls)
+        if account in self.denied:
+            raise Exception("AccessDenied")
+
+        expiration = datetime.datetime.now(datetime.timezone.utc) + \
+            datetime.timedelta(seconds=self.duration)
+        return {'Credentials': {
+            'AccessKeyId': 'ASIA{0}{1}'.format(account, n),
+            'SecretAccessKey': 'secret',
+            'SessionToken': 'token{0}'.format(n),
+            'Expiration': expiration,
+        }}
+
+
+class FakeManagementSession:
+    def __init__(self, sts):
+        self.sts = sts
+
+    def client(self, service):
+        assert service == 'sts'
+        return self.sts
+
+
+ACCOUNTS = ['111111111111', '222222222222', '333333333333']
+
+
+class TestOrganizationPool(ConsoleTestCase):
+
+    def pool(self, sts, **kwargs):
+        return coto.OrganizationPool(
+            FakeManagementSession(sts), 'OrganizationAccountAccessRole',
+            ACCOUNTS, **kwargs)
+
+    def setUp(self):
+        super().setUp()
+        self.route = mock.patch('coto.session.pool.Session', self.console.session)
+        self.route.start()
+        self.addCleanup(self.route.stop)
+
+    def test_signin(self):
+        sts = FakeSTS(denied=('333333333333', ))
+        with self.pool(sts) as pool:
+            results = {r.account: r for r in pool.signin()}
+
+            self.assertTrue(results['111111111111'].result.authenticated)
+            self.assertTrue(results['222222222222'].result.authenticated)
+            self.assertIsNotNone(results['333333333333'].error)
+            self.assertIs(
+                results['111111111111'].result, pool.session('111111111111'))
+
+        self.assertIn(
+            'arn:aws:iam::111111111111:role/OrganizationAccountAccessRole',
+            sts.calls)
+
+    def test_credential_cache(self):
+        sts = FakeSTS()
+        cache = RoleCredentialCache()
+        for _ in range(2):
+            with self.pool(sts, credential_cache=cache) as pool:
+                list(pool.signin())
+
+        self.assertEqual(3, len(sts.calls))
+
+    def test_expired_credentials(self):
+        sts = FakeSTS(duration=60)
+        with self.pool(sts) as pool:
+            first = pool.credentials('111111111111')
+            self.assertIsNot(first, pool.credentials('111111111111'))
@@ -0,0 +1,65 @@
+import threading
+import time
+from tests import mock, BaseTestCase
+import coto
+from coto.session import HostLimiter
+
+
+class TestSessionPool(BaseTestCase):
+
+    def fake_signin(self, session, **kwargs):
+        if kwargs['email'] == 'broken@example.com':
+            raise Exception("captcha required")
+        session.authenticated = True
+        session.account = kwargs['email']
+        return True
+
+    def test_map(self):
+        credentials = {
+            'a': {'email': 'a@example.com', 'password': 'x'},
+            'b': {'email': 'b@example.com', 'password': 'x'},
+            'broken': {'email': 'broken@example.com', 'password': 'x'},
+        }
+
+        with mock.patch.object(coto.Session, 'signin', autospec=True,
+                               side_effect=self.fake_signin), \
+                mock.patch.object(coto.Session, 'client') as client:
+            client.return_value.get_account_info.return_value = {'ok': True}
+
+            with coto.SessionPool(credentials, max_workers=2) as pool:
+                results = {r.account: r for r in pool.map('iam', 'get_account_info')}
+
+                self.assertEqual({'a', 'b', 'broken'}, set(results))
+                self.assertEqual({'ok': True}, results['a'].result)
+                self.assertIsNone(results['a'].error)
+                self.assertIsNone(results['broken'].result)
+                self.assertEqual("captcha required", str(results['broken'].error))
+
+                # sessions are signed in once and reused
+                self.assertIs(pool.session('a'), pool.session('a'))
+
+
+class TestHostLimiter(BaseTestCase):
+
+    def test_limit(self):
+        limiter = HostLimiter({'signin.aws.amazon.com': 2})
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def request():
+            with limiter.limit('https://signin.aws.amazon.com/signin'):
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                time.sleep(0.01)
+                with lock:
+                    active.pop()
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(2, max(peak))
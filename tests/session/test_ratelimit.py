@@ -0,0 +1,68 @@
+import os
+import tempfile
+import time
+from tests import mock, BaseTestCase
+from tests.fake_console import ConsoleTestCase
+from coto.session.ratelimit import RateLimiter
+
+IAM_URL = 'https://console.aws.amazon.com/iam/api/account'
+
+
+def response(status, headers=None):
+    return mock.Mock(status_code=status, headers=headers or {})
+
+
+class TestRateLimiter(BaseTestCase):
+
+    def test_bucket(self):
+        limiter = RateLimiter({'iam': 20}, burst=1)
+        start = time.perf_counter()
+        for _ in range(5):
+            limiter.acquire(IAM_URL)
+        self.assertGreater(time.perf_counter() - start, 0.15)
+
+        # other families are not limited
+        self.assertEqual(0, limiter.acquire('https://signin.aws.amazon.com/signin'))
+
+    def test_adapts(self):
+        limiter = RateLimiter({'iam': 10}, recovery=0.1)
+        limiter.feedback(IAM_URL, response(429))
+        self.assertAlmostEqual(5, limiter.rate('iam'))
+
+        limiter.feedback(IAM_URL, response(200))
+        self.assertAlmostEqual(6, limiter.rate('iam'))
+        for _ in range(10):
+            limiter.feedback(IAM_URL, response(200))
+        self.assertAlmostEqual(10, limiter.rate('iam'))
+
+    def test_retry_after(self):
+        limiter = RateLimiter({'iam': 100})
+        limiter.feedback(IAM_URL, response(503, {'Retry-After': '1'}))
+        self.assertGreater(limiter.acquire(IAM_URL), 0.9)
+
+    def test_shared(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'rates.db')
+            first = RateLimiter({'iam': 10}, burst=1, path=path)
+            second = RateLimiter({'iam': 10}, burst=1, path=path)
+
+            self.assertEqual(0, first.acquire(IAM_URL))
+            self.assertGreater(second.acquire(IAM_URL), 0.05)
+
+            first.feedback(IAM_URL, response(429))
+            self.assertAlmostEqual(5, second.rate('iam'))
+
+        with self.assertRaises(ValueError):
+            RateLimiter({'iam': 10}, path=':memory:')
+
+
+class TestSessionRateLimit(ConsoleTestCase):
+
+    def test_throttled(self):
+        limiter = RateLimiter({'iam': 50})
+        session = self.root_session(rate_limiter=limiter)
+        self.console.inject_error('/iam/service/account', status=429)
+
+        with self.assertRaises(Exception):
+            session.client('iam').get_account_info()
+        self.assertLess(limiter.rate('iam'), 50)
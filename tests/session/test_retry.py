@@ -0,0 +1,113 @@
+import time
+import requests
+from tests import mock, BaseTestCase
+from tests.fake_console import ConsoleTestCase
+from coto import exceptions
+from coto.session.retry import RetryPolicy, deadline, idempotent
+
+URL = 'https://console.aws.amazon.com/iam/api/account'
+
+
+def response(status, headers=None):
+    return mock.Mock(status_code=status, headers=headers or {})
+
+
+class TestRetryPolicy(BaseTestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_attempts=3, base=0.001, cap=0.01)
+
+    def test_idempotent(self):
+        self.assertTrue(idempotent('GET', {}))
+        self.assertFalse(idempotent('POST', {}))
+        self.assertTrue(idempotent(
+            'POST', {'headers': {'X-HTTP-Method-Override': 'GET'}}))
+
+    def test_retries_transient(self):
+        send = mock.Mock(side_effect=[response(503), response(200)])
+        r = self.policy.send(send, 'GET', URL, {})
+        self.assertEqual(200, r.status_code)
+        self.assertEqual(2, send.call_count)
+
+    def test_gives_up(self):
+        send = mock.Mock(return_value=response(500))
+        self.assertEqual(500, self.policy.send(send, 'GET', URL, {}).status_code)
+        self.assertEqual(3, send.call_count)
+
+        send = mock.Mock(side_effect=requests.ConnectionError('reset'))
+        with self.assertRaises(requests.ConnectionError):
+            self.policy.send(send, 'GET', URL, {})
+        self.assertEqual(3, send.call_count)
+
+    def test_not_idempotent(self):
+        send = mock.Mock(return_value=response(503))
+        self.policy.send(send, 'POST', URL, {})
+        self.assertEqual(1, send.call_count)
+
+        send = mock.Mock(side_effect=[response(503), response(200)])
+        self.policy.send(send, 'POST', URL, {}, is_idempotent=True)
+        self.assertEqual(2, send.call_count)
+
+    def test_retry_after(self):
+        self.assertEqual(2, self.policy.backoff(1, response(429, {'Retry-After': '2'})))
+        self.assertLessEqual(self.policy.backoff(10), 0.01)
+
+    def test_deadline(self):
+        # the Retry-After wait would end after the deadline
+        send = mock.Mock(return_value=response(429, {'Retry-After': '5'}))
+        with deadline(1):
+            self.assertEqual(429, self.policy.send(send, 'GET', URL, {}).status_code)
+        self.assertEqual(1, send.call_count)
+
+        with deadline(0.01):
+            time.sleep(0.02)
+            with self.assertRaises(exceptions.DeadlineExceeded):
+                self.policy.send(send, 'GET', URL, {})
+
+
+class TestSessionRetry(ConsoleTestCase):
+
+    def test_typed_errors(self):
+        session = self.root_session()
+        self.console.inject_error('/iam/service/account', status=503)
+
+        with self.assertRaises(exceptions.ServerError) as cm:
+            session.client('iam').get_account_info()
+        self.assertEqual(503, cm.exception.status_code)
+        self.assertTrue(cm.exception.retryable)
+
+        self.console.inject_error('/iam/service/account', status=400)
+        with self.assertRaises(exceptions.ClientError) as cm:
+            session.client('iam').get_account_info()
+        self.assertFalse(cm.exception.retryable)
+
+    def test_retries_reads(self):
+        session = self.root_session(retry_policy=RetryPolicy(base=0.001))
+        self.console.inject_error('/iam/service/account', status=503, times=2)
+        info = session.client('iam').get_account_info()
+        self.assertIn('AccountMFAEnabled', info['summaryMap'])
+
+    def test_no_retry_of_actions(self):
+        session = self.root_session(retry_policy=RetryPolicy(base=0.001))
+        self.console.inject_error('/iam/service/root/keys', status=503)
+        with self.assertRaises(exceptions.ServerError):
+            session.client('iam').create_root_access_key()
+        self.assertEqual([], session.client('iam').list_root_access_keys())
+
+    def test_retries_post_reads(self):
+        session = self.root_session(retry_policy=RetryPolicy(base=0.001))
+        self.console.inject_error(
+            '/support/plans/service/describeSupportLevelSummary', status=503)
+        level = session.client('support').get_support_level()
+        self.assertEqual('basic', level['supportLevel'])
+
+        # the token page is fetched first, the error hits getAuthState
+        account = session.client('account')
+        account.get_account_info()
+        self.console.inject_error('/updateaccount', status=503)
+        info = account.get_account_info()
+        self.assertEqual('root@example.com', info['accountEmail'])
+
+        self.console.inject_error('/support/plans/service/updateSupportLevel', status=503)
+        with self.assertRaises(exceptions.ServerError):
+            session.client('support').update_support_level('developer')
@@ -7,3 +7,23 @@ class TestSession(BaseTestCase):
         session = coto.Session()
 
         self.assertEqual(False, session.debug)
+
+    def test_transport(self):
+        session = coto.Session(pool_maxsize=32, pool_block=True, max_retries=2)
+        adapter = session.session.get_adapter('https://console.aws.amazon.com/')
+
+        self.assertEqual(32, adapter._pool_maxsize)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(2, adapter.max_retries.total)
+        self.assertEqual({}, session.pool_stats())
+
+        pool = adapter.poolmanager.connection_from_url(
+            'https://console.aws.amazon.com/')
+        conn = pool._get_conn()
+        stats = session.pool_stats()['console.aws.amazon.com:443']
+        self.assertEqual(32, stats['maxsize'])
+        self.assertEqual(1, stats['in_use'])
+        pool._put_conn(conn)
+        stats = session.pool_stats()['console.aws.amazon.com:443']
+        self.assertEqual(0, stats['in_use'])
+        self.assertEqual(1, stats['idle'])
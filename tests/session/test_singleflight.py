@@ -0,0 +1,126 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from tests import BaseTestCase
+from tests.fake_console import ConsoleTestCase
+import coto
+from coto.clients import BaseClient, cached, invalidates
+from coto.session.singleflight import SingleFlight
+
+
+class FakeClient(BaseClient):
+    REQUIRES_AUTHENTICATION = False
+
+    def __init__(self, session):
+        super().__init__(session)
+        self.value = 'old'
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    @cached
+    def read(self):
+        value = self.value
+        self.started.set()
+        self.release.wait(5)
+        return value
+
+    @invalidates('read')
+    def write(self, value):
+        self.value = value
+
+
+class TestSingleFlight(BaseTestCase):
+
+    def test_shared(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            release.wait(5)
+            return {'value': 1}
+
+        with ThreadPoolExecutor(4) as executor:
+            futures = [executor.submit(flight.do, ('request', 'a'), fn) for _ in range(4)]
+            while flight.stats().get('request', {}).get('saved', 0) < 3:
+                time.sleep(0.001)
+            release.set()
+            results = [f.result() for f in futures]
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(3, len([r for r in results if r[1]]))
+        self.assertEqual({'request': {'calls': 1, 'saved': 3}}, flight.stats())
+
+        # later calls are made again
+        release.set()
+        self.assertEqual(({'value': 1}, False), flight.do(('request', 'a'), fn))
+
+    def test_error(self):
+        flight = SingleFlight()
+
+        def fn():
+            raise Exception("failed")
+
+        with self.assertRaises(Exception):
+            flight.do(('token', 'iam'), fn)
+        with self.assertRaises(Exception):
+            flight.do(('token', 'iam'), fn)
+        self.assertEqual({'token': {'calls': 2, 'saved': 0}}, flight.stats())
+
+
+class TestSessionSingleFlight(ConsoleTestCase):
+
+    def test_read_after_write(self):
+        session = coto.Session()
+        client = FakeClient(session)
+
+        with ThreadPoolExecutor(2) as executor:
+            before = executor.submit(client.read)
+            self.assertTrue(client.started.wait(5))
+            client.write('new')
+
+            # a read started after the change does not join the read in
+            # flight during it
+            after = executor.submit(client.read)
+            while sum(session.single_flight_stats()['request'].values()) < 2:
+                time.sleep(0.001)
+            client.release.set()
+
+            self.assertEqual('old', before.result())
+            self.assertEqual('new', after.result())
+        self.assertEqual({'calls': 2, 'saved': 0}, session.single_flight_stats()['request'])
+
+    def test_concurrent_reads(self):
+        session = self.root_session()
+        self.console.latency = 0.05
+        self.console.reset_requests()
+
+        iam = session.client('iam')
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda _: iam.get_account_info(), range(8)))
+
+        # every caller gets its own copy of the result
+        self.assertEqual(8, len(set(id(r) for r in results)))
+        self.assertTrue(all(r == results[0] for r in results))
+        requests = [r for r in self.console.requests if r[2] == '/iam/service/account']
+        stats = session.single_flight_stats()
+        self.assertEqual(8, stats['request']['calls'] + stats['request']['saved'])
+        self.assertEqual(stats['request']['calls'], len(requests))
+        self.assertLess(len(requests), 8)
+        # the iam token is bootstrapped once, from two pages
+        self.assertEqual(2, len([r for r in self.console.requests if r[2] == '/iam/home']))
+
+    def test_concurrent_signin(self):
+        session = self.console.session()
+        self.console.latency = 0.02
+
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(
+                lambda _: session.signin(email='root@example.com', password=self.PASSWORD),
+                range(4)))
+
+        self.assertTrue(all(results))
+        stats = session.single_flight_stats()
+        self.assertEqual(4, stats['signin']['calls'] + stats['signin']['saved'])
+        self.assertGreater(stats['signin']['saved'], 0)
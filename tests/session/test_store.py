@@ -0,0 +1,126 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import tempfile
+from tests import mock, BaseTestCase
+from tests.fake_console import ConsoleTestCase
+import coto
+from coto.session import MemoryStore, FileStore, SqliteStore
+
+
+class TestStores(BaseTestCase):
+
+    def check_store(self, store):
+        self.assertIsNone(store.get('key'))
+
+        store.put('key', {'a': 1})
+        self.assertEqual({'a': 1}, store.get('key'))
+
+        store.put('key', {'a': 2}, ttl=-1)
+        self.assertIsNone(store.get('key'))
+
+        store.put('key', {'a': 3})
+        store.delete('key')
+        self.assertIsNone(store.get('key'))
+
+    def test_memory(self):
+        self.check_store(MemoryStore())
+
+    def test_memory_maxsize(self):
+        store = MemoryStore(maxsize=2)
+        store.put('a', {'a': 1})
+        store.put('b', {'b': 1})
+        store.get('a')
+        store.put('c', {'c': 1})
+        # the least recently used entry is evicted
+        self.assertIsNone(store.get('b'))
+        self.assertEqual({'a': 1}, store.get('a'))
+        self.assertEqual(2, len(store))
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.check_store(FileStore(directory))
+
+    def test_sqlite(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'db')
+            self.check_store(SqliteStore(path))
+            self.assertEqual(0o600, os.stat(path).st_mode & 0o777)
+
+    def test_sqlite_threads(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SqliteStore(os.path.join(directory, 'db'))
+            store.put('key', {'a': 1})
+
+            # every thread has its own connection to the same database
+            with ThreadPoolExecutor(1) as executor:
+                self.assertEqual({'a': 1}, executor.submit(store.get, 'key').result())
+                executor.submit(store.put, 'key', {'a': 2}).result()
+            self.assertEqual({'a': 2}, store.get('key'))
+
+        with self.assertRaises(ValueError):
+            SqliteStore(':memory:')
+
+
+class TestSessionStore(BaseTestCase):
+
+    KEY = coto.Session._credentials_key(
+        {'email': 'email@example.com', 'password': 'password'})
+
+    def signed_in_session(self, store):
+        session = coto.Session(session_store=store)
+        session.session.cookies.set(
+            'aws-creds', 'secret', domain='.amazon.com', path='/')
+        session.authenticated = True
+        session.root = True
+        session.session_key = self.KEY
+        session._tokens.set('iam', 'xsrf')
+        session.save()
+        return session
+
+    def test_resume(self):
+        store = MemoryStore()
+        self.signed_in_session(store)
+
+        session = coto.Session(session_store=store)
+        with mock.patch.object(coto.Session, '_probe', return_value=True):
+            self.assertTrue(session.signin(
+                email='Email@example.com', password='password'))
+
+        self.assertTrue(session.authenticated)
+        self.assertTrue(session.root)
+        self.assertEqual('secret', session.session.cookies['aws-creds'])
+        self.assertEqual('xsrf', session.client('iam')._xsrf_token())
+
+    def test_resume_expired(self):
+        store = MemoryStore()
+        self.signed_in_session(store)
+
+        session = coto.Session(session_store=store)
+        with mock.patch.object(coto.Session, '_probe', return_value=False):
+            self.assertFalse(session._resume(self.KEY))
+
+        self.assertFalse(session.authenticated)
+        self.assertEqual(0, len(session.session.cookies))
+        self.assertIsNone(store.get(self.KEY))
+
+    def test_key(self):
+        self.assertTrue(self.KEY.startswith('root:email@example.com:'))
+        self.assertNotIn('password', self.KEY)
+        for kwargs in [
+            {'email': 'email@example.com', 'password': 'wrong'},
+            {'email': 'email@example.com', 'password': 'password',
+             'mfa_secret': 'JBSWY3DPEHPK3PXP'},
+        ]:
+            self.assertNotEqual(self.KEY, coto.Session._credentials_key(kwargs))
+
+
+class TestSessionStoreSignin(ConsoleTestCase):
+
+    def test_wrong_password(self):
+        store = MemoryStore()
+        self.root_session(session_store=store)
+
+        with self.assertRaises(Exception):
+            self.console.session(
+                email='root@example.com', password='wrong', session_store=store)
+        self.assertTrue(self.root_session(session_store=store).authenticated)
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from tests import mock, BaseTestCase
+from tests.fake_console import ConsoleTestCase
+from coto.session.store import MemoryStore
+from coto.session.tokens import TokenManager
+
+
+class TestTokenRotation(BaseTestCase):
+
+    def test_invalidate_replaced(self):
+        tokens = TokenManager(background=False)
+        tokens.set('iam', 'new')
+        # a request rejected with the old token keeps the new one
+        tokens.invalidate('iam', 'old')
+        self.assertEqual('new', tokens.get('iam', mock.Mock()))
+        tokens.invalidate('iam', 'new')
+        self.assertEqual('fetched', tokens.get('iam', lambda: 'fetched'))
+
+    def test_rotation_lock(self):
+        tokens = TokenManager()
+        self.assertIs(tokens.rotation('iam'), tokens.rotation('iam'))
+        self.assertIsNot(tokens.rotation('iam'), tokens.rotation('billing'))
+
+    def test_refresh_waits_for_rotation(self):
+        tokens = TokenManager(refresh_ahead=1)
+        tokens.set('iam', 'old')
+        fetched = threading.Event()
+
+        def fetch():
+            fetched.set()
+            return 'refreshed'
+
+        with tokens.rotation('iam'):
+            self.assertEqual('old', tokens.get('iam', fetch))
+            # the refresh does not replace the token while it is sent
+            self.assertFalse(fetched.wait(0.05))
+            tokens.set('iam', 'rotated')
+
+        self.assertTrue(fetched.wait(5))
+
+
+class TestSharedSession(ConsoleTestCase):
+
+    def test_clients_created_once(self):
+        session = self.root_session()
+        barrier = threading.Barrier(8)
+
+        def client(_):
+            barrier.wait()
+            return session.client('billing')
+
+        with ThreadPoolExecutor(8) as executor:
+            clients = list(executor.map(client, range(8)))
+        self.assertEqual(1, len(set(id(c) for c in clients)))
+
+    def test_iam_token_rotation(self):
+        session = self.root_session(pool_maxsize=8)
+        self.console.latency = 0.01
+        iam = session.client('iam')
+        key = iam.create_root_access_key()
+        self.console.reset_requests()
+
+        # every response rotates the token, a stale token is rejected and
+        # the token page fetched again
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(
+                lambda _: iam.update_root_access_key(key['id'], 'Active'), range(16)))
+
+        self.assertTrue(all(results))
+        self.assertEqual([], [r for r in self.console.requests if r[2] == '/iam/home'])
+
+    def test_save_while_working(self):
+        store = MemoryStore()
+        session = self.root_session(session_store=store)
+        services = ['iam', 'billing', 'support', 'account']
+
+        def work(i):
+            client = session.client(services[i % 4])
+            if services[i % 4] == 'account':
+                client._csrf_token()
+            session.save()
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(work, range(32)))
+
+        saved = store.get(session.session_key)
+        for service, client in session._clients.items():
+            if client._get_state():
+                self.assertEqual(client._get_state(), saved['clients'][service])
+        self.assertIsNotNone(saved['clients']['account']['csrf_token'])
+
+        self.console.reset_requests()
+        resumed = self.root_session(session_store=store)
+        self.assertTrue(resumed.authenticated)
+        self.assertEqual(
+            saved['clients']['account'], resumed.client('account')._get_state())
+        self.assertNotIn(('POST', '/signin'), [
+            (method, route) for method, host, route in self.console.requests])
@@ -0,0 +1,68 @@
+import threading
+import time
+from tests import mock, BaseTestCase
+import coto
+from coto.session.tokens import TokenManager
+
+
+class TestTokenManager(BaseTestCase):
+
+    def test_get(self):
+        tokens = TokenManager(background=False)
+        fetch = mock.Mock(side_effect=['a', 'b'])
+
+        self.assertEqual('a', tokens.get('iam', fetch))
+        self.assertEqual('a', tokens.get('iam', fetch))
+        tokens.invalidate('iam')
+        self.assertEqual('b', tokens.get('iam', fetch))
+        self.assertEqual(2, fetch.call_count)
+
+    def test_expired(self):
+        tokens = TokenManager(background=False)
+        tokens.set('iam', 'a', ttl=-1)
+        self.assertEqual('b', tokens.get('iam', lambda: 'b'))
+
+    def test_refresh_ahead(self):
+        tokens = TokenManager(ttl=10, refresh_ahead=0.5)
+        tokens.set('iam', 'a', ttl=1)
+        refreshed = threading.Event()
+
+        def fetch():
+            refreshed.set()
+            return 'b'
+
+        # the current token is served while a new one is fetched
+        self.assertEqual('a', tokens.get('iam', fetch))
+        self.assertTrue(refreshed.wait(1))
+        for _ in range(100):
+            if tokens.get('iam', fetch) == 'b':
+                break
+            time.sleep(0.01)
+        self.assertEqual('b', tokens.get('iam', fetch))
+
+    def test_dump_load(self):
+        tokens = TokenManager()
+        tokens.set('billing', 'a')
+        tokens.set('iam', 'b', ttl=-1)
+
+        other = TokenManager()
+        other.load(tokens.dump())
+        self.assertEqual({'billing'}, set(other.dump()))
+
+
+class TestTokenRetry(BaseTestCase):
+
+    def test_retry_on_forbidden(self):
+        session = coto.Session()
+        session.authenticated = True
+        billing = session.client('billing')
+
+        responses = [mock.Mock(status_code=403), mock.Mock(status_code=200)]
+        with mock.patch.object(billing, '_get_xsrf_token', side_effect=['old', 'new']), \
+                mock.patch.object(session, '_request', side_effect=responses) as request:
+            self.assertEqual(200, billing._get('account/status').status_code)
+
+        self.assertEqual(
+            ['old', 'new'],
+            [c[1]['headers']['x-awsbc-xsrf-token'] for c in request.call_args_list])
+        self.assertEqual('new', billing._xsrf_token())
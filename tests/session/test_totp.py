@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+import time
+from tests import BaseTestCase
+from coto.session.totp import TotpAllocator
+
+SECRET = 'JBSWY3DPEHPK3PXPJBSWY3DPEHPK3PXP'
+
+
+class TestTotpAllocator(BaseTestCase):
+
+    def test_never_reused(self):
+        allocator = TotpAllocator(interval=0.5)
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            codes = list(executor.map(lambda _: allocator.code(SECRET), range(3)))
+
+        self.assertEqual(3, len(set(codes)))
+        # at most the remainder of the current window plus one more
+        self.assertLess(time.time() - start, 1.5)
+
+    def test_secrets_independent(self):
+        allocator = TotpAllocator(interval=30)
+        start = time.time()
+        allocator.code(SECRET)
+        allocator.code('ONSWG4TFOQFA====')
+        self.assertLess(time.time() - start, 1)
+
+    def test_clock_skew(self):
+        allocator = TotpAllocator()
+        self.assertTrue(allocator.wants_sample())
+
+        allocator.observe(formatdate(time.time() + 120, usegmt=True))
+        self.assertAlmostEqual(120, allocator.skew, delta=1.5)
+        self.assertAlmostEqual(time.time() + 120, allocator.now(), delta=1.5)
+        self.assertFalse(allocator.wants_sample())
+
+        allocator.observe('not a date')
+        self.assertAlmostEqual(120, allocator.skew, delta=1.5)
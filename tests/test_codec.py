@@ -0,0 +1,34 @@
+import unittest
+from tests import BaseTestCase
+from coto.codec import Codec, CODECS, _has_orjson
+
+RESPONSE = (
+    '{"accountId": "123456789012", "name": "Caf\\u00e9 ✓",'
+    ' "keys": [{"id": "AKIA", "status": "Active", "created": 1.5e12}],'
+    ' "limits": {"max": 9007199254740993, "ratio": 0.1}, "none": null}'
+).encode('utf-8')
+
+
+class TestCodec(BaseTestCase):
+
+    def codecs(self):
+        modes = [m for m in CODECS if m != 'orjson' or _has_orjson()]
+        return [Codec(m) for m in modes]
+
+    def test_identical(self):
+        results = [(c.loads(RESPONSE), c.dumps(c.loads(RESPONSE))) for c in self.codecs()]
+        for result in results[1:]:
+            self.assertEqual(results[0], result)
+
+        decoded, encoded = results[0]
+        self.assertEqual('Café ✓', decoded['name'])
+        self.assertIsInstance(encoded, bytes)
+        self.assertIn('Café ✓'.encode('utf-8'), encoded)
+
+    @unittest.skipUnless(_has_orjson(), "orjson not installed")
+    def test_default(self):
+        self.assertEqual('orjson', Codec().mode)
+
+    def test_unsupported(self):
+        with self.assertRaises(Exception):
+            Codec('simplejson')
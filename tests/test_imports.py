@@ -0,0 +1,39 @@
+import subprocess
+import sys
+from tests import BaseTestCase
+
+HEAVY = ['bs4', 'PIL', 'pyotp', 'furl', 'colors', 'asyncio', 'sqlite3', 'lxml']
+
+
+class TestImports(BaseTestCase):
+
+    def imported(self, code):
+        out = subprocess.check_output([
+            sys.executable, '-c',
+            code + "\nimport sys\nprint(' '.join(sys.modules))",
+        ])
+        return set(out.decode().split())
+
+    def test_import_coto(self):
+        modules = self.imported("import coto")
+        self.assertEqual([], [m for m in HEAVY if m in modules])
+        self.assertNotIn('coto.clients.iam', modules)
+
+    def test_client(self):
+        modules = self.imported(
+            "import coto\n"
+            "session = coto.Session()\n"
+            "session.authenticated = True\n"
+            "session.client('iam')\n"
+            "session.client('federation')\n")
+        self.assertEqual([], [m for m in HEAVY if m in modules])
+        self.assertIn('coto.clients.iam', modules)
+        self.assertNotIn('coto.clients.billing', modules)
+
+    def test_client_module_attribute(self):
+        import coto
+        self.assertTrue(issubclass(
+            coto.clients.account.ReauthException, Exception))
+        self.assertIs(coto.clients.iam, sys.modules['coto.clients.iam'])
+        with self.assertRaises(AttributeError):
+            coto.clients.unknown
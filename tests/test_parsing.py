@@ -0,0 +1,71 @@
+from tests import BaseTestCase
+from coto.parsing import Parser, PARSERS
+
+SIGNIN_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <meta name="csrf_token" content="abc&amp;123">
+  <meta name='session_id' content='s-1'>
+  <meta id="xsrf-token" data-token="xsrf=="/>
+  <script>var x = "<meta name='fake' content='no'>";</script>
+</head>
+<body>
+  <div id="message_error" class="hidden"></div>
+  <form id="ap_signin_form" action="https://www.amazon.com/ap/signin">
+    <input type="hidden" name="appActionToken" value="t1">
+    <input type="email" name="email">
+    <input type="password" name="password">
+  </form>
+  <form id="other"><input name="ignored" value="x"></form>
+  <!-- <meta name="commented" content="no"> -->
+</body>
+</html>
+"""
+
+
+LATE_PAGE = SIGNIN_PAGE.replace(
+    '</body>', '  <meta name="late" content="body">\n</body>')
+
+
+class TestParser(BaseTestCase):
+
+    def parsers(self):
+        modes = [m for m in PARSERS if m != 'lxml']
+        try:
+            import lxml
+            modes.append('lxml')
+        except ImportError:
+            pass
+        return [Parser(mode) for mode in modes]
+
+    def test_meta(self):
+        for parser in self.parsers():
+            meta = parser.meta(SIGNIN_PAGE, required=('csrf_token', 'session_id'))
+            self.assertEqual(
+                {'csrf_token': 'abc&123', 'session_id': 's-1'}, meta, parser.mode)
+
+            meta = parser.meta(
+                SIGNIN_PAGE, attr='id', value='data-token',
+                required=('xsrf-token', ))
+            self.assertEqual({'xsrf-token': 'xsrf=='}, meta, parser.mode)
+
+    def test_meta_outside_head(self):
+        for parser in self.parsers():
+            meta = parser.meta(LATE_PAGE, required=('late', ))
+            self.assertEqual({
+                'csrf_token': 'abc&123', 'session_id': 's-1', 'late': 'body',
+            }, meta, parser.mode)
+
+    def test_soup(self):
+        for parser in self.parsers():
+            soup = parser.soup(SIGNIN_PAGE, form_id='ap_signin_form')
+            form = soup.find(id='ap_signin_form')
+            self.assertEqual(
+                ['appActionToken', 'email', 'password'],
+                [i.get('name') for i in form.find_all('input')], parser.mode)
+            self.assertIsNotNone(soup.find(id='message_error'))
+
+    def test_unsupported(self):
+        with self.assertRaises(Exception):
+            Parser('xml')
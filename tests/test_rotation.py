@@ -0,0 +1,128 @@
+import os
+import tempfile
+from tests.fake_console import ConsoleTestCase
+from coto.rotation import RootKeyRotation
+
+
+class TestRootKeyRotation(ConsoleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.console.add_account('other@example.com', self.PASSWORD)
+        self.sessions = {
+            'root': self.root_session(),
+            'other': self.console.session(
+                email='other@example.com', password=self.PASSWORD),
+        }
+        self.old = {
+            name: session.client('iam').create_root_access_key()['id']
+            for name, session in self.sessions.items()
+        }
+        self.created = {}
+        self.directory = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.directory.name, 'rotation.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def store_key(self, account, key):
+        self.created[account] = key
+
+    def keys(self, account):
+        return self.sessions[account].client('iam').list_root_access_keys()
+
+    def test_rotate(self):
+        rotation = RootKeyRotation(
+            self.sessions, self.checkpoint, on_key_created=self.store_key)
+        report = rotation.run()
+
+        self.assertEqual({}, report['failed'])
+        self.assertEqual(
+            {a: k['id'] for a, k in self.created.items()}, report['rotated'])
+        self.assertEqual(8, report['calls'])
+        for account in self.sessions:
+            self.assertIn('secret', self.created[account])
+            self.assertEqual(
+                [(self.created[account]['id'], 'Active')],
+                [(k['id'], k['status']) for k in self.keys(account)])
+
+        with open(self.checkpoint) as fp:
+            self.assertNotIn('secret', fp.read())
+
+    def test_resume(self):
+        self.console.inject_error('/iam/service/root/keys/', status=500)
+        rotation = RootKeyRotation(
+            self.sessions, self.checkpoint, on_key_created=self.store_key,
+            max_workers=1)
+        report = rotation.run()
+        self.assertEqual(1, len(report['failed']))
+
+        # a new run only issues the calls that did not succeed
+        rotation = RootKeyRotation(
+            self.sessions, self.checkpoint, on_key_created=self.store_key)
+        report = rotation.run()
+        self.assertEqual({}, report['failed'])
+        self.assertEqual(1, report['calls'])
+        self.assertEqual(2, len(self.created))
+
+    def test_callback_fails(self):
+        def fail_once(account, key):
+            if not self.created.pop('failed', False):
+                self.created['failed'] = True
+                raise Exception("vault unavailable")
+            self.store_key(account, key)
+
+        rotation = RootKeyRotation(
+            self.sessions, self.checkpoint, on_key_created=fail_once)
+        report = rotation.run(accounts=['root'])
+        self.assertIn('vault unavailable', report['failed']['root'])
+        # the undelivered key is gone, the old key still works
+        self.assertEqual(
+            [(self.old['root'], 'Active')],
+            [(k['id'], k['status']) for k in self.keys('root')])
+
+        report = RootKeyRotation(
+            self.sessions, self.checkpoint, on_key_created=fail_once).run(
+                accounts=['root'])
+        self.assertEqual({}, report['failed'])
+        self.assertEqual(
+            [(self.created['root']['id'], 'Active')],
+            [(k['id'], k['status']) for k in self.keys('root')])
+
+    def test_interrupted_create(self):
+        rotation = RootKeyRotation(
+            self.sessions, self.checkpoint, on_key_created=self.store_key)
+        rotation.plan(accounts=['root'])
+        rotation._update('root', started=True)
+        # created before the process stopped, the secret was never delivered
+        orphan = self.sessions['root'].client('iam').create_root_access_key()
+
+        report = rotation.run(accounts=['root'])
+        self.assertEqual({}, report['failed'])
+        self.assertNotEqual(orphan['id'], self.created['root']['id'])
+        self.assertEqual(
+            [(self.created['root']['id'], 'Active')],
+            [(k['id'], k['status']) for k in self.keys('root')])
+
+    def test_interrupted_delete(self):
+        rotation = RootKeyRotation(
+            self.sessions, self.checkpoint, on_key_created=self.store_key)
+        rotation.run(accounts=['root'])
+        # the old key was deleted before the process stopped
+        self.assertEqual('delete', rotation._state['root']['steps'][2]['action'])
+        rotation._update('root', done=2)
+
+        report = RootKeyRotation(self.sessions, self.checkpoint).run(
+            accounts=['root'])
+        self.assertEqual({}, report['failed'])
+        self.assertEqual(1, report['calls'])
+        self.assertEqual(self.created['root']['id'], report['rotated']['root'])
+
+    def test_plan_limit(self):
+        iam = self.sessions['root'].client('iam')
+        iam.create_root_access_key()
+
+        rotation = RootKeyRotation(self.sessions)
+        report = rotation.run(accounts=['root'])
+        self.assertIn('two active', report['failed']['root'])